@@ -1,6 +1,9 @@
+import secrets
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
+from app.core.config import get_settings
 from fastapi.security import OAuth2PasswordBearer
 from app.schemas.user import UserResponse
 from app.models.user import User
@@ -79,3 +82,17 @@ def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(None)
+) -> None:
+    """
+    Dependency guarding admin endpoints with the ADMIN_API_KEY setting.
+    Admin endpoints are disabled when no key is configured.
+    """
+    admin_key = get_settings().ADMIN_API_KEY
+    if not admin_key or not x_admin_token or not secrets.compare_digest(x_admin_token, admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin credentials required"
+        )
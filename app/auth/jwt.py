@@ -1,11 +1,14 @@
 # app/auth/jwt.py
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional, Union
+from functools import lru_cache
+from typing import Any, List, Optional, Union
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from uuid import UUID
+import os
 import secrets
 
 from app.core.config import get_settings
@@ -34,6 +37,24 @@ def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt."""
     return pwd_context.hash(password)
 
+@lru_cache(maxsize=None)
+def _hash_executor(workers: int) -> ThreadPoolExecutor:
+    """One long-lived pool per worker count, shared by every bulk request."""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+def hash_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+    """
+    Hash many passwords with bcrypt, spreading the work across CPU cores.
+
+    bcrypt releases the GIL while hashing, so a thread pool runs the hashes in
+    parallel without forking the (threaded) web worker or starting a pool per
+    request. Results are returned in the same order as the input.
+    """
+    workers = workers or settings.BULK_HASH_WORKERS or os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < 2:
+        return [get_password_hash(p) for p in passwords]
+    return list(_hash_executor(workers).map(get_password_hash, passwords))
+
 def create_token(
     user_id: Union[str, UUID],
     token_type: TokenType,
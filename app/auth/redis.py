@@ -1,21 +1,188 @@
 # app/auth/redis.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
 import redis
 from app.core.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a Redis call is short-circuited by an open breaker."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Minimal circuit breaker for Redis calls.
+
+    - closed: calls go through; consecutive failures are counted.
+    - open: calls fail immediately with CircuitOpenError until the
+      recovery timeout has elapsed.
+    - half_open: a single probe call is let through; success closes the
+      breaker, failure re-opens it for another recovery period.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        recovery_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._recovery_elapsed():
+                return self.HALF_OPEN
+            return self._state
+
+    def _recovery_elapsed(self) -> bool:
+        return self._clock() - self._opened_at >= self.recovery_timeout
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and self._recovery_elapsed():
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError("Redis circuit breaker is open")
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run func through the breaker, recording the outcome. Exceptions other
+        than Redis errors are not counted, but still end a half-open probe so
+        another call can probe.
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except redis.RedisError:
+            self._on_failure()
+            raise
+        finally:
+            # A no-op after _on_failure; clears the probe on any other exception
+            self._release_probe()
+        self._on_success()
+        return result
+
+    def reset(self) -> None:
+        """Force the breaker back to the closed state."""
+        self._on_success()
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS_FAILURE_THRESHOLD,
+    recovery_timeout=settings.REDIS_RECOVERY_TIMEOUT,
+)
+
+# Process-local view of revoked JTIs (jti -> wall-clock expiry). Used to keep
+# revocations effective when Redis is unavailable and degraded mode is fail-open.
+_local_revocations: Dict[str, float] = {}
+_local_lock = threading.Lock()
+# Expired entries are pruned whenever the cache reaches this size, which then
+# doubles so pruning stays amortized O(1) per insert
+_LOCAL_PRUNE_SIZE = 1024
+_local_prune_at = _LOCAL_PRUNE_SIZE
+# Size bound; past it the oldest revocations are forgotten locally at the next
+# prune, so the cache never holds more than about twice this many
+_LOCAL_MAX_REVOCATIONS = 100_000
+
+
+def _remember_revocation(jti: str, exp: int) -> None:
+    global _local_prune_at
+    with _local_lock:
+        now = time.time()
+        _local_revocations[jti] = now + exp
+        if len(_local_revocations) < _local_prune_at:
+            return
+        for expired in [key for key, expires_at in _local_revocations.items() if expires_at <= now]:
+            del _local_revocations[expired]
+        # Dicts keep insertion order, so the first keys are the oldest revocations
+        for oldest in list(_local_revocations)[:len(_local_revocations) - _LOCAL_MAX_REVOCATIONS]:
+            del _local_revocations[oldest]
+        _local_prune_at = max(_LOCAL_PRUNE_SIZE, 2 * len(_local_revocations))
+
+
+def _locally_revoked(jti: str) -> bool:
+    with _local_lock:
+        expires_at: Optional[float] = _local_revocations.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del _local_revocations[jti]
+            return False
+        return True
+
 
 def get_redis():
     if not hasattr(get_redis, "redis"):
         get_redis.redis = redis.Redis.from_url(
-            settings.REDIS_URL or "redis://localhost"
+            settings.REDIS_URL or "redis://localhost",
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
         )
     return get_redis.redis
 
 def add_to_blacklist(jti: str, exp: int):
     """Add a token's JTI to the blacklist"""
-    redis_conn = get_redis()
-    redis_conn.set(f"blacklist:{jti}", "1", ex=exp)
+    _remember_revocation(jti, exp)
+    try:
+        breaker.call(lambda: get_redis().set(f"blacklist:{jti}", "1", ex=exp))
+    except (redis.RedisError, CircuitOpenError) as e:
+        logger.warning(f"Could not persist revocation of {jti} to Redis: {e}")
+        if settings.REDIS_DEGRADED_MODE == "fail_closed":
+            raise
+
+async def is_blacklisted(jti: str) -> bool:
+    """
+    Check if a token's JTI is blacklisted.
 
-def is_blacklisted(jti: str) -> bool:
-    """Check if a token's JTI is blacklisted"""
-    redis_conn = get_redis()
+    When Redis is failing or the breaker is open, the degraded mode decides:
+    fail_open answers from the local revocation cache, fail_closed treats
+    every token as revoked.
+    """
+    if _locally_revoked(jti):
+        return True
+    try:
+        value = breaker.call(lambda: get_redis().get(f"blacklist:{jti}"))
+    except (redis.RedisError, CircuitOpenError):
+        return settings.REDIS_DEGRADED_MODE == "fail_closed"
+    return value is not None
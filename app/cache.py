@@ -0,0 +1,90 @@
+# app/cache.py
+"""
+Redis-backed cache for per-user calculation data.
+
+Entries (statistics, single calculations and list pages, stored as serialized
+CalculationResponse payloads with their validators) are keyed by a per-user
+generation counter and by the version of the data that the database reports
+when the read starts (see read_key). Every write to a user's calculations
+bumps the counter with an atomic INCR, which makes all of that user's cached
+entries unreachable at once; they then expire through their TTL. The version
+part keeps entries correct where no bump happens: a bump that failed while
+Redis was down, in this process or another, and rows dropped by partition
+retention.
+
+All operations go through a circuit breaker of their own, so cache errors
+never open the one that guards the token blacklist, and fail open: when Redis
+is unavailable, reads miss and writes are skipped, so callers fall back to
+Postgres.
+"""
+import hashlib
+from typing import Any, Optional
+from uuid import UUID
+
+import redis
+
+from app.auth import redis as redis_auth
+from app.core.config import get_settings
+from app.serialization import dumps, loads
+
+settings = get_settings()
+
+_CACHE_ERRORS = (redis.RedisError, redis_auth.CircuitOpenError)
+
+breaker = redis_auth.CircuitBreaker(
+    failure_threshold=settings.REDIS_FAILURE_THRESHOLD,
+    recovery_timeout=settings.REDIS_RECOVERY_TIMEOUT,
+)
+
+
+def _generation_key(user_id: UUID) -> str:
+    return f"calc:gen:{user_id}"
+
+
+def read_key(kind: str, user_id: UUID, generation: int, *parts) -> str:
+    """
+    Key for a cached read of a user's calculations at a given generation. The
+    remaining parts identify the read and must include the version of the data
+    read from the database (such as its ETag); they are hashed to bound the
+    key length.
+    """
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f"calc:{kind}:{user_id}:{generation}:{digest}"
+
+
+def generation(user_id: UUID) -> Optional[int]:
+    """Current cache generation for a user, or None if Redis is unavailable."""
+    try:
+        value = breaker.call(lambda: redis_auth.get_redis().get(_generation_key(user_id)))
+    except _CACHE_ERRORS:
+        return None
+    return int(value) if value is not None else 0
+
+
+def bump_generation(user_id: UUID) -> None:
+    """Invalidate every cached entry of a user in O(1)."""
+    try:
+        breaker.call(lambda: redis_auth.get_redis().incr(_generation_key(user_id)))
+    except _CACHE_ERRORS:
+        # Entries cached before the write are keyed by an older version
+        pass
+
+
+def get_json(key: str) -> Optional[Any]:
+    """Return a cached JSON value, or None on a miss."""
+    try:
+        value = breaker.call(lambda: redis_auth.get_redis().get(key))
+    except _CACHE_ERRORS:
+        return None
+    return loads(value) if value is not None else None
+
+
+def set_json(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    """Cache a JSON-serializable value (UUIDs and datetimes included) for ttl seconds."""
+    payload = dumps(value)
+    try:
+        breaker.call(
+            lambda: redis_auth.get_redis().set(key, payload, ex=ttl or settings.CALCULATIONS_CACHE_TTL)
+        )
+    except _CACHE_ERRORS:
+        pass
@@ -0,0 +1,211 @@
+# app/compression.py
+"""
+Response compression negotiated through Accept-Encoding.
+
+CompressionMiddleware supports zstd, brotli (br) and gzip. Complete responses
+smaller than COMPRESSION_MINIMUM_SIZE are sent unchanged. Streaming responses
+are compressed chunk by chunk, and each chunk is flushed as soon as it has
+been compressed, so the client still gets the first bytes straight away.
+
+When a coding is negotiated, responses carry a weak version of the handler's
+ETag, because compressed bytes differ from the uncompressed representation.
+That includes 304s and responses too small to compress, so a client holds one
+validator per representation whichever path answered it. If-None-Match uses
+weak comparison, so revalidation still works (see app.conditional).
+
+Cache-Control: no-transform, on the request or the response, turns
+compression off for that response, and its ETag is left as it is.
+"""
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+_COMPRESSORS = {"zstd": _Zstd, "br": _Brotli, "gzip": _Gzip}
+
+
+def no_transform(cache_control: Optional[str]) -> bool:
+    """Whether a Cache-Control header value carries the no-transform directive."""
+    if not cache_control:
+        return False
+    return any(
+        directive.split("=", 1)[0].strip().lower() == "no-transform"
+        for directive in cache_control.split(",")
+    )
+
+
+def choose_encoding(accept_encoding: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Pick a content coding from Accept-Encoding.
+
+    The acceptable coding with the highest q-value wins, server preference
+    (the order of offered) breaking ties. Returns None when no offered coding
+    is acceptable.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for entry in accept_encoding.split(","):
+        coding, *params = entry.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing HTTP responses."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Optional[List[str]] = None,
+        minimum_size: Optional[int] = None,
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.encodings = encodings or settings.COMPRESSION_ENCODINGS
+        self.minimum_size = (
+            settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        )
+        self.levels = {
+            "gzip": settings.COMPRESSION_GZIP_LEVEL,
+            "br": settings.COMPRESSION_BROTLI_LEVEL,
+            "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+            **(levels or {}),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding"), self.encodings)
+        if encoding is None or no_transform(request_headers.get("cache-control")):
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.compressor = None
+        # None until the first body message decides whether to compress
+        self.compressing: Optional[bool] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the start until the first body chunk shows whether to compress
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressing is None:
+            encodable = self._encodable()
+            self.compressing = encodable and self._should_compress(body, more_body)
+            headers = MutableHeaders(raw=self.start["headers"])
+            if encodable:
+                # The same validator whether this ends up compressed, too small
+                # to compress or a 304
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            if self.compressing:
+                self.compressor = _COMPRESSORS[self.encoding](self.middleware.levels[self.encoding])
+                headers["Content-Encoding"] = self.encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = self.compressor.compress(body) + self.compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await self._send(self.start)
+                    await self._send({"type": "http.response.body", "body": body})
+                    return
+            await self._send(self.start)
+
+        if self.compressing:
+            body = self.compressor.compress(body) if body else b""
+            if not more_body:
+                body += self.compressor.finish()
+            message = {"type": "http.response.body", "body": body, "more_body": more_body}
+        await self._send(message)
+
+    def _encodable(self) -> bool:
+        """Whether the response's representation depends on the negotiated coding."""
+        headers = Headers(raw=self.start["headers"])
+        return (
+            self.start["status"] != 204
+            and "content-encoding" not in headers
+            and not no_transform(headers.get("cache-control"))
+        )
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        if self.start["status"] == 304:
+            return False
+        # Streamed responses have no known size and are always compressed
+        return more_body or len(body) >= self.middleware.minimum_size
@@ -1,8 +1,12 @@
 from app.database import engine
 from app.models.user import Base
+from app.models.upload import CalculationUpload  # noqa: F401  (registers calculation_uploads)
+from app.models.formula import Formula  # noqa: F401  (registers formulas)
+from app.partitioning import maintain_partitions
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    maintain_partitions(engine)
 
 def drop_db():
     Base.metadata.drop_all(bind=engine)
@@ -1,18 +1,152 @@
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 from uuid import UUID
-from typing import List
-from fastapi import Body, FastAPI, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import Body, FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
 
-from app.auth.dependencies import get_current_active_user
+from app.auth.dependencies import get_current_active_user, require_admin
 from app.models.calculation import Calculation
+from app.models.dependency import dependents, lock_graph, purge_dangling_edges, would_cycle
+from app.models.formula import Formula
+from app.models.input_store import purge_orphaned_chunks
+from app.models.upload import CalculationUpload
 from app.models.user import User
-from app.schemas.calculation import CalculationBase, CalculationResponse, CalculationUpdate
+from app.schemas.calculation import (
+    CalculationBase,
+    CalculationFilters,
+    CalculationResponse,
+    CalculationSort,
+    CalculationStats,
+    CalculationType,
+    CalculationUpdate,
+    CalculationUploadCreate,
+    CalculationUploadFinalize,
+    CalculationUploadResponse,
+    CalculationUploadResult,
+    ResultMemoStats,
+    check_reference_positions,
+    validate_raw_inputs,
+)
+from app.schemas.formula import FormulaCreate, FormulaResponse, FormulaSweep
 from app.schemas.token import TokenResponse
-from app.schemas.user import UserCreate, UserResponse, UserLogin
+from app.schemas.user import (
+    BulkUserDelete,
+    BulkUserDeleteResponse,
+    BulkUserProvision,
+    BulkUserProvisionResponse,
+    UserCreate,
+    UserLogin,
+    UserResponse,
+)
+from app.provision_users import provision_users
 from app.database import Base, get_db, engine
+from app.core.config import get_settings
+from app.partitioning import maintain_partitions, pruning_criteria
+from app import cache
+from app.memo import memo
+from app.conditional import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    validator_headers,
+)
+from app.compression import CompressionMiddleware
+from app.models.types import float64_view, pack_float64
+from app.operations.reduction import shutdown_pool
+from app.negotiation import OCTET_STREAM, NegotiatedRoute, negotiate, negotiated_response, preferred
+from app.operations.sweep import Sweep
+from app.serialization import ORJSONResponse, calculation_payload, dumps
+from app.projection import CALCULATION_FIELDS, parse_fields, project_row, projected_columns
+
+settings = get_settings()
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated subset of fields to return "
+    f"({', '.join(CALCULATION_FIELDS)}). Only these columns are read."
+)
+
+def get_filters(
+    type: Optional[CalculationType] = Query(None, description="Only calculations of this type"),
+    created_after: Optional[datetime] = Query(None, description="Created at or after this time (UTC)"),
+    created_before: Optional[datetime] = Query(None, description="Created before this time (UTC)"),
+    result_min: Optional[float] = Query(None, description="Minimum result (inclusive)"),
+    result_max: Optional[float] = Query(None, description="Maximum result (inclusive)"),
+    sort: Optional[CalculationSort] = Query(
+        None, description="Order by created_at or result; prefix with '-' for descending"
+    ),
+) -> CalculationFilters:
+    """Dependency collecting the calculation list filters."""
+    return build_filters(
+        type=type,
+        created_after=created_after,
+        created_before=created_before,
+        result_min=result_min,
+        result_max=result_max,
+        sort=sort,
+    )
+
+def build_filters(**values) -> CalculationFilters:
+    """Validate filter values, reporting inconsistent ranges as 400."""
+    try:
+        return CalculationFilters(**values)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="; ".join(err["msg"] for err in e.errors())
+        )
+
+def get_fields(fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)) -> Optional[List[str]]:
+    """Dependency parsing the sparse fieldset parameter."""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def read_entry(etag: str, last_modified: Optional[datetime], body) -> dict:
+    """A serialized read: the JSON body plus its validators, as stored in the cache."""
+    return {
+        "etag": etag,
+        "last_modified": last_modified.isoformat() if last_modified else None,
+        "body": body,
+    }
+
+def serve_entry(request: Request, entry: dict, if_modified_since: bool = True) -> Response:
+    """
+    Answer a read from a serialized entry in the negotiated format, with a 304
+    when the client's copy is current.
+    """
+    last_modified = entry["last_modified"] and datetime.fromisoformat(entry["last_modified"])
+    if is_not_modified(request, entry["etag"], last_modified if if_modified_since else None):
+        return not_modified_response(entry["etag"], last_modified or None)
+    return negotiated_response(
+        request, entry["body"], headers=validator_headers(entry["etag"], last_modified or None)
+    )
+
+def run_maintenance():
+    """
+    Create upcoming partitions, apply retention, and remove the input chunks
+    and dependency edges of calculations that no longer exist.
+    """
+    maintain_partitions(engine)
+    with engine.begin() as conn:
+        purge_orphaned_chunks(conn)
+    with engine.begin() as conn:
+        purge_dangling_edges(conn)
+
+async def maintenance_loop():
+    """Run the periodic maintenance every CALCULATIONS_PARTITION_MAINTENANCE_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.CALCULATIONS_PARTITION_MAINTENANCE_SECONDS)
+        try:
+            await asyncio.to_thread(run_maintenance)
+        except Exception as e:  # pragma: no cover
+            print(f"Maintenance failed: {e}")
 
 # Create tables on startup
 @asynccontextmanager
@@ -20,14 +154,23 @@ async def lifespan(app: FastAPI):
     print("Creating tables...")
     Base.metadata.create_all(bind=engine)
     print("Tables created successfully!")
+    if settings.CALCULATIONS_PARTITIONING != "none":
+        maintain_partitions(engine)
+    maintenance = asyncio.create_task(maintenance_loop())
     yield
+    maintenance.cancel()
+    shutdown_pool()
 
 app = FastAPI(
     title="Calculations API",
     description="API for managing calculations",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
+# Accept MessagePack and CBOR request bodies on every route
+app.router.route_class = NegotiatedRoute
+app.add_middleware(CompressionMiddleware)
 
 # ------------------------------------------------------------------------------
 # Health Endpoint
@@ -111,6 +254,51 @@ def login_form(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = D
         "token_type": "bearer"
     }
 
+# ------------------------------------------------------------------------------
+# Admin Endpoints
+# ------------------------------------------------------------------------------
+@app.post(
+    "/admin/users/bulk",
+    response_model=BulkUserProvisionResponse,
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+def bulk_provision_users(payload: BulkUserProvision, db: Session = Depends(get_db)):
+    """
+    Provision many users at once.
+
+    Passwords are hashed in parallel and all valid rows are inserted with a single
+    multi-row INSERT; the report lists created, duplicate and failed rows.
+    """
+    report = provision_users(db, payload.users)
+    db.commit()
+    return report
+
+@app.post(
+    "/admin/users/bulk-delete",
+    response_model=BulkUserDeleteResponse,
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+def bulk_delete_users(payload: BulkUserDelete, db: Session = Depends(get_db)):
+    """
+    Delete users in one statement; their calculations go with them through the
+    database's ON DELETE CASCADE rather than being loaded and deleted row by row.
+    """
+    deleted = User.bulk_delete(db, payload.user_ids)
+    db.commit()
+    return {"deleted": deleted}
+
+@app.get(
+    "/admin/metrics/result-memo",
+    response_model=ResultMemoStats,
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+def result_memo_metrics():
+    """Hit-rate metrics of this worker's calculation result memo."""
+    return memo.stats()
+
 # ------------------------------------------------------------------------------
 # Calculations Endpoints (BREAD)
 # ------------------------------------------------------------------------------
@@ -120,9 +308,32 @@ def login_form(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = D
     response_model=CalculationResponse,
     status_code=status.HTTP_201_CREATED,
     tags=["calculations"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                OCTET_STREAM: {
+                    "schema": {
+                        "type": "string",
+                        "format": "binary",
+                        "description": "Inputs as packed little-endian float64",
+                    }
+                }
+            },
+        }
+    },
 )
 def create_calculation(
-    calculation_data: CalculationBase,
+    request: Request,
+    calculation_data: CalculationBase = Body(None),
+    calculation_type: Optional[str] = Header(
+        None,
+        alias="X-Calculation-Type",
+        description="Calculation type for application/octet-stream bodies",
+    ),
+    type: Optional[str] = Query(
+        None, description="Calculation type for application/octet-stream bodies"
+    ),
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -131,21 +342,51 @@ def create_calculation(
     
     The endpoint reads the calculation type and inputs from the request (ignoring any extra fields),
     computes the result using the appropriate operation, and assigns the authenticated user's ID.
+
+    Inputs may also be sent as an application/octet-stream body of packed
+    little-endian float64 values, with the type in the X-Calculation-Type
+    header or the type query parameter. They are validated and computed on a
+    zero-copy view of the body.
     """
     try:
+        new_expression = new_references = None
+        if calculation_data is not None:
+            new_type, new_inputs = calculation_data.type, calculation_data.inputs
+            new_expression = calculation_data.expression
+            new_references = calculation_data.references
+        else:
+            raw_body = getattr(request.state, "raw_body", None)
+            if raw_body is None:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Request body is required."
+                )
+            new_inputs = float64_view(raw_body)
+            new_type = validate_raw_inputs(calculation_type or type, new_inputs)
+
         # Create the calculation using the factory method.
         new_calculation = Calculation.create(
-            calculation_type=calculation_data.type,
+            calculation_type=new_type,
             user_id=current_user.id,
-            inputs=calculation_data.inputs,
+            inputs=new_inputs,
+            expression=new_expression,
+            references=new_references,
         )
+        if new_references:
+            # The sources cannot be deleted until this edge is committed
+            lock_graph(db.connection(), current_user.id)
+            new_calculation.resolve_references(db)
+            new_calculation.operation.validate(new_calculation.inputs, new_calculation.expression)
         new_calculation.result = new_calculation.get_result()
 
         # Persist the calculation to the database.
         db.add(new_calculation)
         db.commit()
+        cache.bump_generation(current_user.id)
         db.refresh(new_calculation)
-        return new_calculation
+        return negotiated_response(
+            request, calculation_payload(new_calculation), status_code=status.HTTP_201_CREATED
+        )
 
     except ValueError as e:
         db.rollback()
@@ -157,57 +398,365 @@ def create_calculation(
 # Browse / List Calculations (for the current user)
 @app.get("/calculations", response_model=List[CalculationResponse], tags=["calculations"])
 def list_calculations(
+    request: Request,
+    filters: CalculationFilters = Depends(get_filters),
+    fields: Optional[List[str]] = Depends(get_fields),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List the current user's calculations, optionally filtered by type, creation
+    time and result range and ordered by created_at or result.
+
+    Pages are cached in Redis under the user's generation and an ETag derived
+    from the user's calculation count and latest updated_at, which also
+    answers If-None-Match.
+    """
+    # Each representation gets its own ETag and cache entry
+    media_type = negotiate(request)
+    count, latest = Calculation.list_version(db, current_user.id)
+    etag = make_etag(
+        current_user.id, count, latest.isoformat() if latest else "", request.url.query, media_type
+    )
+    # Deletions don't move Last-Modified, so only the ETag is used to answer 304
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, latest)
+
+    # Keyed by the version just read, so a page cached before a later write is
+    # never served, even when that write's generation bump failed or it was
+    # made by retention, which bumps nothing
+    generation = cache.generation(current_user.id)
+    key = None
+    if generation is not None:
+        key = cache.read_key("list", current_user.id, generation, etag)
+        entry = cache.get_json(key)
+        if entry is not None:
+            return serve_entry(request, entry, if_modified_since=False)
+
+    if fields is not None:
+        query = db.query(*projected_columns(fields)).filter(Calculation.user_id == current_user.id)
+        rows = Calculation.apply_list_filters(query, **filters.model_dump()).all()
+        body = [project_row(row, fields, db) for row in rows]
+    else:
+        # The response includes inputs, so load them in the same query
+        query = (
+            db.query(Calculation)
+            .options(undefer(Calculation.inline_inputs))
+            .filter(Calculation.user_id == current_user.id)
+        )
+        calculations = Calculation.apply_list_filters(query, **filters.model_dump()).all()
+        body = [calculation_payload(c) for c in calculations]
+
+    entry = read_entry(etag, latest, body)
+    if key is not None:
+        cache.set_json(key, entry)
+    return serve_entry(request, entry, if_modified_since=False)
+
+# Aggregate statistics (declared before /calculations/{calc_id} so "stats" is not read as an id)
+@app.get("/calculations/stats", response_model=CalculationStats, tags=["calculations"])
+def calculation_stats(
+    created_after: Optional[datetime] = Query(None, description="Created at or after this time (UTC)"),
+    created_before: Optional[datetime] = Query(None, description="Created before this time (UTC)"),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Per-type and overall count/sum/min/max/avg of results, plus calculations per day,
+    aggregated in the database. Results are cached under the user's list version
+    (see list_calculations).
+    """
+    filters = build_filters(created_after=created_after, created_before=created_before)
+    count, latest = Calculation.list_version(db, current_user.id)
+    generation = cache.generation(current_user.id)
+    key = cache.read_key(
+        "stats", current_user.id, generation, count, latest, filters.created_after, filters.created_before
+    )
+    if generation is not None:
+        cached = cache.get_json(key)
+        if cached is not None:
+            return cached
+    stats = Calculation.user_stats(
+        db, current_user.id, filters.created_after, filters.created_before
+    )
+    if generation is not None:
+        cache.set_json(key, stats)
+    return stats
+
+# ------------------------------------------------------------------------------
+# Chunked uploads for inputs too large for a single request
+# ------------------------------------------------------------------------------
+def get_upload(upload_id: str, current_user, db: Session, lock: Optional[str] = None) -> CalculationUpload:
+    """
+    Load one of the current user's upload sessions or raise 400/404.
+
+    lock="share" lets chunks be stored concurrently while keeping the session
+    from being finalized or aborted underneath them; lock="update" takes the
+    session exclusively. A request that waited on a session which was ended
+    meanwhile finds no row and gets the 404.
+    """
+    try:
+        upload_uuid = UUID(upload_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid upload id format.")
+    query = db.query(CalculationUpload).filter(
+        CalculationUpload.id == upload_uuid,
+        CalculationUpload.user_id == current_user.id
+    )
+    if lock is not None:
+        query = query.with_for_update(read=lock == "share")
+    upload = query.first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    return upload
+
+def upload_response(upload: CalculationUpload, db: Session) -> CalculationUploadResponse:
+    chunks = upload.chunks(db)
+    return CalculationUploadResponse(
+        id=upload.id,
+        type=upload.type,
+        created_at=upload.created_at,
+        updated_at=upload.updated_at,
+        chunks=[seq for seq, _ in chunks],
+        values=sum(count for _, count in chunks),
+    )
+
+@app.post(
+    "/calculations/uploads",
+    response_model=CalculationUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["calculations"],
+)
+def create_upload(
+    upload_data: CalculationUploadCreate,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a chunked upload. PUT the inputs as numbered application/octet-stream
+    chunks of packed little-endian float64 values, then finalize.
+    """
+    CalculationUpload.purge_expired(db, current_user.id)
+    upload = CalculationUpload(user_id=current_user.id, type=upload_data.type.value)
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload_response(upload, db)
+
+@app.get("/calculations/uploads/{upload_id}", response_model=CalculationUploadResponse, tags=["calculations"])
+def read_upload(
+    upload_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Report which chunks have been received, so an interrupted upload can resume."""
+    return upload_response(get_upload(upload_id, current_user, db), db)
+
+@app.put(
+    "/calculations/uploads/{upload_id}/chunks/{seq}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["calculations"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {OCTET_STREAM: {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+def put_upload_chunk(
+    upload_id: str,
+    seq: int,
+    request: Request,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Store chunk seq (from 0). Re-sending a chunk replaces it."""
+    raw_body = getattr(request.state, "raw_body", None)
+    if raw_body is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Chunks must be sent as {OCTET_STREAM}."
+        )
+    upload = get_upload(upload_id, current_user, db, lock="share")
+    try:
+        upload.put_chunk(db, seq, raw_body)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    db.commit()
+    return None
+
+@app.post(
+    "/calculations/uploads/{upload_id}/finalize",
+    response_model=CalculationUploadResult,
+    status_code=status.HTTP_201_CREATED,
+    tags=["calculations"],
+)
+def finalize_upload(
+    upload_id: str,
+    finalize_data: CalculationUploadFinalize,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    calculations = db.query(Calculation).filter(Calculation.user_id == current_user.id).all()
-    return calculations
+    """
+    Compute the result in one streaming pass over the uploaded chunks and store
+    them as the inputs of a new calculation. The response omits the inputs.
+    """
+    upload = get_upload(upload_id, current_user, db, lock="update")
+    try:
+        calculation, input_count = upload.finalize(db, finalize_data.chunks)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    cache.bump_generation(current_user.id)
+    db.refresh(calculation)
+    return CalculationUploadResult(
+        id=calculation.id,
+        user_id=calculation.user_id,
+        type=calculation.type,
+        result=calculation.result,
+        input_count=input_count,
+        created_at=calculation.created_at,
+        updated_at=calculation.updated_at,
+    )
+
+@app.delete("/calculations/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["calculations"])
+def abort_upload(
+    upload_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Abandon an upload and discard its chunks."""
+    get_upload(upload_id, current_user, db, lock="update").abort(db)
+    db.commit()
+    return None
 
 # Read / Retrieve a Specific Calculation by ID
 @app.get("/calculations/{calc_id}", response_model=CalculationResponse, tags=["calculations"])
 def get_calculation(
     calc_id: str,
+    request: Request,
+    fields: Optional[List[str]] = Depends(get_fields),
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Read one calculation. Responses are cached in Redis under the user's
+    generation and validators derived from updated_at, which also answer
+    If-None-Match and If-Modified-Since.
+    """
     try:
         calc_uuid = UUID(calc_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid calculation id format.")
-    calculation = db.query(Calculation).filter(
+
+    media_type = negotiate(request)
+    criteria = (
         Calculation.id == calc_uuid,
-        Calculation.user_id == current_user.id
-    ).first()
-    if not calculation:
+        Calculation.user_id == current_user.id,
+        *pruning_criteria(Calculation, calc_uuid)
+    )
+    # From the (id, user_id) INCLUDE (updated_at) index alone
+    version = db.query(Calculation.updated_at).filter(*criteria).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Calculation not found.")
-    return calculation
+    etag = make_etag(calc_uuid, version.updated_at.isoformat(), request.url.query, media_type)
+    if is_not_modified(request, etag, version.updated_at):
+        return not_modified_response(etag, version.updated_at)
+
+    # Keyed by the version just read, like list pages
+    generation = cache.generation(current_user.id)
+    key = None
+    if generation is not None:
+        key = cache.read_key("item", current_user.id, generation, etag)
+        entry = cache.get_json(key)
+        if entry is not None:
+            return serve_entry(request, entry)
+
+    if fields is not None:
+        row = db.query(
+            *projected_columns(fields, extra=[Calculation.updated_at])
+        ).filter(*criteria).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Calculation not found.")
+        updated_at, body = row.updated_at, project_row(row, fields, db)
+    else:
+        calculation = db.query(Calculation).options(undefer(Calculation.inline_inputs)).filter(
+            *criteria
+        ).first()
+        if not calculation:
+            raise HTTPException(status_code=404, detail="Calculation not found.")
+        updated_at = calculation.updated_at
+        body = calculation_payload(calculation)
+
+    etag = make_etag(calc_uuid, updated_at.isoformat(), request.url.query, media_type)
+    entry = read_entry(etag, updated_at, body)
+    if key is not None:
+        cache.set_json(key, entry)
+    return serve_entry(request, entry)
 
 # Edit / Update a Calculation
 @app.put("/calculations/{calc_id}", response_model=CalculationResponse, tags=["calculations"])
 def update_calculation(
     calc_id: str,
     calculation_update: CalculationUpdate,
+    request: Request,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Update a calculation's inputs or input references. Calculations whose
+    inputs reference it are recomputed in the same transaction, in dependency
+    order, if its result changed; X-Recomputed-Calculations counts them.
+    """
     try:
         calc_uuid = UUID(calc_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid calculation id format.")
+    changes_result = calculation_update.inputs is not None or calculation_update.references is not None
+    if changes_result:
+        # Taken before anything is read and held until commit, so the cycle
+        # check and the recomputed dependents never work from results or
+        # edges that a concurrent update is about to change
+        lock_graph(db.connection(), current_user.id)
     calculation = db.query(Calculation).filter(
         Calculation.id == calc_uuid,
-        Calculation.user_id == current_user.id
+        Calculation.user_id == current_user.id,
+        *pruning_criteria(Calculation, calc_uuid)
     ).first()
     if not calculation:
         raise HTTPException(status_code=404, detail="Calculation not found.")
 
-    if calculation_update.inputs is not None:
-        calculation.inputs = calculation_update.inputs
-        calculation.result = calculation.get_result()
+    recomputed = []
+    if changes_result:
+        # The calculation and everything downstream of it change in one transaction
+        try:
+            previous_result = calculation.result
+            if calculation_update.inputs is not None:
+                calculation.inputs = calculation_update.inputs
+            references = calculation_update.references
+            if references is not None:
+                check_reference_positions(references, len(calculation.inputs))
+                if would_cycle(db.connection(), calculation.id, references.values()):
+                    raise ValueError("These references would make the calculation depend on itself")
+                calculation.references = references
+            calculation.resolve_references(db)
+            calculation.operation.validate(calculation.inputs, calculation.expression)
+            calculation.result = calculation.get_result()
+            if calculation.result != previous_result:
+                recomputed = calculation.recompute_dependents(db)
+        except ValueError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
     calculation.updated_at = datetime.utcnow()
     db.commit()
+    cache.bump_generation(current_user.id)
     db.refresh(calculation)
-    return calculation
+    return negotiated_response(
+        request,
+        calculation_payload(calculation),
+        headers={"X-Recomputed-Calculations": str(len(recomputed))},
+    )
 
 # Delete a Calculation
 @app.delete("/calculations/{calc_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["calculations"])
@@ -222,14 +771,157 @@ def delete_calculation(
         raise HTTPException(status_code=400, detail="Invalid calculation id format.")
     calculation = db.query(Calculation).filter(
         Calculation.id == calc_uuid,
-        Calculation.user_id == current_user.id
+        Calculation.user_id == current_user.id,
+        *pruning_criteria(Calculation, calc_uuid)
     ).first()
     if not calculation:
         raise HTTPException(status_code=404, detail="Calculation not found.")
+    # No reference to it can be added between the check and the delete
+    lock_graph(db.connection(), current_user.id)
+    if dependents(db.connection(), calculation.id):
+        raise HTTPException(
+            status_code=400,
+            detail="Calculation is an input of other calculations; remove those references first."
+        )
     db.delete(calculation)
     db.commit()
+    cache.bump_generation(current_user.id)
+    return None
+
+# ------------------------------------------------------------------------------
+# Saved formulas and parameter sweeps
+# ------------------------------------------------------------------------------
+NDJSON = "application/x-ndjson"
+
+def get_formula(formula_id: str, current_user, db: Session) -> Formula:
+    """Load one of the current user's formulas or raise 400/404."""
+    try:
+        formula_uuid = UUID(formula_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid formula id format.")
+    formula = db.query(Formula).filter(
+        Formula.id == formula_uuid,
+        Formula.user_id == current_user.id
+    ).first()
+    if not formula:
+        raise HTTPException(status_code=404, detail="Formula not found.")
+    return formula
+
+@app.post(
+    "/formulas",
+    response_model=FormulaResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["formulas"],
+)
+def create_formula(
+    formula_data: FormulaCreate,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Save an expression under a name, to evaluate or sweep later."""
+    try:
+        formula = Formula.create(db, current_user.id, formula_data.name, formula_data.expression)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        # A concurrent request saved the same name after Formula.create checked
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A formula named {formula_data.name!r} already exists",
+        )
+    db.refresh(formula)
+    return formula
+
+@app.get("/formulas", response_model=List[FormulaResponse], tags=["formulas"])
+def list_formulas(
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    return db.query(Formula).filter(Formula.user_id == current_user.id).order_by(Formula.name).all()
+
+@app.get("/formulas/{formula_id}", response_model=FormulaResponse, tags=["formulas"])
+def read_formula(
+    formula_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    return get_formula(formula_id, current_user, db)
+
+@app.delete("/formulas/{formula_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["formulas"])
+def delete_formula(
+    formula_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    db.delete(get_formula(formula_id, current_user, db))
+    db.commit()
     return None
 
+def sweep_ndjson(sweep: Sweep):
+    """One JSON object per line and point: {"parameters": {...}, "result": x}."""
+    for columns, results in sweep.blocks():
+        yield b"".join(
+            dumps({"parameters": dict(zip(sweep.variables, row[:-1])), "result": row[-1]}) + b"\n"
+            for row in zip(*columns, results)
+        )
+
+def sweep_float64(sweep: Sweep):
+    """The results alone, as packed little-endian float64."""
+    for _, results in sweep.blocks():
+        yield pack_float64(results)
+
+@app.post(
+    "/formulas/{formula_id}/sweep",
+    tags=["formulas"],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "The results, streamed in point order",
+            "content": {
+                NDJSON: {},
+                OCTET_STREAM: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+def sweep_formula(
+    formula_id: str,
+    sweep_data: FormulaSweep,
+    request: Request,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Evaluate a formula at every point of a parameter sweep and stream the
+    results; nothing is stored. Points are the product of the parameter values
+    (the last variable in alphabetical order changes fastest) or the values
+    zipped row by row. Results are null (NaN in float64) where the formula is
+    undefined, e.g. on a zero divisor.
+
+    Responses are NDJSON, or with Accept: application/octet-stream just the
+    results as packed little-endian float64. X-Sweep-Points and
+    X-Sweep-Variables describe the stream.
+    """
+    formula = get_formula(formula_id, current_user, db)
+    try:
+        sweep = Sweep(formula.compiled, sweep_data.parameter_values(), sweep_data.mode.value)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    media_type = preferred(request, (NDJSON, OCTET_STREAM), NDJSON)
+    body = sweep_float64(sweep) if media_type == OCTET_STREAM else sweep_ndjson(sweep)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "X-Sweep-Points": str(sweep.points),
+            "X-Sweep-Variables": ",".join(sweep.variables),
+            "Vary": "Accept",
+        },
+    )
+
 # ------------------------------------------------------------------------------
 # Main Block to Run the Server
 # ------------------------------------------------------------------------------
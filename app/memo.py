@@ -0,0 +1,164 @@
+# app/memo.py
+"""
+Content-addressed memoization of calculation results.
+
+A result is keyed by a BLAKE2b hash of the calculation type, its expression
+(for expression calculations) and its inputs packed as little-endian float64,
+so equal inputs hit the same entry whether they arrive as ints, floats, lists,
+arrays or buffers. Lookups go to:
+
+  1. an in-process LRU of up to CALCULATIONS_MEMO_SIZE entries, then
+  2. Redis, when CALCULATIONS_MEMO_REDIS is set, shared by all workers.
+
+Both tiers expire entries after CALCULATIONS_MEMO_TTL seconds. Inputs longer
+than CALCULATIONS_MEMO_MAX_INPUTS are not memoized, because hashing them costs
+about as much as computing the result. Only successful results are stored;
+invalid inputs always reach get_result and raise there.
+
+Results are pure functions of (type, expression, inputs), so entries never need
+invalidating. The Redis tier goes through app.cache and fails open.
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from app import cache
+from app.core.config import get_settings
+from app.models.types import INPUT_VECTOR_TYPES, pack_float64
+
+settings = get_settings()
+
+
+def result_key(calculation_type: str, inputs, expression: Optional[str] = None) -> str:
+    """
+    Hash of a calculation type, its expression and its canonical (float64)
+    inputs.
+
+    Raises:
+        TypeError: If the inputs are not numbers
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(calculation_type.encode())
+    digest.update(b"\0")
+    if expression is not None:
+        digest.update(expression.encode())
+        digest.update(b"\0")
+    digest.update(pack_float64(inputs))
+    return digest.hexdigest()
+
+
+class ResultMemo:
+    """Thread-safe LRU of calculation results with expiry and hit counters."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries if max_entries is not None else settings.CALCULATIONS_MEMO_SIZE
+        self.ttl = ttl if ttl is not None else settings.CALCULATIONS_MEMO_TTL
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.local_hits = self.redis_hits = self.misses = 0
+            self.evictions = self.expirations = 0
+
+    def _get_local(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.local_hits += 1
+            return value
+
+    def _put_local(self, key: str, value: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: str) -> Optional[float]:
+        """Cached result for key, or None on a miss in every tier."""
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        if settings.CALCULATIONS_MEMO_REDIS:
+            value = cache.get_json(f"calc:memo:{key}")
+            if value is not None:
+                self._put_local(key, value)
+                with self._lock:
+                    self.redis_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: float) -> None:
+        """Store a result in every tier."""
+        self._put_local(key, value)
+        if settings.CALCULATIONS_MEMO_REDIS:
+            cache.set_json(f"calc:memo:{key}", value, ttl=int(self.ttl))
+
+    def stats(self) -> Dict[str, float]:
+        """Entry count, capacity, counters and hit rate."""
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "hits": hits,
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+memo = ResultMemo()
+
+
+def memoize_result(get_result):
+    """Decorate a Calculation.get_result so results are served from the memo."""
+
+    @functools.wraps(get_result)
+    def wrapper(self):
+        inputs = self.inputs
+        if (
+            not settings.CALCULATIONS_MEMO_ENABLED
+            or not isinstance(inputs, INPUT_VECTOR_TYPES)
+            or len(inputs) > settings.CALCULATIONS_MEMO_MAX_INPUTS
+        ):
+            return get_result(self)
+        try:
+            key = result_key(self.__mapper__.polymorphic_identity, inputs, self.expression)
+        except (TypeError, ValueError, OverflowError):
+            # Not numbers; let get_result report it
+            return get_result(self)
+        value = memo.get(key)
+        if value is None:
+            value = get_result(self)
+            memo.put(key, value)
+        return value
+
+    return wrapper
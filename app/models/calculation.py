@@ -1,26 +1,60 @@
 # app/models/calculation.py
 from datetime import datetime
 import uuid
-from typing import List
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Float
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import JSON, Boolean, Column, String, DateTime, ForeignKey, Float, Index, Text, event, false, func
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship, declared_attr
+from sqlalchemy.orm import relationship, declared_attr, deferred, has_inherited_table, object_session
 from sqlalchemy.ext.declarative import declared_attr
+from app.core.config import get_settings
+from app.core.ids import uuid7
 from app.database import Base
+from app.memo import memoize_result
+from app.models.dependency import delete_edges, descendants, write_edges
+from app.models.input_store import delete_chunks, is_external, iter_chunks, read_chunks, write_chunks
+from app.models.types import INPUT_VECTOR_TYPES, column_value, inputs_column_type
+from app.operations.reduction import parallel_reduce
+from app.operations.registry import Operation, count_phrase, get_operation, operations
+from app.partitioning import calculations_table_args, is_partition_key
+
+settings = get_settings()
 
 class AbstractCalculation:
     """Abstract base class for calculations"""
+
+    # The registered operation a subclass computes (see app.operations.registry)
+    operation: Optional[Operation] = None
     
     @declared_attr
     def __tablename__(cls):
         return 'calculations'
 
+    @declared_attr
+    def __table_args__(cls):
+        if has_inherited_table(cls):
+            return None
+        return (
+            # Serve the filtered/sorted list queries in list_calculations
+            Index("ix_calculations_user_type_created", "user_id", "type", "created_at"),
+            Index("ix_calculations_user_created", "user_id", "created_at"),
+            Index("ix_calculations_user_result", "user_id", "result"),
+            # Index-only lookups of the validators used for conditional GETs
+            Index("ix_calculations_user_updated", "user_id", "updated_at"),
+            Index(
+                "ix_calculations_id_user_updated",
+                "id",
+                "user_id",
+                postgresql_include=["updated_at"],
+            ),
+            calculations_table_args(),
+        )
+
     @declared_attr
     def id(cls):
         return Column(
             UUID(as_uuid=True), 
             primary_key=True, 
-            default=uuid.uuid4,
+            default=uuid7,
             nullable=False
         )
 
@@ -29,6 +63,7 @@ class AbstractCalculation:
         return Column(
             UUID(as_uuid=True), 
             ForeignKey('users.id', ondelete='CASCADE'),
+            primary_key=is_partition_key('user_id'),
             nullable=False,
             index=True
         )
@@ -42,12 +77,166 @@ class AbstractCalculation:
         )
 
     @declared_attr
-    def inputs(cls):
-        return Column(
-            JSON, 
+    def inline_inputs(cls):
+        # Deferred so queries that don't need the inputs don't transfer them
+        return deferred(Column(
+            "inputs",
+            inputs_column_type(), 
             nullable=False
+        ))
+
+    @declared_attr
+    def inputs_external(cls):
+        return Column(
+            Boolean,
+            nullable=False,
+            default=False,
+            server_default=false()
+        )
+
+    @property
+    def inputs(self):
+        """The calculation inputs, loaded from the out-of-row store when needed."""
+        if not self.inputs_external:
+            return self.inline_inputs
+        cached = self.__dict__.get("_inputs_cache")
+        if cached is None:
+            session = object_session(self)
+            if session is None:
+                raise ValueError("Detached calculation inputs are not loaded.")
+            cached = read_chunks(session.connection(), self.id)
+            self.__dict__["_inputs_cache"] = cached
+        return cached
+
+    @inputs.setter
+    def inputs(self, values):
+        external = is_external(values)
+        if external or self.inputs_external:
+            # Written (or cleared) by the after_insert/after_update hooks
+            self.__dict__["_pending_chunks"] = values if external else ()
+        self.__dict__["_inputs_cache"] = values if external else None
+        self.inline_inputs = [] if external else column_value(values)
+        self.inputs_external = external
+
+    def iter_input_chunks(self, session) -> Iterator:
+        """Iterate over the inputs in chunks without materializing the full vector."""
+        if not self.inputs_external:
+            yield self.inline_inputs
+            return
+        yield from iter_chunks(session.connection(), self.id)
+
+    @declared_attr
+    def expression(cls):
+        # Only expression calculations have one (see app.operations.expression)
+        return Column(
+            Text,
+            nullable=True
         )
 
+    @declared_attr
+    def input_references(cls):
+        # {"<input position>": "<calculation id>"}, or NULL (see app.models.dependency)
+        return Column(
+            JSON,
+            nullable=True
+        )
+
+    @property
+    def references(self) -> Optional[Dict[int, uuid.UUID]]:
+        """Input positions that take the result of another calculation, by position."""
+        if not self.input_references:
+            return None
+        return {int(position): uuid.UUID(source) for position, source in self.input_references.items()}
+
+    @references.setter
+    def references(self, references: Optional[Dict[int, uuid.UUID]]):
+        if references or self.input_references:
+            # The dependency edges are rewritten by the after_insert/after_update hooks
+            self.__dict__["_pending_edges"] = set(references.values()) if references else set()
+        self.input_references = {
+            str(position): str(source) for position, source in sorted(references.items())
+        } if references else None
+
+    def resolve_references(self, db, known: Optional[Dict[uuid.UUID, float]] = None) -> None:
+        """
+        Fill the referenced input positions with the sources' results, taken
+        from known when given there and from the database otherwise.
+
+        Raises:
+            ValueError: If a position is out of range or a source is missing,
+                belongs to another user or has no result
+        """
+        references = self.references
+        if not references:
+            return
+        results = dict(known or {})
+        missing = set(references.values()) - set(results)
+        if missing:
+            rows = db.query(Calculation.id, Calculation.result).filter(
+                Calculation.id.in_(missing),
+                Calculation.user_id == self.user_id
+            ).all()
+            results.update(rows)
+        values = list(self.inputs)
+        for position, source in references.items():
+            if not 0 <= position < len(values):
+                raise ValueError(f"Reference position {position} is outside the inputs")
+            if source not in results:
+                raise ValueError(f"Referenced calculation not found: {source}")
+            if results[source] is None:
+                raise ValueError(f"Referenced calculation {source} has no result")
+            values[position] = results[source]
+        self.inputs = values
+
+    def recompute_dependents(self, db) -> List["Calculation"]:
+        """
+        Recompute the calculations downstream of this one, after a change to
+        its result, in topological order. A calculation is recomputed only if
+        the result of one of its sources changed, so changes stop propagating
+        where a result comes out the same. Nothing is committed. Call it
+        under lock_graph on the user, taken before the change was read.
+
+        Returns:
+            The recomputed calculations
+
+        Raises:
+            ValueError: If a recomputed calculation's inputs become invalid
+        """
+        order = descendants(db.connection(), self.id)
+        if not order:
+            return []
+        loaded = {
+            calculation.id: calculation
+            for calculation in db.query(Calculation).filter(
+                Calculation.id.in_(order),
+                Calculation.user_id == self.user_id
+            )
+        }
+        results = {self.id: self.result}
+        changed = {self.id}
+        recomputed = []
+        for calculation_id in order:
+            calculation = loaded.get(calculation_id)
+            if calculation is None or changed.isdisjoint(calculation.references.values()):
+                continue
+            known = {
+                source: results[source]
+                for source in calculation.references.values()
+                if source in results
+            }
+            try:
+                calculation.resolve_references(db, known)
+                calculation.operation.validate(calculation.inputs, calculation.expression)
+                result = calculation.get_result()
+            except ValueError as e:
+                raise ValueError(f"Recomputing dependent calculation {calculation_id}: {e}") from None
+            if result != calculation.result:
+                changed.add(calculation_id)
+            calculation.result = result
+            results[calculation_id] = result
+            recomputed.append(calculation)
+        return recomputed
+
     @declared_attr
     def result(cls):
         return Column(
@@ -60,6 +249,7 @@ class AbstractCalculation:
         return Column(
             DateTime, 
             default=datetime.utcnow,
+            primary_key=is_partition_key('created_at'),
             nullable=False
         )
 
@@ -77,85 +267,285 @@ class AbstractCalculation:
         return relationship("User", back_populates="calculations")
 
     @classmethod
-    def create(cls, calculation_type: str, user_id: uuid.UUID, inputs: List[float]) -> "Calculation":
+    def create(
+        cls,
+        calculation_type: str,
+        user_id: uuid.UUID,
+        inputs: List[float],
+        expression: Optional[str] = None,
+        references: Optional[Dict[int, uuid.UUID]] = None,
+    ) -> "Calculation":
         """Factory method to create calculations"""
-        calculation_classes = {
-            'addition': Addition,
-            'subtraction': Subtraction,
-            'multiplication': Multiplication,
-            'division': Division,
-        }
         calculation_class = calculation_classes.get(calculation_type.lower())
         if not calculation_class:
             raise ValueError(f"Unsupported calculation type: {calculation_type}")
-        return calculation_class(user_id=user_id, inputs=inputs)
+        compiler = calculation_class.operation.compiler
+        if compiler is not None:
+            # Store the canonical form, e.g. "(a+b)*c" as "(a + b) * c"
+            expression = compiler(expression).source
+        elif expression is not None:
+            raise ValueError(f"{calculation_class.operation.name} calculations do not take an expression")
+        return calculation_class(
+            user_id=user_id, inputs=inputs, expression=expression, references=references
+        )
+
+    @classmethod
+    def apply_list_filters(
+        cls,
+        query,
+        type: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        result_min: Optional[float] = None,
+        result_max: Optional[float] = None,
+        sort: Optional[str] = None,
+    ):
+        """
+        Apply the list endpoint's filters and ordering to a query.
+
+        Every combination is covered by one of the composite indexes declared in
+        __table_args__ together with the caller's user_id filter. sort is a
+        column name, prefixed with '-' for descending order.
+        """
+        if type is not None:
+            query = query.filter(cls.type == type)
+        if created_after is not None:
+            query = query.filter(cls.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(cls.created_at < created_before)
+        if result_min is not None:
+            query = query.filter(cls.result >= result_min)
+        if result_max is not None:
+            query = query.filter(cls.result <= result_max)
+        if sort:
+            column = getattr(cls, sort.lstrip("-"))
+            descending = sort.startswith("-")
+            query = query.order_by(
+                column.desc() if descending else column.asc(),
+                cls.id.desc() if descending else cls.id.asc(),
+            )
+        return query
+
+    @classmethod
+    def list_version(cls, db, user_id: uuid.UUID) -> Tuple[int, Optional[datetime]]:
+        """
+        Number of calculations a user has and their latest updated_at.
+
+        Creates and updates raise the latest updated_at and deletes lower the
+        count, so the pair changes on every write to the user's list.
+        """
+        count, latest = db.query(func.count(), func.max(cls.updated_at)).filter(
+            cls.user_id == user_id
+        ).one()
+        return count, latest
+
+    @classmethod
+    def user_stats(
+        cls,
+        db,
+        user_id: uuid.UUID,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Aggregate a user's calculations in the database.
 
+        Returns per-type count/sum/min/max/avg of results, the same figures over
+        all types, and the number of calculations created per day.
+        """
+        criteria = [cls.user_id == user_id]
+        if created_after is not None:
+            criteria.append(cls.created_at >= created_after)
+        if created_before is not None:
+            criteria.append(cls.created_at < created_before)
+
+        per_type = db.query(
+            cls.type,
+            func.count(),
+            func.count(cls.result),
+            func.sum(cls.result),
+            func.min(cls.result),
+            func.max(cls.result),
+        ).filter(*criteria).group_by(cls.type).order_by(cls.type).all()
+
+        day = func.date(cls.created_at)
+        per_day = db.query(day, func.count()).filter(*criteria).group_by(day).order_by(day).all()
+
+        def summary(count, result_count, total, minimum, maximum):
+            return {
+                "count": count,
+                "sum": total,
+                "min": minimum,
+                "max": maximum,
+                "avg": total / result_count if result_count else None,
+            }
+
+        by_type = [
+            {"type": calc_type, **summary(count, result_count, total, minimum, maximum)}
+            for calc_type, count, result_count, total, minimum, maximum in per_type
+        ]
+        minimums = [row[4] for row in per_type if row[4] is not None]
+        maximums = [row[5] for row in per_type if row[5] is not None]
+        overall = summary(
+            sum(row[1] for row in per_type),
+            sum(row[2] for row in per_type),
+            sum(row[3] for row in per_type if row[3] is not None) if minimums else None,
+            min(minimums, default=None),
+            max(maximums, default=None),
+        )
+        return {
+            "overall": overall,
+            "by_type": by_type,
+            "by_day": [{"day": str(created_on), "count": count} for created_on, count in per_day],
+        }
+
+    @memoize_result
     def get_result(self) -> float:
         """Method to compute calculation result"""
-        raise NotImplementedError
+        operation = self.operation
+        if operation is None:
+            raise NotImplementedError
+        if not isinstance(self.inputs, INPUT_VECTOR_TYPES):
+            raise ValueError("Inputs must be a list of numbers.")
+        if len(self.inputs) < operation.min_inputs:
+            raise ValueError(
+                f"Inputs must be a list with at least {count_phrase(operation.min_inputs)}."
+            )
+        if operation.reduction and len(self.inputs) >= settings.CALCULATIONS_PARALLEL_THRESHOLD:
+            return parallel_reduce(operation.name, self.inputs)
+        return operation.reduce(self.inputs, self.expression)
+
+    def get_result_from_chunks(self, chunks: Iterable[Sequence[float]]) -> float:
+        """
+        Compute the result in a single pass over the inputs, one chunk at a
+        time, giving the same result as the serial get_result path on the
+        concatenated inputs.
+        """
+        operation = self.operation
+        if operation is None:
+            raise NotImplementedError
+        result, count = operation.reduce_chunks(chunks, self.expression)
+        if count < operation.min_inputs:
+            raise ValueError(
+                f"Inputs must be a list with at least {count_phrase(operation.min_inputs)}."
+            )
+        return result
 
     def __repr__(self):
         return f"<Calculation(type={self.type}, inputs={self.inputs})>"
 
 class Calculation(Base, AbstractCalculation):
     """Base calculation model"""
-    __mapper_args__ = {
-        "polymorphic_on": "type",
-        "polymorphic_identity": "calculation",
-        #"with_polymorphic": "*"
-    }
 
+    @declared_attr
+    def __mapper_args__(cls):
+        return {
+            "polymorphic_on": "type",
+            "polymorphic_identity": "calculation",
+            # Rows are identified by id even when a partitioned layout widens
+            # the table's primary key to include the partition key.
+            "primary_key": [cls.__table__.c.id],
+            #"with_polymorphic": "*"
+        }
+
+@event.listens_for(Calculation, "after_insert", propagate=True)
+@event.listens_for(Calculation, "after_update", propagate=True)
+def _write_pending_chunks(mapper, connection, target):
+    pending = target.__dict__.pop("_pending_chunks", None)
+    if pending is not None:
+        write_chunks(connection, target.id, target.user_id, pending, target.created_at)
+
+@event.listens_for(Calculation, "after_insert", propagate=True)
+@event.listens_for(Calculation, "after_update", propagate=True)
+def _write_pending_edges(mapper, connection, target):
+    pending = target.__dict__.pop("_pending_edges", None)
+    if pending is not None:
+        write_edges(connection, target.id, target.user_id, pending)
+
+@event.listens_for(Calculation, "after_delete", propagate=True)
+def _delete_chunks(mapper, connection, target):
+    # Unloaded flag: err on the side of removing any chunks
+    if target.__dict__.get("inputs_external", True):
+        delete_chunks(connection, target.id)
+    delete_edges(connection, target.id)
+
+# One subclass per registered operation, so create() is a dict lookup
+calculation_classes: Dict[str, type] = {}
+
+def calculation_class(name: str):
+    """Class decorator binding a Calculation subclass to the registered operation `name`."""
+    def decorate(cls):
+        cls.operation = get_operation(name)
+        calculation_classes[name] = cls
+        return cls
+    return decorate
+
+@calculation_class("addition")
 class Addition(Calculation):
     """Addition calculation"""
     __mapper_args__ = {"polymorphic_identity": "addition"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
-            raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
-            raise ValueError("Inputs must be a list with at least two numbers.")
-        return sum(self.inputs)
-
+@calculation_class("subtraction")
 class Subtraction(Calculation):
     """Subtraction calculation"""
     __mapper_args__ = {"polymorphic_identity": "subtraction"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
-            raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
-            raise ValueError("Inputs must be a list with at least two numbers.")
-        result = self.inputs[0]
-        for value in self.inputs[1:]:
-            result -= value
-        return result
-
+@calculation_class("multiplication")
 class Multiplication(Calculation):
     """Multiplication calculation"""
     __mapper_args__ = {"polymorphic_identity": "multiplication"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
-            raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
-            raise ValueError("Inputs must be a list with at least two numbers.")
-        result = 1
-        for value in self.inputs:
-            result *= value
-        return result
-
+@calculation_class("division")
 class Division(Calculation):
     """Division calculation"""
     __mapper_args__ = {"polymorphic_identity": "division"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
-            raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
-            raise ValueError("Inputs must be a list with at least two numbers.")
-        result = self.inputs[0]
-        for value in self.inputs[1:]:
-            if value == 0:
-                raise ValueError("Cannot divide by zero.")
-            result /= value
-        return result
+@calculation_class("mean")
+class Mean(Calculation):
+    """Mean calculation"""
+    __mapper_args__ = {"polymorphic_identity": "mean"}
+
+@calculation_class("variance")
+class Variance(Calculation):
+    """Variance calculation"""
+    __mapper_args__ = {"polymorphic_identity": "variance"}
+
+@calculation_class("stddev")
+class Stddev(Calculation):
+    """Stddev calculation"""
+    __mapper_args__ = {"polymorphic_identity": "stddev"}
+
+@calculation_class("min")
+class Min(Calculation):
+    """Min calculation"""
+    __mapper_args__ = {"polymorphic_identity": "min"}
+
+@calculation_class("max")
+class Max(Calculation):
+    """Max calculation"""
+    __mapper_args__ = {"polymorphic_identity": "max"}
+
+@calculation_class("median")
+class Median(Calculation):
+    """Median calculation"""
+    __mapper_args__ = {"polymorphic_identity": "median"}
+
+@calculation_class("expression")
+class Expression(Calculation):
+    """Expression calculation"""
+    __mapper_args__ = {"polymorphic_identity": "expression"}
+
+def _plugin_class(operation: Operation) -> type:
+    """Single-table subclass of Calculation for an operation with no class above."""
+    name = operation.name.title().replace("_", "")
+    return calculation_class(operation.name)(type(name, (Calculation,), {
+        "__doc__": f"{name} calculation",
+        "__module__": __name__,
+        "__qualname__": name,
+        "__mapper_args__": {"polymorphic_identity": operation.name},
+    }))
+
+# Operations from CALCULATIONS_OPERATION_MODULES
+for _operation in operations():
+    if _operation.name not in calculation_classes:
+        _plugin_class(_operation)
@@ -0,0 +1,198 @@
+# app/models/dependency.py
+"""
+The dependency graph between calculations.
+
+A calculation's inputs may reference other calculations of the same user: an
+input at a referenced position takes the referenced calculation's result (see
+AbstractCalculation.references). The references live on the calculations row;
+this module keeps the same edges in calculation_dependencies, keyed by
+(calculation_id, source_id) and indexed on source_id, so the calculations
+that depend on a given one can be found without scanning every row.
+
+The edges form a DAG. Creating a calculation cannot close a cycle (nothing
+references it yet), and updating references is checked with would_cycle
+first. When a calculation changes, descendants() lists everything downstream
+of it in topological order, so each one is recomputed after all of its
+sources.
+
+Every change to a user's graph, and every recompute along it, runs under
+lock_graph. Otherwise two updates could each pass would_cycle and together
+close a cycle, recompute a shared descendant from each other's stale
+results, or add a reference to a calculation that is being deleted.
+
+Like calculation_input_chunks, the table references users.id with ON DELETE
+CASCADE but not calculations.id, whose primary key is widened in the
+partitioned layouts; the calculation mapper events keep it in step.
+Calculations removed outside the ORM, such as by dropping expired partitions,
+leave edges behind that purge_dangling_edges removes.
+"""
+from datetime import datetime
+from graphlib import CycleError, TopologicalSorter
+from typing import Dict, Iterable, List, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Column, ForeignKey, delete, exists, func, insert, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.database import Base
+
+# First key of the advisory locks taken by lock_graph; the second is per user
+_GRAPH_LOCK = 0x63616C63  # "calc"
+
+
+class CalculationDependency(Base):
+    """An edge from a calculation to one that its inputs reference."""
+
+    __tablename__ = "calculation_dependencies"
+
+    calculation_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    source_id = Column(PG_UUID(as_uuid=True), primary_key=True, index=True)
+    user_id = Column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+
+def write_edges(connection, calculation_id: UUID, user_id: UUID, source_ids: Iterable[UUID]) -> None:
+    """Replace the edges of a calculation with edges to source_ids."""
+    delete_edges(connection, calculation_id)
+    rows = [
+        {"calculation_id": calculation_id, "source_id": source_id, "user_id": user_id}
+        for source_id in set(source_ids)
+    ]
+    if rows:
+        connection.execute(insert(CalculationDependency.__table__), rows)
+
+
+def delete_edges(connection, calculation_id: UUID) -> None:
+    """Delete the edges from a calculation to its sources."""
+    table = CalculationDependency.__table__
+    connection.execute(delete(table).where(table.c.calculation_id == calculation_id))
+
+
+def dependents(connection, calculation_id: UUID) -> List[UUID]:
+    """Calculations whose inputs reference calculation_id directly."""
+    table = CalculationDependency.__table__
+    rows = connection.execute(select(table.c.calculation_id).where(table.c.source_id == calculation_id))
+    return [dependent for (dependent,) in rows]
+
+
+def _downstream(connection, calculation_id: UUID) -> Dict[UUID, Set[UUID]]:
+    """Every calculation downstream of calculation_id, mapped to its sources, one query per level."""
+    table = CalculationDependency.__table__
+    graph: Dict[UUID, Set[UUID]] = {}
+    frontier = {calculation_id}
+    while frontier:
+        rows = connection.execute(
+            select(table.c.calculation_id, table.c.source_id).where(table.c.source_id.in_(frontier))
+        ).all()
+        frontier = set()
+        for dependent, source in rows:
+            if dependent not in graph and dependent != calculation_id:
+                frontier.add(dependent)
+            graph.setdefault(dependent, set()).add(source)
+    return graph
+
+
+def descendants(connection, calculation_id: UUID) -> List[UUID]:
+    """
+    Every calculation downstream of calculation_id, each after all of its
+    sources that are themselves downstream.
+
+    Raises:
+        ValueError: If the stored edges contain a cycle
+    """
+    graph = _downstream(connection, calculation_id)
+    try:
+        order = list(TopologicalSorter(graph).static_order())
+    except CycleError as e:
+        raise ValueError(f"Calculation references form a cycle: {e.args[1]}") from None
+    return [node for node in order if node in graph and node != calculation_id]
+
+
+def would_cycle(connection, calculation_id: UUID, source_ids: Iterable[UUID]) -> bool:
+    """Whether making calculation_id reference source_ids would close a cycle."""
+    source_ids = set(source_ids)
+    if calculation_id in source_ids:
+        return True
+    return not source_ids.isdisjoint(_downstream(connection, calculation_id))
+
+
+def lock_graph(connection, user_id: UUID) -> None:
+    """
+    Serialize changes to a user's dependency graph, and recomputes along it,
+    until the transaction ends. Postgres only; elsewhere this is a no-op.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    key = int.from_bytes(user_id.bytes[-4:], "big", signed=True)
+    connection.execute(select(func.pg_advisory_xact_lock(_GRAPH_LOCK, key)))
+
+
+def purge_dangling_edges(connection, batch_size: int = 1000) -> int:
+    """
+    Remove edges to or from calculations that no longer exist, batch_size
+    calculations per statement.
+
+    Edges of a calculation that is gone are deleted. A calculation whose source
+    is gone keeps the source's last result as a plain input: the reference is
+    removed from its input_references together with the edge.
+
+    Returns:
+        The number of edges removed
+    """
+    table = CalculationDependency.__table__
+    calculations = Base.metadata.tables["calculations"]
+    removed = 0
+
+    gone_dependents = (
+        select(table.c.calculation_id)
+        .where(~exists().where(calculations.c.id == table.c.calculation_id))
+        .distinct()
+        .limit(batch_size)
+    )
+    while True:
+        ids = connection.execute(gone_dependents).scalars().all()
+        if ids:
+            removed += connection.execute(delete(table).where(table.c.calculation_id.in_(ids))).rowcount
+        if len(ids) < batch_size:
+            break
+
+    gone_sources = (
+        select(table.c.calculation_id, table.c.source_id, table.c.user_id)
+        .where(~exists().where(calculations.c.id == table.c.source_id))
+        .limit(batch_size)
+    )
+    while True:
+        rows = connection.execute(gone_sources).all()
+        detached: Dict[Tuple[UUID, UUID], Set[UUID]] = {}
+        for dependent, source, user_id in rows:
+            detached.setdefault((user_id, dependent), set()).add(source)
+        for (user_id, dependent), sources in sorted(detached.items()):
+            lock_graph(connection, user_id)
+            removed += _detach_sources(connection, dependent, user_id, sources)
+        if len(rows) < batch_size:
+            return removed
+
+
+def _detach_sources(connection, calculation_id: UUID, user_id: UUID, sources: Set[UUID]) -> int:
+    """Drop the references of a calculation to sources, and their edges."""
+    table = CalculationDependency.__table__
+    calculations = Base.metadata.tables["calculations"]
+    owned = (calculations.c.id == calculation_id, calculations.c.user_id == user_id)
+    references = connection.execute(select(calculations.c.input_references).where(*owned)).scalar()
+    if references:
+        kept = {
+            position: source for position, source in references.items()
+            if UUID(source) not in sources
+        }
+        connection.execute(
+            update(calculations)
+            .where(*owned)
+            .values(input_references=kept or None, updated_at=datetime.utcnow())
+        )
+    return connection.execute(
+        delete(table).where(table.c.calculation_id == calculation_id, table.c.source_id.in_(sources))
+    ).rowcount
@@ -0,0 +1,77 @@
+# app/models/formula.py
+"""
+Saved, named formulas.
+
+A formula is an expression (app.operations.expression) that a user saves
+under a name so it can be evaluated again without resending it, in particular
+over many parameter values at once (app.operations.sweep). Sweep points are
+streamed back to the client and never stored as calculations.
+
+The expression is stored in canonical form; compiling it again on each use is
+a lookup in the compiled-expression LRU.
+"""
+from datetime import datetime
+from typing import Tuple
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.ids import uuid7
+from app.database import Base
+from app.operations.expression import CompiledExpression, compile_expression
+
+
+class Formula(Base):
+    """A named expression saved by a user."""
+
+    __tablename__ = "formulas"
+    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_formulas_user_id_name"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    name = Column(String(100), nullable=False)
+    expression = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f"<Formula(name={self.name}, expression={self.expression})>"
+
+    @classmethod
+    def create(cls, db, user_id: uuid.UUID, name: str, expression: str) -> "Formula":
+        """
+        Save a new formula (flushed, uncommitted).
+
+        Raises:
+            ValueError: If the expression is invalid or the user already has a
+                formula with this name
+            IntegrityError: If a concurrent transaction saved a formula with
+                this name after the check
+        """
+        source = compile_expression(expression).source
+        if db.query(cls.id).filter(cls.user_id == user_id, cls.name == name).first():
+            raise ValueError(f"A formula named {name!r} already exists")
+        formula = cls(user_id=user_id, name=name, expression=source)
+        db.add(formula)
+        db.flush()
+        return formula
+
+    @property
+    def compiled(self) -> CompiledExpression:
+        return compile_expression(self.expression)
+
+    @property
+    def variables(self) -> Tuple[str, ...]:
+        """Variables of the expression, in alphabetical order."""
+        return self.compiled.variables
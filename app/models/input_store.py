@@ -0,0 +1,235 @@
+# app/models/input_store.py
+"""
+Out-of-row storage for large calculation input vectors.
+
+Input vectors longer than CALCULATIONS_INPUTS_EXTERNAL_THRESHOLD are not kept in
+the calculations row. They are packed as little-endian float64, split into
+chunks of CALCULATIONS_INPUTS_CHUNK_SIZE values, compressed with zstd and stored
+in calculation_input_chunks, keyed by (calculation_id, seq). The calculations
+row then only carries an empty inline vector and inputs_external=True.
+
+Resumable uploads (app.models.upload) spool their chunks into the same table
+under the upload id and re-key them to the calculation when finalized.
+
+Every chunk carries its calculation's created_at (the upload session's while
+it is spooled), so under range partitioning the table is partitioned by month
+like calculations and retention drops both together (see app.partitioning).
+
+Chunks reference users.id with ON DELETE CASCADE so bulk user deletion removes
+them; deleting a calculation through the ORM removes its chunks via a mapper
+event (see app.models.calculation). There is no foreign key to calculations,
+whose partitions could then no longer be detached without a scan, so chunks
+left behind by deletes outside the ORM are removed in batches by
+purge_orphaned_chunks, which runs in the background maintenance loop.
+"""
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import zstandard
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, delete, exists, insert, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.config import get_settings
+from app.database import Base
+from app.models.types import as_float64_array, pack_float64, unpack_float64
+from app.partitioning import chunk_table_args, is_chunk_partition_key
+
+settings = get_settings()
+
+_ZSTD_LEVEL = 3
+
+# Chunks younger than this are never treated as orphans, so a calculation or
+# upload committing concurrently with the sweep cannot lose its chunks
+ORPHAN_GRACE = timedelta(hours=1)
+
+
+class CalculationInputChunk(Base):
+    """One compressed chunk of an out-of-row calculation input vector."""
+
+    __tablename__ = "calculation_input_chunks"
+    __table_args__ = (chunk_table_args(),)
+
+    calculation_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    # The owning calculation's created_at; the partition key under range partitioning
+    created_at = Column(
+        DateTime,
+        primary_key=is_chunk_partition_key("created_at"),
+        nullable=False,
+        default=datetime.utcnow
+    )
+    user_id = Column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+
+def is_external(values) -> bool:
+    """Whether an input vector is large enough to be stored out of row."""
+    try:
+        return len(values) > settings.CALCULATIONS_INPUTS_EXTERNAL_THRESHOLD
+    except TypeError:
+        return False
+
+
+def _chunk_rows(
+    calculation_id: UUID, user_id: UUID, values: Sequence[float], created_at: datetime
+) -> Iterator[dict]:
+    compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+    size = settings.CALCULATIONS_INPUTS_CHUNK_SIZE
+    packed = as_float64_array(values)
+    for seq, start in enumerate(range(0, len(packed), size)):
+        chunk = packed[start:start + size]
+        yield {
+            "calculation_id": calculation_id,
+            "seq": seq,
+            "created_at": created_at,
+            "user_id": user_id,
+            "count": len(chunk),
+            "data": compressor.compress(pack_float64(chunk)),
+        }
+
+
+def write_chunks(
+    connection, calculation_id: UUID, user_id: UUID, values: Sequence[float], created_at: datetime
+) -> None:
+    """Replace the stored chunks of a calculation with values (which may be empty)."""
+    delete_chunks(connection, calculation_id)
+    table = CalculationInputChunk.__table__
+    batch = []
+    for row in _chunk_rows(calculation_id, user_id, values, created_at):
+        batch.append(row)
+        if len(batch) >= 16:
+            connection.execute(insert(table), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+
+
+def write_chunk(
+    connection, calculation_id: UUID, user_id: UUID, seq: int, values: Sequence[float], created_at: datetime
+) -> None:
+    """Store (or replace) a single chunk, as resumable uploads do chunk by chunk."""
+    table = CalculationInputChunk.__table__
+    connection.execute(
+        delete(table).where(table.c.calculation_id == calculation_id, table.c.seq == seq)
+    )
+    compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+    connection.execute(
+        insert(table).values(
+            calculation_id=calculation_id,
+            seq=seq,
+            created_at=created_at,
+            user_id=user_id,
+            count=len(values),
+            data=compressor.compress(pack_float64(values)),
+        )
+    )
+
+
+def chunk_counts(connection, calculation_id: UUID) -> List[Tuple[int, int]]:
+    """(seq, count) of every stored chunk, in order, without reading the data."""
+    table = CalculationInputChunk.__table__
+    rows = connection.execute(
+        select(table.c.seq, table.c.count)
+        .where(table.c.calculation_id == calculation_id)
+        .order_by(table.c.seq)
+    )
+    return [(seq, count) for seq, count in rows]
+
+
+def rekey_chunks(connection, old_id: UUID, new_id: UUID, created_at: datetime) -> None:
+    """Move stored chunks to another calculation id (and that calculation's created_at)."""
+    table = CalculationInputChunk.__table__
+    connection.execute(
+        update(table).where(table.c.calculation_id == old_id).values(
+            calculation_id=new_id, created_at=created_at
+        )
+    )
+
+
+def delete_chunks(connection, calculation_id: UUID) -> None:
+    """Delete every stored chunk of a calculation."""
+    table = CalculationInputChunk.__table__
+    connection.execute(delete(table).where(table.c.calculation_id == calculation_id))
+
+
+def iter_chunks(connection, calculation_id: UUID) -> Iterator[array]:
+    """
+    Yield the stored input vector chunk by chunk as array('d'), so callers can
+    stream over very large inputs without holding all of them in memory.
+    """
+    table = CalculationInputChunk.__table__
+    decompressor = zstandard.ZstdDecompressor()
+    rows = connection.execute(
+        select(table.c.data)
+        .where(table.c.calculation_id == calculation_id)
+        .order_by(table.c.seq)
+        .execution_options(stream_results=True)
+    )
+    for (data,) in rows:
+        yield unpack_float64(decompressor.decompress(data))
+
+
+class StoredChunks:
+    """
+    The stored input vector of a calculation as a re-iterable of chunks; every
+    iteration streams the chunks from the database again, so readers that need
+    two passes (such as the median) never hold the whole vector.
+    """
+
+    def __init__(self, connection, calculation_id: UUID):
+        self.connection = connection
+        self.calculation_id = calculation_id
+
+    def __iter__(self) -> Iterator[array]:
+        return iter_chunks(self.connection, self.calculation_id)
+
+
+def purge_orphaned_chunks(connection, batch_size: int = 1000, now: Optional[datetime] = None) -> int:
+    """
+    Delete chunks that belong to neither a calculation nor an upload session,
+    such as those left by deleting calculations outside the ORM. Works through
+    batch_size orphaned vectors per statement so no single DELETE is large.
+
+    Returns:
+        The number of chunks deleted
+    """
+    table = CalculationInputChunk.__table__
+    calculations = Base.metadata.tables["calculations"]
+    uploads = Base.metadata.tables["calculation_uploads"]
+    cutoff = (now or datetime.utcnow()) - ORPHAN_GRACE
+    orphaned = (
+        select(table.c.calculation_id)
+        .where(
+            table.c.created_at < cutoff,
+            ~exists().where(calculations.c.id == table.c.calculation_id),
+            ~exists().where(uploads.c.id == table.c.calculation_id),
+        )
+        .distinct()
+        .limit(batch_size)
+    )
+    deleted = 0
+    while True:
+        ids = connection.execute(orphaned).scalars().all()
+        if not ids:
+            return deleted
+        deleted += connection.execute(
+            delete(table).where(table.c.calculation_id.in_(ids), table.c.created_at < cutoff)
+        ).rowcount
+        if len(ids) < batch_size:
+            return deleted
+
+
+def read_chunks(connection, calculation_id: UUID) -> array:
+    """Load the full stored input vector of a calculation."""
+    values = array("d")
+    for chunk in iter_chunks(connection, calculation_id):
+        values.extend(chunk)
+    return values
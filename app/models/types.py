@@ -0,0 +1,108 @@
+# app/models/types.py
+"""
+Column types for calculation inputs.
+
+CALCULATIONS_INPUTS_STORAGE selects how AbstractCalculation.inputs is stored:
+  - "json":    a generic JSON column (default, human-readable).
+  - "float64": packed little-endian IEEE-754 doubles in a BYTEA/BLOB column,
+               8 bytes per input with no text parsing on either side.
+
+Switching an existing database between modes requires migrating the column.
+"""
+import sys
+from array import array
+from typing import Iterable, Union
+
+from sqlalchemy import JSON, LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Types accepted wherever a list of calculation inputs is expected; memoryview
+# covers zero-copy float64 views of binary request bodies (see float64_view)
+InputVector = Union[list, array, memoryview]
+INPUT_VECTOR_TYPES = (list, array, memoryview)
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def float64_view(data) -> Union[memoryview, array]:
+    """
+    View little-endian float64 bytes as a sequence of floats without copying
+    (big-endian hosts get a byte-swapped copy).
+
+    Raises:
+        ValueError: If the length is not a multiple of 8 bytes
+    """
+    if len(data) % 8:
+        raise ValueError("float64 data must be a multiple of 8 bytes long")
+    if _BIG_ENDIAN:
+        return unpack_float64(data)
+    return memoryview(data).cast("d")
+
+
+def as_float64_array(values: Iterable[float]) -> array:
+    """values as array('d'), with a single memcpy for float64 memoryviews."""
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    if isinstance(values, memoryview) and values.format == "d":
+        packed = array("d")
+        packed.frombytes(values.cast("B"))
+        return packed
+    return array("d", values)
+
+
+def column_value(values: InputVector):
+    """Inputs in the form the configured inputs column stores."""
+    if settings.CALCULATIONS_INPUTS_STORAGE == "json" and isinstance(values, (array, memoryview)):
+        return values.tolist()
+    return values
+
+
+def pack_float64(values: Iterable[float]) -> bytes:
+    """Pack numbers as little-endian float64 bytes."""
+    if isinstance(values, memoryview) and values.format == "d" and not _BIG_ENDIAN:
+        return values.tobytes()
+    packed = as_float64_array(values)
+    if _BIG_ENDIAN:
+        packed = array("d", packed)
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_float64(data) -> array:
+    """
+    Unpack little-endian float64 bytes (any bytes-like object, such as the
+    memoryview returned for BYTEA) into an array('d') with a single memcpy.
+    """
+    values = array("d")
+    values.frombytes(data.cast("B") if isinstance(data, memoryview) else data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+class Float64Vector(TypeDecorator):
+    """Stores a sequence of floats as packed little-endian float64 bytes."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return pack_float64(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return unpack_float64(value)
+
+
+def inputs_column_type():
+    """Column type for calculation inputs under the configured storage mode."""
+    if settings.CALCULATIONS_INPUTS_STORAGE == "float64":
+        return Float64Vector()
+    return JSON
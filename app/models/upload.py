@@ -0,0 +1,144 @@
+# app/models/upload.py
+"""
+Resumable upload sessions for calculation inputs too large for one request.
+
+A client creates a session for a calculation type and PUTs numbered chunks of
+packed little-endian float64 values, in any order and as often as needed (a
+repeated chunk replaces the earlier one). Each chunk goes straight into the
+out-of-row input store (app.models.input_store) under the session id, so the
+input is never held in memory as a whole. Finalizing checks that the chunks
+are complete, computes the result in one streaming pass over them and turns
+them into the inputs of a new calculation.
+
+Sessions that are not finalized expire after CALCULATIONS_UPLOAD_EXPIRE_HOURS.
+"""
+from datetime import datetime, timedelta
+from typing import List, Tuple
+import math
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.config import get_settings
+from app.core.ids import uuid7
+from app.database import Base
+from app.models.calculation import Calculation
+from app.models.input_store import StoredChunks, chunk_counts, delete_chunks, rekey_chunks, write_chunk
+from app.models.types import float64_view
+
+settings = get_settings()
+
+
+class CalculationUpload(Base):
+    """An in-progress chunked upload of a calculation's inputs."""
+
+    __tablename__ = "calculation_uploads"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    type = Column(String(50), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+
+    @classmethod
+    def purge_expired(cls, db, user_id: uuid.UUID) -> int:
+        """Delete a user's abandoned sessions and their chunks."""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.CALCULATIONS_UPLOAD_EXPIRE_HOURS)
+        expired = db.query(cls).filter(cls.user_id == user_id, cls.updated_at < cutoff).all()
+        for upload in expired:
+            delete_chunks(db.connection(), upload.id)
+            db.delete(upload)
+        return len(expired)
+
+    def chunks(self, db) -> List[Tuple[int, int]]:
+        """(seq, value count) of the chunks received so far."""
+        return chunk_counts(db.connection(), self.id)
+
+    def put_chunk(self, db, seq: int, data: bytes) -> int:
+        """
+        Store chunk seq from packed float64 bytes, replacing any earlier copy.
+
+        Returns:
+            The number of values in the chunk
+
+        Raises:
+            ValueError: If the chunk is malformed or too large
+        """
+        if seq < 0:
+            raise ValueError("Chunk numbers start at 0.")
+        if len(data) > settings.CALCULATIONS_UPLOAD_MAX_CHUNK_BYTES:
+            raise ValueError(
+                f"Chunks may be at most {settings.CALCULATIONS_UPLOAD_MAX_CHUNK_BYTES} bytes."
+            )
+        values = float64_view(data)
+        if not values:
+            raise ValueError("Chunks must contain at least one value.")
+        if not all(map(math.isfinite, values)):
+            raise ValueError("Inputs must be finite numbers")
+        write_chunk(db.connection(), self.id, self.user_id, seq, values, self.created_at)
+        self.updated_at = datetime.utcnow()
+        return len(values)
+
+    def finalize(self, db, expected_chunks: int) -> Tuple[Calculation, int]:
+        """
+        Create the calculation from chunks 0..expected_chunks-1 and end the session.
+
+        Returns:
+            The new (flushed, uncommitted) calculation and its number of inputs
+
+        Raises:
+            ValueError: If chunks are missing or unexpected, or the inputs are invalid
+        """
+        received = self.chunks(db)
+        seqs = [seq for seq, _ in received]
+        if seqs != list(range(expected_chunks)):
+            missing = sorted(set(range(expected_chunks)) - set(seqs))
+            extra = sorted(set(seqs) - set(range(expected_chunks)))
+            problems = []
+            if missing:
+                problems.append(f"missing chunks {_ranges(missing)}")
+            if extra:
+                problems.append(f"unexpected chunks {_ranges(extra)}")
+            raise ValueError(f"Upload is incomplete: {'; '.join(problems)}.")
+
+        calculation = Calculation.create(self.type, self.user_id, inputs=[])
+        calculation.id = uuid7()
+        # Set now rather than at flush: the chunks move to the calculation's partition
+        calculation.created_at = datetime.utcnow()
+        calculation.inputs_external = True
+        calculation.result = calculation.get_result_from_chunks(StoredChunks(db.connection(), self.id))
+        rekey_chunks(db.connection(), self.id, calculation.id, calculation.created_at)
+        db.add(calculation)
+        db.delete(self)
+        db.flush()
+        return calculation, sum(count for _, count in received)
+
+    def abort(self, db) -> None:
+        """Discard the session and its chunks."""
+        delete_chunks(db.connection(), self.id)
+        db.delete(self)
+
+
+def _ranges(seqs: List[int]) -> str:
+    """Compact "0-3, 7" rendering of sorted chunk numbers."""
+    parts = []
+    start = prev = seqs[0]
+    for seq in seqs[1:] + [None]:
+        if seq is not None and seq == prev + 1:
+            prev = seq
+            continue
+        parts.append(str(start) if start == prev else f"{start}-{prev}")
+        if seq is not None:
+            start = prev = seq
+    return ", ".join(parts)
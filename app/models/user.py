@@ -1,11 +1,13 @@
 # app/models/user.py
 
 import uuid
+from typing import List
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Column, String, Boolean, DateTime, or_
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy import Column, String, Boolean, DateTime, delete, or_
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.orm import relationship
 from app.core.config import get_settings
+from app.core.ids import uuid7
 from app.database import Base
 from app.models.calculation import Calculation
 
@@ -21,7 +23,7 @@ class User(Base):
     __tablename__ = "users"
     
     # Primary key and identifying fields
-    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, index=True)
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid7, unique=True, index=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
     password = Column(String, nullable=False)
@@ -40,7 +42,14 @@ class User(Base):
     last_login = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
-    calculations = relationship("Calculation", back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes leaves child rows to the FK's ON DELETE CASCADE instead of
+    # loading every calculation into the session before deleting the user.
+    calculations = relationship(
+        "Calculation",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     
     def __init__(self, *args, **kwargs):
         """Initialize a new user, handling password hashing if provided."""
@@ -139,6 +148,136 @@ class User(Base):
         db.add(user)
         return user
 
+    @classmethod
+    def bulk_register(cls, db, users_data: List[dict]) -> dict:
+        """
+        Register many users with a single multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+        Applies the same password rule as register(), hashes the passwords in
+        parallel, and treats rows that collide on username/email (with existing
+        users or earlier rows of the same batch) as duplicates.
+
+        Args:
+            db: SQLAlchemy database session
+            users_data: List of dictionaries containing user registration data
+
+        Returns:
+            dict: Lists of "created", "duplicates" and "failed" rows, each
+            entry carrying the row's index in users_data
+        """
+        from app.auth.jwt import hash_passwords
+
+        report = {"created": [], "duplicates": [], "failed": []}
+        valid = []
+        for index, user_data in enumerate(users_data):
+            password = user_data.get("password")
+            missing = [
+                field for field in ("first_name", "last_name", "email", "username")
+                if not user_data.get(field)
+            ]
+            if missing:
+                error = f"Missing required fields: {', '.join(missing)}"
+            elif not password or len(password) < 6:
+                error = "Password must be at least 6 characters long"
+            else:
+                valid.append((index, user_data))
+                continue
+            report["failed"].append({
+                "index": index,
+                "username": user_data.get("username"),
+                "email": user_data.get("email"),
+                "error": error,
+            })
+
+        # Skip bcrypt for rows that are already known duplicates; the
+        # ON CONFLICT clause still catches rows that race in concurrently.
+        taken = set()
+        if valid:
+            existing = db.query(cls.username, cls.email).filter(or_(
+                cls.username.in_([user_data["username"] for _, user_data in valid]),
+                cls.email.in_([user_data["email"] for _, user_data in valid]),
+            ))
+            for username, email in existing:
+                taken.update((("username", username), ("email", email)))
+        candidates = []
+        for index, user_data in valid:
+            keys = {("username", user_data["username"]), ("email", user_data["email"])}
+            if keys & taken:
+                report["duplicates"].append({
+                    "index": index,
+                    "username": user_data["username"],
+                    "email": user_data["email"],
+                })
+                continue
+            taken |= keys
+            candidates.append((index, user_data))
+        valid = candidates
+
+        if not valid:
+            return report
+
+        hashed = hash_passwords([user_data["password"] for _, user_data in valid])
+        rows = [
+            {
+                "first_name": user_data["first_name"],
+                "last_name": user_data["last_name"],
+                "email": user_data["email"],
+                "username": user_data["username"],
+                "password": hashed_password,
+                "is_active": True,
+                "is_verified": False,
+            }
+            for (_, user_data), hashed_password in zip(valid, hashed)
+        ]
+        stmt = (
+            pg_insert(cls)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(cls.id, cls.username)
+        )
+        inserted = {username: user_id for user_id, username in db.execute(stmt)}
+
+        for index, user_data in valid:
+            entry = {
+                "index": index,
+                "username": user_data["username"],
+                "email": user_data["email"],
+            }
+            user_id = inserted.pop(user_data["username"], None)
+            if user_id is not None:
+                report["created"].append({**entry, "id": user_id})
+            else:
+                report["duplicates"].append(entry)
+        return report
+
+    @classmethod
+    def bulk_delete(cls, db, user_ids: List[uuid.UUID]) -> int:
+        """
+        Delete users with a single DELETE statement.
+
+        Their calculations are removed by the database through the
+        calculations.user_id ON DELETE CASCADE foreign key, so memory use is
+        constant regardless of how many calculations the users own.
+
+        Args:
+            db: SQLAlchemy database session
+            user_ids: UUIDs of the users to delete
+
+        Returns:
+            int: Number of users deleted
+        """
+        if not user_ids:
+            return 0
+        stmt = (
+            delete(cls)
+            .where(cls.id.in_(user_ids))
+            .execution_options(synchronize_session=False)
+        )
+        deleted = db.execute(stmt).rowcount
+        # Drop any now-stale instances still held by this session
+        db.expire_all()
+        return deleted
+
     @classmethod
     def authenticate(cls, db, username_or_email: str, password: str):
         """
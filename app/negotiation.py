@@ -0,0 +1,181 @@
+# app/negotiation.py
+"""
+Content negotiation for the calculation endpoints.
+
+Responses are encoded as JSON (the default), MessagePack or CBOR according to
+the Accept header. Request bodies sent as application/msgpack or
+application/cbor are decoded by NegotiatedRoute before FastAPI validates them,
+so the same schemas apply to every format. Floats travel as 8-byte IEEE-754
+doubles in both binary formats instead of decimal text.
+
+application/octet-stream bodies are not decoded: the route keeps the raw bytes
+in request.state.raw_body and presents an empty body to FastAPI, so endpoints
+that accept packed float64 input (POST /calculations) can read them in place.
+
+Both binary formats carry the JSON data model: UUIDs and datetimes are sent as
+the same strings JSON uses, so a response is identical whether it was built
+from the database or from the Redis cache.
+"""
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+from uuid import UUID
+
+import cbor2
+import msgpack
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+from app.serialization import dumps, loads
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+OCTET_STREAM = "application/octet-stream"
+
+_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+BINARY_MEDIA_TYPES = (MSGPACK, CBOR)
+SUPPORTED_MEDIA_TYPES = (JSON,) + BINARY_MEDIA_TYPES
+
+
+def media_type_of(value: Optional[str]) -> str:
+    """The bare, lower-cased media type of a Content-Type or Accept entry."""
+    media_type = (value or "").split(";", 1)[0].strip().lower()
+    return _ALIASES.get(media_type, media_type)
+
+
+def negotiate(request: Request) -> str:
+    """
+    Pick the response media type from the Accept header.
+
+    The supported type with the highest q-value wins, earlier entries winning
+    ties; wildcards map to JSON. Requests that accept nothing we support get
+    JSON rather than a 406.
+    """
+    return preferred(request, SUPPORTED_MEDIA_TYPES, JSON)
+
+
+def preferred(request: Request, offered: Sequence[str], default: str) -> str:
+    """
+    Pick one of the offered media types from the Accept header, as negotiate
+    does, with wildcards and unacceptable requests mapping to default.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return default
+    best, best_q = default, 0.0
+    for entry in accept.split(","):
+        media_type, *params = entry.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type_of(media_type)
+        if media_type in ("*/*", "application/*"):
+            media_type = default
+        if media_type in offered and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def encode(value: Any, media_type: str) -> bytes:
+    """Encode a response value in the given media type."""
+    if media_type == MSGPACK:
+        return msgpack.packb(value, default=_msgpack_default)
+    if media_type == CBOR:
+        # cbor2 would tag UUIDs and datetimes natively; normalize them to the
+        # JSON data model first (orjson round-trips far faster than a Python walk)
+        return cbor2.dumps(loads(dumps(value)))
+    return dumps(value)
+
+
+def decode(data: bytes, media_type: str) -> Any:
+    """
+    Decode a MessagePack or CBOR request body.
+
+    Raises:
+        ValueError: If the body is not valid in that format
+    """
+    try:
+        if media_type == MSGPACK:
+            return msgpack.unpackb(data)
+        return cbor2.loads(data)
+    except Exception as e:
+        raise ValueError(f"Invalid {media_type} body") from e
+
+
+def negotiated_response(
+    request: Request,
+    content: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Encode content in the media type the client asked for."""
+    media_type = negotiate(request)
+    return Response(
+        encode(content, media_type),
+        status_code=status_code,
+        media_type=media_type,
+        headers={**(headers or {}), "Vary": "Accept"},
+    )
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route that decodes MessagePack and CBOR request bodies before validation
+    and sets raw application/octet-stream bodies aside.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            media_type = media_type_of(request.headers.get("content-type"))
+            if media_type in BINARY_MEDIA_TYPES:
+                data = await request.body()
+                if data:
+                    try:
+                        value = decode(data, media_type)
+                    except ValueError as e:
+                        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+                    request = _decoded_request(request, data, value)
+            elif media_type == OCTET_STREAM:
+                request = _raw_body_request(request, await request.body())
+            return await handler(request)
+
+        return route_handler
+
+
+def _decoded_request(request: Request, data: bytes, value: Any) -> Request:
+    # FastAPI only parses bodies it sees as JSON; present the decoded value as
+    # the request's parsed JSON so no re-encoding is needed
+    headers = [(name, raw) for name, raw in request.scope["headers"] if name != b"content-type"]
+    headers.append((b"content-type", JSON.encode()))
+    decoded = Request({**request.scope, "headers": headers}, request.receive)
+    decoded._body = data
+    decoded._json = value
+    return decoded
+
+
+def _raw_body_request(request: Request, data: bytes) -> Request:
+    raw = Request(dict(request.scope), request.receive)
+    raw._body = b""
+    raw.state.raw_body = data
+    return raw
@@ -16,6 +16,9 @@ Functions:
 Usage:
 These functions can be imported and used in other modules or integrated into APIs
 to perform arithmetic operations based on user input.
+
+Array-aware variants with broadcasting live in app.operations.vectorized, and
+app.operations.registry ties both to the calculation types.
 """
 
 from typing import Union  # Import Union for type hinting multiple possible types
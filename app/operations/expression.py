@@ -0,0 +1,313 @@
+# app/operations/expression.py
+
+"""
+Module: expression.py
+
+Arithmetic expressions over named variables, for the expression calculation
+type.
+
+An expression such as "(a + b) * c / d" is parsed with Python's ast module and
+checked against a whitelist: numbers, variable names, the binary operators
++ - * /, unary + and -, and calls to registered operations by name, such as
+median(a, b, c). Anything else (attribute access, subscripts, comparisons,
+**, keyword arguments and so on) is rejected. The checked tree is rewritten
+so that every operator calls its scalar kernel from app.operations, and
+compiled once into a Python function with no builtins, so evaluating it runs
+bytecode instead of walking the tree.
+
+The same code is also bound to the vectorized kernels from
+app.operations.vectorized, so evaluate_columns computes a whole column of
+points per kernel call (parameter sweeps). Expressions that call operations
+have no vectorized form and are evaluated point by point instead.
+
+Variables are bound to the calculation inputs in alphabetical order of their
+names: "(a + b) * c / d" with inputs [1, 2, 3, 4] evaluates (1 + 2) * 3 / 4.
+
+Compiled expressions are kept in an LRU of CALCULATIONS_EXPRESSION_CACHE_SIZE
+entries keyed by the normalized expression string (runs of whitespace
+collapsed to one space), so a repeated formula skips parsing entirely.
+
+Functions:
+- normalize(source: str) -> str
+- compile_expression(source: str) -> CompiledExpression
+- cache_info() -> functools._CacheInfo
+"""
+
+import ast
+import math
+from array import array
+from functools import lru_cache
+from numbers import Real
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.operations import Number, add, divide, multiply, subtract, vectorized
+from app.operations.registry import Operation, get_operation, operations, register
+
+settings = get_settings()
+
+# Kernel name, scalar kernel and vectorized kernel for each operator
+_BINARY_OPERATORS = {
+    ast.Add: ("op_addition", add, vectorized.add),
+    ast.Sub: ("op_subtraction", subtract, vectorized.subtract),
+    ast.Mult: ("op_multiplication", multiply, vectorized.multiply),
+    ast.Div: ("op_division", divide, vectorized.divide),
+}
+
+
+class CompiledExpression:
+    """
+    A checked, compiled expression.
+
+    Attributes:
+    - source (str): The expression in canonical form, e.g. "(a + b) * c / d".
+    - variables (tuple of str): Variable names, in the order inputs bind to them.
+    """
+
+    __slots__ = ("source", "variables", "_function", "_vectorized")
+
+    def __init__(
+        self,
+        source: str,
+        variables: Tuple[str, ...],
+        function: Callable[..., Number],
+        vectorized_function: Optional[Callable] = None,
+    ):
+        self.source = source
+        self.variables = variables
+        self._function = function
+        self._vectorized = vectorized_function
+
+    def __repr__(self):
+        return f"<CompiledExpression({self.source})>"
+
+    def check(self, values: Sequence[Number]) -> None:
+        """
+        Raises:
+        - ValueError: If values does not hold one input per variable.
+        """
+        if len(values) != len(self.variables):
+            raise ValueError(
+                f"Expression takes {len(self.variables)} inputs "
+                f"({', '.join(self.variables)}), got {len(values)}"
+            )
+
+    def evaluate(self, values: Sequence[Number]) -> Number:
+        """
+        Evaluate with values bound to the variables in order.
+
+        Example:
+        >>> compile_expression("(a + b) * c / d").evaluate([1, 2, 3, 4])
+        2.25
+        """
+        self.check(values)
+        return self._function(*values)
+
+    def evaluate_columns(self, columns: Sequence[Sequence[Number]], length: int) -> array:
+        """
+        Evaluate at length points, given one column of length values per
+        variable. Points where the expression is undefined (a zero divisor)
+        are NaN.
+
+        Example:
+        >>> compile_expression("a / b").evaluate_columns([[1, 2, 3], [2, 0, 4]], 3).tolist()
+        [0.5, nan, 0.75]
+        """
+        if self._vectorized is not None:
+            try:
+                result = self._vectorized(*columns)
+            except ValueError:
+                # A zero divisor somewhere in the block; find it point by point
+                pass
+            else:
+                if isinstance(result, Real):
+                    # No variables, or only constants on every path
+                    return array("d", [result]) * length
+                if isinstance(result, array) and result is not columns[0]:
+                    return result
+                return array("d", result)
+        return array("d", map(self._point, *columns)) if columns else array("d", [self._point()]) * length
+
+    def _point(self, *values: Number) -> float:
+        try:
+            return self._function(*values)
+        except (ValueError, ArithmeticError):
+            return math.nan
+
+
+class _Compiler(ast.NodeTransformer):
+    """Checks a parsed expression and rewrites operators as kernel calls."""
+
+    def __init__(self):
+        self.variables = set()
+        self.kernels: Dict[str, Callable] = {}
+        # Vectorized kernels under the same names, while every kernel has one
+        self.vectorized_kernels: Optional[Dict[str, Callable]] = {}
+
+    def _kernel(self, key: str, kernel: Callable, vectorized_kernel: Optional[Callable] = None) -> ast.Name:
+        # Kernel names start with an underscore, which variable names cannot
+        self.kernels[f"_{key}"] = kernel
+        if vectorized_kernel is None:
+            self.vectorized_kernels = None
+        elif self.vectorized_kernels is not None:
+            self.vectorized_kernels[f"_{key}"] = vectorized_kernel
+        return ast.Name(id=f"_{key}", ctx=ast.Load())
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        return ast.Expression(body=self.visit(node.body))
+
+    def visit_Constant(self, node):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Unsupported constant in expression: {value!r}")
+        try:
+            # Evaluated as floats, like the inputs, so integer literals can't
+            # grow past what a float holds
+            number = float(value)
+        except OverflowError:
+            number = math.inf
+        if not math.isfinite(number):
+            raise ValueError(f"Unsupported constant in expression: {_abbreviate(repr(value))}")
+        return ast.Constant(value=number)
+
+    def visit_Name(self, node):
+        if node.id.startswith("_"):
+            raise ValueError(f"Invalid variable name: {node.id}")
+        if node.id in _function_names():
+            raise ValueError(f"{node.id} is an operation; call it as {node.id}(...)")
+        self.variables.add(node.id)
+        return node
+
+    def visit_BinOp(self, node):
+        kernels = _BINARY_OPERATORS.get(type(node.op))
+        if kernels is None:
+            raise ValueError(f"Unsupported operator in expression: {type(node.op).__name__}")
+        return ast.Call(
+            func=self._kernel(*kernels),
+            args=[self.visit(node.left), self.visit(node.right)],
+            keywords=[],
+        )
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, ast.UAdd):
+            return self.visit(node.operand)
+        if not isinstance(node.op, ast.USub):
+            raise ValueError(f"Unsupported operator in expression: {type(node.op).__name__}")
+        operand = self.visit(node.operand)
+        if isinstance(operand, ast.Constant):
+            return ast.Constant(value=-operand.value)
+        # Multiplying by -1 is exact and keeps the sign of zeros
+        return ast.Call(
+            func=self._kernel("negate", multiply, vectorized.multiply),
+            args=[ast.Constant(value=-1), operand],
+            keywords=[],
+        )
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _function_names():
+            name = node.func.id if isinstance(node.func, ast.Name) else ast.unparse(node.func)
+            raise ValueError(f"Unknown function in expression: {name}")
+        if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ValueError(f"{node.func.id}() takes positional arguments only")
+        operation = get_operation(node.func.id)
+        if len(node.args) < operation.min_inputs:
+            raise ValueError(f"{operation.name}() takes at least {operation.min_inputs} arguments")
+        arguments = ast.Tuple(elts=[self.visit(arg) for arg in node.args], ctx=ast.Load())
+        return ast.Call(
+            func=self._kernel(f"fn_{operation.name}", operation.reduce), args=[arguments], keywords=[]
+        )
+
+
+def _abbreviate(text: str, limit: int = 40) -> str:
+    """text, shortened in the middle to at most limit characters."""
+    if len(text) <= limit:
+        return text
+    half = (limit - 3) // 2
+    return f"{text[:half]}...{text[-half:]}"
+
+
+def _function_names():
+    """Operations an expression may call: every one that reduces plain inputs."""
+    return {operation.name for operation in operations() if operation.compiler is None}
+
+
+def normalize(source: str) -> str:
+    """
+    The cache key of an expression: whitespace runs collapsed to one space.
+
+    Example:
+    >>> normalize("  (a +  b)\\t* c ")
+    '(a + b) * c'
+    """
+    return " ".join(source.split())
+
+
+@lru_cache(maxsize=settings.CALCULATIONS_EXPRESSION_CACHE_SIZE)
+def _compile(normalized: str) -> CompiledExpression:
+    try:
+        tree = ast.parse(normalized, mode="eval")
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f"Invalid expression: {getattr(e, 'msg', e)}") from None
+    compiler = _Compiler()
+    try:
+        body = compiler.visit(tree).body
+        variables = tuple(sorted(compiler.variables))
+        function = ast.Expression(
+            body=ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=name) for name in variables],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=body,
+            )
+        )
+        code = compile(ast.fix_missing_locations(function), "<expression>", "eval")
+        # The rewrite built new nodes, so tree is still the expression as parsed
+        source = ast.unparse(tree)
+    except RecursionError:
+        raise ValueError("Expression is nested too deeply") from None
+    vectorized_function = None
+    if compiler.vectorized_kernels is not None:
+        vectorized_function = eval(code, {"__builtins__": {}, **compiler.vectorized_kernels})
+    return CompiledExpression(
+        source, variables, eval(code, {"__builtins__": {}, **compiler.kernels}), vectorized_function
+    )
+
+
+def compile_expression(source: str) -> CompiledExpression:
+    """
+    Parse, check and compile an expression, or fetch it from the LRU.
+
+    Raises:
+    - ValueError: If the expression is missing, too long, not valid syntax or
+      uses anything outside the whitelist.
+
+    Example:
+    >>> compile_expression("b - a").variables
+    ('a', 'b')
+    >>> compile_expression("a.__class__")
+    Traceback (most recent call last):
+        ...
+    ValueError: Unsupported syntax in expression: Attribute
+    """
+    if not isinstance(source, str) or not source.strip():
+        raise ValueError("An expression is required for expression calculations")
+    if len(source) > settings.CALCULATIONS_EXPRESSION_MAX_LENGTH:
+        raise ValueError(
+            f"Expressions are limited to {settings.CALCULATIONS_EXPRESSION_MAX_LENGTH} characters"
+        )
+    return _compile(normalize(source))
+
+
+def cache_info():
+    """Hits, misses and size of the compiled-expression LRU."""
+    return _compile.cache_info()
+
+
+register(Operation("expression", compiler=compile_expression, min_inputs=1))
@@ -0,0 +1,238 @@
+# app/operations/reduction.py
+
+"""
+Module: reduction.py
+
+Parallel chunked reductions for calculations with very large input vectors.
+
+parallel_reduce splits the inputs into chunks of CALCULATIONS_REDUCTION_CHUNK_SIZE
+values and reduces the chunks across a process pool. The inputs are copied
+once into a shared memory block that the workers read in place, so nothing is
+pickled per chunk. The pool is started once per process and shared; its
+workers come from a forkserver (spawn where that is unavailable) rather than
+fork, so they never inherit the server's threads, locks or sockets. Call
+shutdown_pool when the application stops. Calculation.get_result switches to this engine once a
+calculation has CALCULATIONS_PARALLEL_THRESHOLD inputs or more.
+
+Sums use math.fsum per chunk, keeping each chunk's rounding error alongside
+its sum, and math.fsum again over those pairs, so the total is correctly
+rounded. That is more accurate than the left-to-right sum() of the serial path,
+so results can differ in the last bits. Sums that overflow are redone scaled
+down by a power of two, which is exact, so a total that does not fit a float
+is ±inf, as on the serial path, rather than an error. Products are taken in
+blocks with math.prod and kept as a frexp mantissa and a separate integer
+exponent, so intermediate products never overflow or underflow. The final result only
+overflows (to ±inf) or underflows when the true product does.
+
+The operation's reduction in app.operations.registry decides how its inputs
+are split and combined.
+
+Functions:
+- parallel_reduce(operation, values, workers=None, chunk_size=None) -> float
+- shutdown_pool() -> None
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.operations.registry import get_operation
+
+settings = get_settings()
+
+# Values multiplied with one math.prod call before renormalizing
+_BLOCK = 32
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _sum_chunk(values: Sequence[float]) -> Tuple[float, float, int]:
+    """
+    Sum of values as (rounded sum, rounding error, exponent), so chunk sums
+    combine exactly: the sum is (rounded sum + error) * 2**exponent. The
+    exponent is 0 unless the sum overflows, in which case the values are
+    scaled down by a power of two first, which is exact.
+    """
+    exponent = 0
+    try:
+        total = math.fsum(values)
+    except OverflowError:
+        exponent = len(values).bit_length() + 1
+        values = [math.ldexp(value, -exponent) for value in values]
+        total = math.fsum(values)
+    return total, math.fsum(chain(values, (-total,))), exponent
+
+
+def _combine_sums(parts: List[Tuple[float, float, int]]) -> float:
+    """Correctly rounded total of _sum_chunk parts; ±inf only if the total overflows."""
+    if not any(exponent for _, _, exponent in parts):
+        try:
+            return math.fsum(chain.from_iterable((total, error) for total, error, _ in parts))
+        except OverflowError:
+            pass
+    # Bring every part down to one exponent at which no partial sum can overflow
+    shift = max(exponent for _, _, exponent in parts) + len(parts).bit_length() + 2
+    total = math.fsum(
+        math.ldexp(term, exponent - shift)
+        for total, error, exponent in parts
+        for term in (total, error)
+    )
+    return _ldexp(total, shift)
+
+
+def _product_chunk(values: Sequence[float]) -> Tuple[float, int]:
+    """Product of values as (mantissa, exponent), immune to intermediate over/underflow."""
+    mantissa, exponent = 1.0, 0
+    for start in range(0, len(values), _BLOCK):
+        block = values[start:start + _BLOCK]
+        product = math.prod(block)
+        if (product == 0 or math.isinf(product) or abs(product) < sys.float_info.min) and all(
+            map(math.isfinite, block)
+        ) and 0 not in block:
+            # The block itself over- or underflowed; multiply it in step by step
+            for value in block:
+                mantissa, shift = math.frexp(mantissa * value)
+                exponent += shift
+            continue
+        mantissa, shift = math.frexp(mantissa * product)
+        exponent += shift
+    return mantissa, exponent
+
+
+def _combine_products(parts: List[Tuple[float, int]]) -> Tuple[float, int]:
+    mantissa, exponent = 1.0, 0
+    for part_mantissa, part_exponent in parts:
+        mantissa, shift = math.frexp(mantissa * part_mantissa)
+        exponent += part_exponent + shift
+    return mantissa, exponent
+
+
+def _ldexp(mantissa: float, exponent: int) -> float:
+    try:
+        return math.ldexp(mantissa, exponent)
+    except OverflowError:
+        return math.copysign(math.inf, mantissa)
+
+
+_CHUNK_FUNCTIONS = {"sum": _sum_chunk, "product": _product_chunk}
+
+
+def _reduce_shared(name: str, start: int, stop: int, kind: str):
+    """Worker: reduce values[start:stop] of the shared float64 block `name`."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        with block.buf.cast("d") as view, view[start:stop] as chunk:
+            return _CHUNK_FUNCTIONS[kind](chunk)
+    finally:
+        block.close()
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(_START_METHOD),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes, if any were started."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+def _map_chunks(kind: str, values: Sequence[float], start: int, workers: int, chunk_size: int) -> list:
+    """Reduce values[start:] chunk by chunk, in parallel when it pays off."""
+    count = len(values) - start
+    bounds = [(lo, min(lo + chunk_size, len(values))) for lo in range(start, len(values), chunk_size)]
+    if workers <= 1 or len(bounds) <= 1:
+        func = _CHUNK_FUNCTIONS[kind]
+        return [func(values[lo:hi]) for lo, hi in bounds]
+
+    block = shared_memory.SharedMemory(create=True, size=max(len(values), 1) * 8)
+    try:
+        with block.buf.cast("d") as view:
+            if isinstance(values, (array, memoryview)) and memoryview(values).format == "d":
+                with memoryview(values).cast("B") as raw:
+                    block.buf[:len(raw)] = raw
+            else:
+                view[:len(values)] = array("d", values)
+        futures = [
+            _executor(workers).submit(_reduce_shared, block.name, lo, hi, kind) for lo, hi in bounds
+        ]
+        return [future.result() for future in futures]
+    finally:
+        block.close()
+        block.unlink()
+
+
+def parallel_reduce(
+    operation: str,
+    values: Sequence[float],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> float:
+    """
+    Reduce values with a calculation type's operation in parallel chunks.
+
+    Parameters:
+    - operation (str): A registered calculation type, such as "addition".
+    - values (sequence of float): At least two inputs; a list, array('d') or memoryview.
+    - workers (int, optional): Worker processes (CALCULATIONS_REDUCTION_WORKERS,
+      else os.cpu_count()). With one worker the chunks are reduced in-process.
+    - chunk_size (int, optional): Values per chunk (CALCULATIONS_REDUCTION_CHUNK_SIZE).
+
+    Returns:
+    - float: The result.
+
+    Raises:
+    - ValueError: For an unknown or non-reducible operation, fewer than two inputs or a zero divisor.
+
+    Example:
+    >>> parallel_reduce("addition", [0.1] * 10, workers=1, chunk_size=3)
+    1.0
+    >>> parallel_reduce("division", [100.0, 2.0, 5.0], workers=1)
+    10.0
+    """
+    if len(values) < 2:
+        raise ValueError("Inputs must be a list with at least two numbers.")
+    workers = workers or settings.CALCULATIONS_REDUCTION_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or settings.CALCULATIONS_REDUCTION_CHUNK_SIZE
+
+    reduction = get_operation(operation).reduction
+    if reduction is None:
+        raise ValueError(f"Unsupported operation: {operation}")
+    # Differences and quotients reduce the inputs after the first
+    start = 1 if reduction in ("difference", "quotient") else 0
+
+    if reduction in ("sum", "difference"):
+        parts = _map_chunks("sum", values, start, workers, chunk_size)
+        if reduction == "difference":
+            parts = [(values[0], 0.0, 0)] + [(-total, -error, exponent) for total, error, exponent in parts]
+        return _combine_sums(parts)
+    mantissa, exponent = _combine_products(_map_chunks("product", values, start, workers, chunk_size))
+    if reduction == "product":
+        return _ldexp(mantissa, exponent)
+    if mantissa == 0:
+        raise ValueError("Cannot divide by zero.")
+    return _ldexp(values[0] / mantissa, -exponent)
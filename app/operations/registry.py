@@ -0,0 +1,255 @@
+# app/operations/registry.py
+
+"""
+Module: registry.py
+
+The registry of calculation operations.
+
+Each operation is declared once, as an Operation: its name, its validation
+rules and how the calculation engines reduce an input vector with it.
+Arithmetic operations fold over the inputs; statistics
+(app.operations.statistics) reduce the inputs with a chunk reducer instead. Everything else is derived
+from the registry when the modules that use it are imported:
+
+- app.models.calculation binds one Calculation subclass to each operation
+  and dispatches Calculation.create through a dict of them;
+- app.schemas.calculation builds the CalculationType enum and validates
+  inputs with Operation.validate;
+- app.operations.reduction picks its chunk reduction from Operation.reduction;
+- app.operations.expression lets expressions call operations by name.
+
+Operations from other modules are registered by listing the modules in
+CALCULATIONS_OPERATION_MODULES; they are imported at the end of this module,
+before any of the above is built, and call register() at import time.
+
+Functions:
+- register(operation: Operation) -> Operation
+- get_operation(name: str) -> Operation
+- operations() -> tuple of Operation
+- operation_names() -> tuple of str
+"""
+
+import importlib
+import math
+import operator
+from functools import partial, reduce
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.operations import Number, statistics
+
+settings = get_settings()
+
+# How parallel_reduce can split an operation: "sum" and "product" reduce every
+# input, "difference" and "quotient" reduce the inputs after the first and
+# subtract or divide the first input by that
+REDUCTIONS = ("sum", "difference", "product", "quotient")
+
+_NUMBER_WORDS = ("zero", "one", "two", "three", "four", "five")
+
+
+def count_phrase(count: int) -> str:
+    """
+    Spell out a count of numbers for validation messages.
+
+    Example:
+    >>> count_phrase(1), count_phrase(2), count_phrase(12)
+    ('one number', 'two numbers', '12 numbers')
+    """
+    word = _NUMBER_WORDS[count] if 0 <= count < len(_NUMBER_WORDS) else str(count)
+    return f"{word} number" if count == 1 else f"{word} numbers"
+
+
+class Operation:
+    """
+    One calculation operation.
+
+    Attributes:
+    - name (str): The calculation type, a lowercase identifier such as "addition".
+    - fold (callable or None): fold(values, start) applies the operation to
+      start and then each of values in turn, left to right, in one call (e.g. sum).
+    - chunk_reducer (callable or None): Instead of fold, chunk_reducer(chunks)
+      returns (result, count) for a vector given as an iterable of chunks,
+      e.g. app.operations.statistics.median.
+    - compiler (callable or None): Instead of either, compiler(expression)
+      compiles the calculation's expression into an object whose
+      evaluate(values) computes the result (app.operations.expression).
+    - identity (number or None): Start value of the fold over all inputs, or
+      None to start from the first input and fold the rest into it.
+    - reduction (str or None): One of REDUCTIONS, or None if the operation
+      cannot be reduced in parallel chunks.
+    - min_inputs (int): Fewest inputs a calculation accepts.
+    - nonzero_tail (bool): Whether inputs after the first must be non-zero.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fold: Optional[Callable[[Iterable[Number], Number], Number]] = None,
+        identity: Optional[Number] = None,
+        reduction: Optional[str] = None,
+        min_inputs: int = 2,
+        nonzero_tail: bool = False,
+        chunk_reducer: Optional[Callable[[Iterable[Sequence[Number]]], Tuple[Optional[Number], int]]] = None,
+        compiler: Optional[Callable[[str], Any]] = None,
+    ):
+        if not name.isidentifier() or name != name.lower():
+            raise ValueError(f"Operation names must be lowercase identifiers: {name!r}")
+        if sum(hook is not None for hook in (fold, chunk_reducer, compiler)) != 1:
+            raise ValueError("An operation needs exactly one of fold, chunk_reducer or compiler")
+        if reduction is not None and reduction not in REDUCTIONS:
+            raise ValueError(f"reduction must be one of: {', '.join(REDUCTIONS)}")
+        self.name = name
+        self.fold = fold
+        self.identity = identity
+        self.reduction = reduction
+        self.min_inputs = min_inputs
+        self.nonzero_tail = nonzero_tail
+        self.chunk_reducer = chunk_reducer
+        self.compiler = compiler
+
+    def __repr__(self):
+        return f"<Operation({self.name})>"
+
+    def validate(self, inputs: Sequence[Number], expression: Optional[str] = None) -> None:
+        """
+        Check inputs (and the expression, for operations that take one)
+        against the operation's rules.
+
+        Raises:
+        - ValueError: If there are too few inputs, a forbidden zero, or a
+          missing, invalid or unexpected expression.
+        """
+        if self.compiler is not None:
+            self.compiler(expression).check(inputs)
+        elif expression is not None:
+            raise ValueError(f"{self.name} calculations do not take an expression")
+        if len(inputs) < self.min_inputs:
+            verb = "is" if self.min_inputs == 1 else "are"
+            raise ValueError(
+                f"At least {count_phrase(self.min_inputs)} {verb} required for calculation"
+            )
+        # `in` scans in C without copying the tail
+        if self.nonzero_tail and 0 in islice(inputs, 1, None):
+            raise ValueError("Cannot divide by zero")
+
+    def reduce(self, values: Sequence[Number], expression: Optional[str] = None) -> Number:
+        """
+        Apply the operation across values, left to right.
+
+        Example:
+        >>> get_operation("subtraction").reduce([10, 3, 2])
+        5
+        >>> get_operation("median").reduce([10, 3, 2])
+        3
+        """
+        if self.compiler is not None:
+            return self.compiler(expression).evaluate(values)
+        if self.chunk_reducer is not None:
+            return self.chunk_reducer((values,))[0]
+        if self.identity is None:
+            return self.fold(islice(values, 1, None), values[0])
+        return self.fold(values, self.identity)
+
+    def reduce_chunks(
+        self, chunks: Iterable[Sequence[Number]], expression: Optional[str] = None
+    ) -> Tuple[Optional[Number], int]:
+        """
+        Apply the operation across a vector delivered in chunks, in one pass
+        (a chunk reducer may make a second pass over re-iterable chunks, as
+        median does).
+
+        Returns:
+        - (result, count): The same result as reduce() on the concatenated
+          chunks (None for an empty vector without identity), and the number
+          of inputs seen.
+        """
+        if self.compiler is not None:
+            # Expressions bind a handful of named inputs, so join the chunks
+            values = list(chain.from_iterable(chunks))
+            return self.compiler(expression).evaluate(values), len(values)
+        if self.chunk_reducer is not None:
+            return self.chunk_reducer(chunks)
+        result, count = self.identity, 0
+        for chunk in chunks:
+            size = len(chunk)
+            if not size:
+                continue
+            if count == 0 and self.identity is None:
+                result, chunk = chunk[0], islice(chunk, 1, None)
+            result = self.fold(chunk, result)
+            count += size
+        return result, count
+
+
+def _product(values: Iterable[Number], start: Number) -> Number:
+    return math.prod(values, start=start)
+
+
+def _quotient(values: Iterable[Number], start: Number) -> Number:
+    try:
+        return reduce(operator.truediv, values, start)
+    except ZeroDivisionError:
+        raise ValueError("Cannot divide by zero.") from None
+
+
+_operations: Dict[str, Operation] = {}
+
+
+def register(operation: Operation) -> Operation:
+    """
+    Add an operation to the registry.
+
+    Raises:
+    - ValueError: If an operation with the same name is already registered.
+    """
+    if operation.name in _operations:
+        raise ValueError(f"Operation already registered: {operation.name}")
+    _operations[operation.name] = operation
+    return operation
+
+
+def get_operation(name: str) -> Operation:
+    """
+    Look up a registered operation by its calculation type.
+
+    Raises:
+    - ValueError: If no such operation is registered.
+    """
+    try:
+        return _operations[name]
+    except KeyError:
+        raise ValueError(f"Unsupported calculation type: {name}") from None
+
+
+def operations() -> Tuple[Operation, ...]:
+    """Registered operations, in registration order."""
+    return tuple(_operations.values())
+
+
+def operation_names() -> Tuple[str, ...]:
+    """
+    Names of the registered operations, in registration order.
+
+    Example:
+    >>> operation_names()[:4]
+    ('addition', 'subtraction', 'multiplication', 'division')
+    """
+    return tuple(_operations)
+
+
+register(Operation("addition", fold=sum, identity=0, reduction="sum"))
+register(Operation("subtraction", fold=partial(reduce, operator.sub), reduction="difference"))
+register(Operation("multiplication", fold=_product, identity=1, reduction="product"))
+register(Operation("division", fold=_quotient, reduction="quotient", nonzero_tail=True))
+register(Operation("mean", chunk_reducer=statistics.mean, min_inputs=1))
+register(Operation("variance", chunk_reducer=statistics.variance))
+register(Operation("stddev", chunk_reducer=statistics.stddev))
+register(Operation("min", chunk_reducer=statistics.minimum, min_inputs=1))
+register(Operation("max", chunk_reducer=statistics.maximum, min_inputs=1))
+register(Operation("median", chunk_reducer=statistics.median, min_inputs=1))
+
+# The expression type is registered by its own module, like any plugin
+for _module in ("app.operations.expression", *settings.CALCULATIONS_OPERATION_MODULES):
+    importlib.import_module(_module)
@@ -0,0 +1,285 @@
+# app/operations/statistics.py
+
+"""
+Module: statistics.py
+
+Descriptive statistics over input vectors that may arrive in chunks, for the
+mean, variance, stddev, min, max and median calculation types.
+
+Every function takes an iterable of chunks (sequences of numbers: lists,
+array('d') or float64 memoryviews), never concatenates them, and returns the
+statistic (None when there are too few values) with the number of values.
+
+- mean, minimum and maximum reduce each chunk in C (math.fsum, min, max) and
+  combine the per-chunk results in one pass. Sums that overflow although the
+  mean does not are redone scaled down by a power of two, which is exact.
+- variance and stddev fold the chunks into a Moments accumulator in one pass
+  with O(1) state. Each chunk's mean and sum of squared deviations are merged
+  into the running ones with Welford's update in its pairwise form (Chan, Golub and
+  LeVeque), which stays accurate where the textbook sum-of-squares formula
+  cancels catastrophically.
+- median selects the middle order statistics without sorting the inputs. A
+  first pass counts the inputs and keeps a systematic sample; the sample
+  brackets the middle ranks between two pivots, and a second pass counts the
+  inputs below the lower pivot and keeps only those between the pivots, which
+  are then sorted (Floyd-Rivest style). Memory is bounded by the sample and
+  that window rather than the input length. If the chunks can only be
+  iterated once, they are first copied into one array('d').
+
+Variance and stddev are sample statistics (n - 1 denominator), as in the
+standard library's statistics.variance and statistics.stdev.
+
+Functions:
+- mean, variance, stddev, minimum, maximum, median(chunks) -> (number or None, int)
+- moments(chunks) -> Moments
+"""
+
+import math
+from array import array
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from app.operations import Number
+
+# Target sample size for median; the sample holds between this and twice as many values
+_SAMPLE_SIZE = 65_536
+
+
+def _scaled_fsum(chunk: Sequence[Number]) -> Tuple[float, float]:
+    """
+    math.fsum of a chunk as (sum * scale, scale). The scale is 1 unless the
+    sum overflows, and otherwise a power of two small enough that it cannot.
+    """
+    try:
+        return math.fsum(chunk), 1.0
+    except OverflowError:
+        scale = 2.0 ** -(len(chunk).bit_length() + 1)
+        return math.fsum(value * scale for value in chunk), scale
+
+
+def _sum_of_squares(deviations: Iterable[float]) -> float:
+    """math.fsum of the squared deviations, or inf if it overflows."""
+    try:
+        return math.fsum(deviation * deviation for deviation in deviations)
+    except OverflowError:
+        return math.inf
+
+
+class Moments:
+    """
+    Running count, mean, sum of squared deviations (m2), minimum and maximum.
+
+    Example:
+    >>> stats = Moments().update([2, 4, 4, 4]).update([5, 5, 7, 9])
+    >>> stats.count, stats.mean, stats.variance, stats.minimum, stats.maximum
+    (8, 5.0, 4.571428571428571, 2, 9)
+    """
+
+    __slots__ = ("count", "mean", "m2", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum: Optional[Number] = None
+        self.maximum: Optional[Number] = None
+
+    def update(self, chunk: Sequence[Number]) -> "Moments":
+        """Fold one chunk into the running moments."""
+        size = len(chunk)
+        if not size:
+            return self
+        chunk_min, chunk_max = min(chunk), max(chunk)
+        if chunk_min == chunk_max:
+            # Exact; near DBL_MAX a rounded mean leaves deviations whose squares overflow
+            chunk_mean, chunk_m2 = float(chunk_min), 0.0
+        else:
+            total, scale = _scaled_fsum(chunk)
+            chunk_mean = total / size / scale
+            chunk_m2 = _sum_of_squares(value - chunk_mean for value in chunk)
+
+        if not self.count:
+            self.count, self.mean, self.m2 = size, chunk_mean, chunk_m2
+            self.minimum, self.maximum = chunk_min, chunk_max
+            return self
+        total = self.count + size
+        delta = chunk_mean - self.mean
+        if math.isfinite(delta):
+            self.mean += delta * size / total
+        else:
+            # The means are further apart than DBL_MAX; weight them instead
+            self.mean = self.mean * (self.count / total) + chunk_mean * (size / total)
+        self.m2 += chunk_m2 + delta * delta * self.count * size / total
+        self.count = total
+        self.minimum = min(self.minimum, chunk_min)
+        self.maximum = max(self.maximum, chunk_max)
+        return self
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance, or None with fewer than two values."""
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    @property
+    def stddev(self) -> Optional[float]:
+        """Sample standard deviation, or None with fewer than two values."""
+        variance = self.variance
+        return None if variance is None else math.sqrt(variance)
+
+
+def moments(chunks: Iterable[Sequence[Number]]) -> Moments:
+    """
+    Moments of a chunked vector, in one pass.
+
+    Example:
+    >>> moments([[1, 2], [3, 4]]).mean
+    2.5
+    """
+    result = Moments()
+    for chunk in chunks:
+        result.update(chunk)
+    return result
+
+
+def mean(chunks: Iterable[Sequence[Number]]) -> Tuple[Optional[float], int]:
+    """
+    Arithmetic mean, from exactly rounded per-chunk sums.
+
+    Example:
+    >>> mean([[1, 2], [3, 4.5]])
+    (2.625, 4)
+    """
+    count, sums = 0, []
+    for chunk in chunks:
+        sums.append(_scaled_fsum(chunk))
+        count += len(chunk)
+    if not count:
+        return None, 0
+    if all(scale == 1.0 for _, scale in sums):
+        try:
+            return math.fsum(total for total, _ in sums) / count, count
+        except OverflowError:
+            pass
+    # Rescale every chunk sum to one common scale small enough for the total
+    scale = 2.0 ** -(count.bit_length() + 1)
+    total = math.fsum(chunk_sum * (scale / chunk_scale) for chunk_sum, chunk_scale in sums)
+    return total / count / scale, count
+
+
+def variance(chunks: Iterable[Sequence[Number]]) -> Tuple[Optional[float], int]:
+    """Sample variance."""
+    result = moments(chunks)
+    return result.variance, result.count
+
+
+def stddev(chunks: Iterable[Sequence[Number]]) -> Tuple[Optional[float], int]:
+    """
+    Sample standard deviation.
+
+    Example:
+    >>> stddev([[2, 4, 4, 4, 5, 5, 7, 9]])
+    (2.138089935299395, 8)
+    """
+    result = moments(chunks)
+    return result.stddev, result.count
+
+
+def minimum(chunks: Iterable[Sequence[Number]]) -> Tuple[Optional[Number], int]:
+    """Smallest value."""
+    count, result = 0, None
+    for chunk in chunks:
+        if len(chunk):
+            lowest = min(chunk)
+            result = lowest if result is None else min(result, lowest)
+            count += len(chunk)
+    return result, count
+
+
+def maximum(chunks: Iterable[Sequence[Number]]) -> Tuple[Optional[Number], int]:
+    """Largest value."""
+    count, result = 0, None
+    for chunk in chunks:
+        if len(chunk):
+            highest = max(chunk)
+            result = highest if result is None else max(result, highest)
+            count += len(chunk)
+    return result, count
+
+
+def _sample(chunks: Iterable[Sequence[Number]]) -> Tuple[int, List[Number]]:
+    """Count the values and keep every step-th one, doubling step as the sample grows."""
+    count, step, sample = 0, 1, []
+    for chunk in chunks:
+        # Index of the first value in this chunk that falls on the sampling grid
+        first = -count % step
+        sample.extend(chunk[first::step])
+        count += len(chunk)
+        while len(sample) >= 2 * _SAMPLE_SIZE:
+            # Sampled positions are multiples of step, so every other one is a multiple of 2*step
+            sample = sample[::2]
+            step *= 2
+    return count, sample
+
+
+def _window(chunks: Iterable[Sequence[Number]], low: float, high: float) -> Tuple[int, List[Number]]:
+    """Count the values below low and collect the ones in [low, high]."""
+    below, window = 0, []
+    for chunk in chunks:
+        below += sum(1 for value in chunk if value < low)
+        window.extend(value for value in chunk if low <= value <= high)
+    return below, window
+
+
+def median(chunks: Iterable[Sequence[Number]]) -> Tuple[Optional[float], int]:
+    """
+    Median of a chunked vector by selection.
+
+    Returns:
+    - (median, count): The median (None for no values) and the number of values.
+
+    Example:
+    >>> median([[5, 1], [4, 2, 3]])
+    (3, 5)
+    >>> median(iter([[4.0, 1.0], [3.0, 2.0]]))
+    (2.5, 4)
+    """
+    if iter(chunks) is chunks:
+        # A one-shot iterator; keep the values as packed doubles for the second pass
+        chunks = [array("d", chain.from_iterable(chunks))]
+
+    count, sample = _sample(chunks)
+    if not count:
+        return None, 0
+    lower_rank, upper_rank = (count - 1) // 2, count // 2
+    sample.sort()
+
+    if len(sample) == count:
+        # Small enough that the sample is every value
+        ordered, below = sample, 0
+    else:
+        # Pivots a few standard errors either side of the middle of the sample
+        margin = 3 * math.isqrt(len(sample)) + 1
+        low_index = max(lower_rank * len(sample) // count - margin, 0)
+        high_index = min(upper_rank * len(sample) // count + margin, len(sample) - 1)
+        low = sample[low_index] if low_index else -math.inf
+        high = sample[high_index] if high_index < len(sample) - 1 else math.inf
+        below, ordered = _window(chunks, low, high)
+        if not below <= lower_rank or upper_rank >= below + len(ordered):
+            # The sample was unrepresentative; take the whole side that was missed
+            if lower_rank < below:
+                low = -math.inf
+            if upper_rank >= below + len(ordered):
+                high = math.inf
+            below, ordered = _window(chunks, low, high)
+        ordered.sort()
+
+    lower, upper = ordered[lower_rank - below], ordered[upper_rank - below]
+    if lower_rank == upper_rank:
+        return lower, count
+    middle = (lower + upper) / 2
+    if math.isinf(middle) and math.isfinite(lower) and math.isfinite(upper):
+        # The sum overflowed; halving first cannot, and only loses bits of subnormals
+        middle = lower / 2 + upper / 2
+    return middle, count
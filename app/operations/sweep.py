@@ -0,0 +1,161 @@
+# app/operations/sweep.py
+
+"""
+Module: sweep.py
+
+Parameter sweeps: evaluating one compiled expression at many points.
+
+Every variable of the expression is given a list of values. In "product" mode
+the points are the Cartesian product of the lists, in itertools.product order
+over the variables in alphabetical order (the last variable changes fastest).
+In "zip" mode the lists are read row by row, so they must have the same
+length; a single value is repeated on every row.
+
+Points are produced in blocks of FORMULA_SWEEP_BLOCK_SIZE as one column per
+variable and evaluated with CompiledExpression.evaluate_columns, one vectorized
+kernel call per operator per block. Only one block is held at a time, so a
+sweep can be streamed without materializing every point.
+
+Functions:
+- parameter_range(start, stop, step=None, num=None) -> array
+- range_length(start, stop, step=None, num=None) -> int
+"""
+
+import math
+from array import array
+from itertools import islice, product
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.operations import Number
+
+settings = get_settings()
+
+SWEEP_MODES = ("product", "zip")
+
+
+def range_length(start: float, stop: float, step: Optional[float] = None, num: Optional[int] = None) -> int:
+    """
+    Number of values parameter_range would produce, without producing them.
+
+    Example:
+    >>> range_length(0, 1, step=0.25), range_length(0, 1, num=5), range_length(1, 0, step=0.5)
+    (4, 5, 0)
+
+    Raises:
+    - ValueError: If a step range would have more than FORMULA_SWEEP_MAX_POINTS values.
+    """
+    if num is not None:
+        return num
+    # Checked before ceil: the quotient can be infinite (a tiny step, or a
+    # span that overflows), and ceil would raise OverflowError
+    quotient = (stop - start) / step
+    if quotient <= 0:
+        return 0
+    if quotient > settings.FORMULA_SWEEP_MAX_POINTS:
+        raise ValueError(f"A range is limited to {settings.FORMULA_SWEEP_MAX_POINTS} values")
+    return math.ceil(quotient)
+
+
+def parameter_range(start: float, stop: float, step: Optional[float] = None, num: Optional[int] = None) -> array:
+    """
+    Evenly spaced values: from start up to but excluding stop in increments of
+    step (like range), or num values from start to stop inclusive (like
+    numpy.linspace). Values are computed as start + i * increment rather than
+    by repeated addition, so rounding errors do not accumulate.
+
+    Example:
+    >>> parameter_range(0, 1, step=0.25).tolist()
+    [0.0, 0.25, 0.5, 0.75]
+    >>> parameter_range(0, 1, num=3).tolist()
+    [0.0, 0.5, 1.0]
+    """
+    if num is not None:
+        if num == 1:
+            return array("d", [start])
+        increment = (stop - start) / (num - 1)
+        values = array("d", (start + i * increment for i in range(num)))
+        values[-1] = stop
+        return values
+    return array("d", (start + i * step for i in range(range_length(start, stop, step))))
+
+
+class Sweep:
+    """
+    A checked parameter sweep of a compiled expression.
+
+    Attributes:
+    - variables (tuple of str): The expression's variables, in column order.
+    - points (int): Number of points the sweep evaluates.
+    """
+
+    def __init__(self, compiled, parameters: Dict[str, Sequence[Number]], mode: str = "product"):
+        """
+        Raises:
+        - ValueError: If a variable has no values or parameters that are not
+          variables are given, the mode is unknown, zipped lists differ in
+          length, or there are more than FORMULA_SWEEP_MAX_POINTS points.
+        """
+        if mode not in SWEEP_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(SWEEP_MODES)}")
+        missing = [name for name in compiled.variables if name not in parameters]
+        if missing:
+            raise ValueError(f"No values given for: {', '.join(missing)}")
+        unknown = sorted(set(parameters) - set(compiled.variables))
+        if unknown:
+            raise ValueError(f"Not variables of the formula: {', '.join(unknown)}")
+        empty = [name for name in compiled.variables if not len(parameters[name])]
+        if empty:
+            raise ValueError(f"No values given for: {', '.join(empty)}")
+
+        self.compiled = compiled
+        self.variables = compiled.variables
+        self.mode = mode
+        self._values = [parameters[name] for name in self.variables]
+        lengths = [len(values) for values in self._values]
+        if mode == "product":
+            self.points = math.prod(lengths)
+        else:
+            rows = {length for length in lengths if length != 1}
+            if len(rows) > 1:
+                raise ValueError("Zipped parameters must have the same number of values (or just one)")
+            self.points = rows.pop() if rows else 1
+        if self.points > settings.FORMULA_SWEEP_MAX_POINTS:
+            raise ValueError(
+                f"A sweep is limited to {settings.FORMULA_SWEEP_MAX_POINTS} points, this one has {self.points}"
+            )
+
+    def _column_blocks(self, block_size: int) -> Iterator[Tuple[List[Sequence[Number]], int]]:
+        if not self.variables:
+            yield [], 1
+            return
+        if self.mode == "product":
+            points = product(*self._values)
+            while True:
+                rows = list(islice(points, block_size))
+                if not rows:
+                    return
+                yield [array("d", column) for column in zip(*rows)], len(rows)
+        for start in range(0, self.points, block_size):
+            size = min(block_size, self.points - start)
+            yield [
+                array("d", values) * size if len(values) == 1 else array("d", values[start:start + size])
+                for values in self._values
+            ], size
+
+    def blocks(self, block_size: Optional[int] = None) -> Iterator[Tuple[List[Sequence[Number]], array]]:
+        """
+        Evaluate the sweep block by block.
+
+        Yields:
+        - (columns, results): One column of values per variable and the
+          results at those points, NaN where the expression is undefined.
+
+        Example:
+        >>> from app.operations.expression import compile_expression
+        >>> sweep = Sweep(compile_expression("a * b"), {"a": [1, 2], "b": [10, 20, 30]})
+        >>> [results.tolist() for _, results in sweep.blocks(block_size=4)]
+        [[10.0, 20.0, 30.0, 20.0], [40.0, 60.0]]
+        """
+        for columns, size in self._column_blocks(block_size or settings.FORMULA_SWEEP_BLOCK_SIZE):
+            yield columns, self.compiled.evaluate_columns(columns, size)
@@ -0,0 +1,202 @@
+# app/operations/vectorized.py
+
+"""
+Module: vectorized.py
+
+Array-aware versions of the arithmetic functions in app.operations, for batch
+work over many pairs of numbers at once.
+
+Each function accepts plain numbers, NumPy arrays, Python buffers (such as
+array('d') or a float64 memoryview) or any iterable of numbers, and broadcasts
+its operands: a number or a length-1 operand is combined with every element of
+the other operand, and otherwise the lengths must match.
+
+- Two plain numbers take the scalar fast path and return a number, exactly as
+  app.operations does.
+- If either operand is a NumPy array the result is a NumPy array, with NumPy's
+  full broadcasting rules.
+- Otherwise the result is an array('d'). It is computed with NumPy when NumPy
+  is installed and with C-level map() over the operands when it is not.
+  requirements.txt installs NumPy; the code still runs without it, and the
+  tests run both paths.
+
+divide checks every divisor before dividing and raises ZeroDivisorError, a
+ValueError that lists the indices of the zero divisors.
+"""
+
+import operator
+from array import array
+from itertools import repeat
+from numbers import Real
+from typing import Any, Callable, Iterable, List, Union
+
+from app.operations import Number, add as scalar_add, divide as scalar_divide
+from app.operations import multiply as scalar_multiply, subtract as scalar_subtract
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+# Anything the functions in this module accept as an operand
+ArrayLike = Union[Number, Iterable[Number], memoryview, array, Any]
+
+# Cap on the indices spelled out in a ZeroDivisorError message
+_MAX_REPORTED_INDICES = 10
+
+
+class ZeroDivisorError(ValueError):
+    """
+    Raised by divide when divisors are zero.
+
+    Attributes:
+    - indices (list of int): Positions of the zero divisors in the broadcast
+      result (flat positions for multi-dimensional NumPy arrays).
+    """
+
+    def __init__(self, indices: List[int]):
+        self.indices = indices
+        shown = ", ".join(str(i) for i in indices[:_MAX_REPORTED_INDICES])
+        more = f" and {len(indices) - _MAX_REPORTED_INDICES} more" if len(indices) > _MAX_REPORTED_INDICES else ""
+        super().__init__(f"Cannot divide by zero! Zero divisors at indices [{shown}]{more}.")
+
+
+def _is_scalar(value: Any) -> bool:
+    # Covers int, float and NumPy scalar types
+    return isinstance(value, Real)
+
+
+def _is_ndarray(value: Any) -> bool:
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def _as_vector(value: Any):
+    """A sized sequence of floats for a non-scalar operand, without copying buffers."""
+    if isinstance(value, (str, bytes, bytearray)):
+        raise TypeError(f"Expected numbers, got {type(value).__name__}")
+    if isinstance(value, (array, memoryview, list, tuple)):
+        return value
+    return array("d", value)
+
+
+def _broadcast_length(a, b) -> int:
+    if len(a) == len(b) or len(b) == 1:
+        return len(a)
+    if len(a) == 1:
+        return len(b)
+    raise ValueError(f"operands could not be broadcast together with lengths {len(a)} and {len(b)}")
+
+
+def _numpy_operand(value: Any):
+    if _is_scalar(value) or _is_ndarray(value):
+        return value
+    if isinstance(value, (array, memoryview)) and memoryview(value).format == "d":
+        # Zero-copy view of the buffer
+        return np.frombuffer(value, dtype=np.float64)
+    return np.asarray(_as_vector(value), dtype=np.float64)
+
+
+def _apply(a: ArrayLike, b: ArrayLike, ufunc_name: str, op: Callable, divisor_check: bool = False):
+    if np is not None:
+        x, y = _numpy_operand(a), _numpy_operand(b)
+        shape = np.broadcast_shapes(np.shape(x), np.shape(y))
+        if divisor_check:
+            zeros = np.flatnonzero(np.broadcast_to(y, shape) == 0)
+            if zeros.size:
+                raise ZeroDivisorError(zeros.tolist())
+        result = getattr(np, ufunc_name)(x, y, dtype=np.float64)
+        if _is_ndarray(a) or _is_ndarray(b):
+            return result
+        out = array("d")
+        out.frombytes(np.ascontiguousarray(result).ravel().tobytes())
+        return out
+
+    # Pure-Python path: map() runs the loop in C, and repeat() broadcasts
+    if _is_scalar(a):
+        y = _as_vector(b)
+        if divisor_check:
+            _check_divisors(y, len(y))
+        return array("d", map(op, repeat(a), y))
+    x = _as_vector(a)
+    if _is_scalar(b):
+        if divisor_check and b == 0:
+            raise ZeroDivisorError(list(range(len(x))))
+        return array("d", map(op, x, repeat(b)))
+    y = _as_vector(b)
+    length = _broadcast_length(x, y)
+    if divisor_check:
+        _check_divisors(y, length)
+    if len(x) == 1 and length != 1:
+        return array("d", map(op, repeat(x[0]), y))
+    if len(y) == 1 and length != 1:
+        return array("d", map(op, x, repeat(y[0])))
+    return array("d", map(op, x, y))
+
+
+def _check_divisors(divisors, length: int) -> None:
+    # `in` scans in C; only collect indices when there is something to report
+    if 0 in divisors:
+        if len(divisors) == 1:
+            raise ZeroDivisorError(list(range(length)))
+        raise ZeroDivisorError([i for i, value in enumerate(divisors) if value == 0])
+
+
+def add(a: ArrayLike, b: ArrayLike):
+    """
+    Element-wise sum of a and b.
+
+    Example:
+    >>> list(add([1, 2, 3], 10))
+    [11.0, 12.0, 13.0]
+    >>> add(2, 3)
+    5
+    """
+    if _is_scalar(a) and _is_scalar(b):
+        return scalar_add(a, b)
+    return _apply(a, b, "add", operator.add)
+
+
+def subtract(a: ArrayLike, b: ArrayLike):
+    """
+    Element-wise difference a - b.
+
+    Example:
+    >>> list(subtract([5, 6], [1, 2]))
+    [4.0, 4.0]
+    """
+    if _is_scalar(a) and _is_scalar(b):
+        return scalar_subtract(a, b)
+    return _apply(a, b, "subtract", operator.sub)
+
+
+def multiply(a: ArrayLike, b: ArrayLike):
+    """
+    Element-wise product of a and b.
+
+    Example:
+    >>> list(multiply([1.5, 2], [2]))
+    [3.0, 4.0]
+    """
+    if _is_scalar(a) and _is_scalar(b):
+        return scalar_multiply(a, b)
+    return _apply(a, b, "multiply", operator.mul)
+
+
+def divide(a: ArrayLike, b: ArrayLike):
+    """
+    Element-wise quotient a / b.
+
+    Raises:
+    - ZeroDivisorError: If any divisor is zero; no division is performed.
+
+    Example:
+    >>> list(divide([6, 5], [3, 2]))
+    [2.0, 2.5]
+    >>> divide([1, 2, 3], [1, 0, 0])
+    Traceback (most recent call last):
+        ...
+    app.operations.vectorized.ZeroDivisorError: Cannot divide by zero! Zero divisors at indices [1, 2].
+    """
+    if _is_scalar(a) and _is_scalar(b):
+        return scalar_divide(a, b)
+    return _apply(a, b, "divide", operator.truediv, divisor_check=True)
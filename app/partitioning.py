@@ -0,0 +1,213 @@
+# app/partitioning.py
+"""
+Optional partitioned layout for the calculations table.
+
+Controlled by CALCULATIONS_PARTITIONING:
+  - "none":  a plain table (default).
+  - "range": monthly range partitions on created_at, named calculations_yYYYYmMM,
+             plus a calculations_default catch-all. Future partitions are created
+             ahead of time and old ones are detached and dropped for retention
+             instead of running a mass DELETE.
+  - "hash":  CALCULATIONS_HASH_PARTITIONS hash partitions on user_id, so every
+             per-user query touches a single partition.
+
+Postgres requires the partition key to be part of the primary key, so in the
+partitioned layouts the table's primary key becomes (id, <partition key>). The
+ORM keeps identifying rows by id alone.
+
+Under range partitioning the out-of-row input chunks (calculation_input_chunks)
+are range-partitioned the same way, on a copy of their calculation's
+created_at, so retention drops a month of chunks with the month of
+calculations instead of deleting them row by row.
+
+Usage (e.g. from cron):
+    python -m app.partitioning
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.ids import uuid7_datetime
+
+settings = get_settings()
+
+TABLE = "calculations"
+CHUNK_TABLE = "calculation_input_chunks"
+# Tables with monthly range partitions under the "range" layout
+RANGE_TABLES = (TABLE, CHUNK_TABLE)
+
+# Slack allowed between the timestamp embedded in a UUIDv7 id and the row's
+# created_at; both are generated on the same flush, normally microseconds apart.
+ID_TIMESTAMP_SLACK = timedelta(minutes=5)
+
+
+def partition_key() -> Optional[str]:
+    """Column the calculations table is partitioned on, if any."""
+    return {"range": "created_at", "hash": "user_id"}.get(settings.CALCULATIONS_PARTITIONING)
+
+
+def is_partition_key(column: str) -> bool:
+    """Whether column must join id in the primary key under the configured layout."""
+    return partition_key() == column
+
+
+def calculations_table_args() -> dict:
+    """__table_args__ for the calculations table under the configured layout."""
+    key = partition_key()
+    if key is None:
+        return {}
+    method = settings.CALCULATIONS_PARTITIONING.upper()
+    return {"postgresql_partition_by": f"{method} ({key})"}
+
+
+def chunk_table_args() -> dict:
+    """__table_args__ for calculation_input_chunks under the configured layout."""
+    if settings.CALCULATIONS_PARTITIONING != "range":
+        return {}
+    return {"postgresql_partition_by": "RANGE (created_at)"}
+
+
+def is_chunk_partition_key(column: str) -> bool:
+    """Whether column must join the primary key of calculation_input_chunks."""
+    return settings.CALCULATIONS_PARTITIONING == "range" and column == "created_at"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _range_partition_name(month: date, table: str = TABLE) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _range_partition_month(name: str, table: str) -> Optional[date]:
+    match = re.match(rf"^{table}_y(\d{{4}})m(\d{{2}})$", name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def ensure_partitions(conn, today: Optional[date] = None) -> List[str]:
+    """
+    Create any missing partitions. For range partitioning this covers the
+    current month and CALCULATIONS_PARTITIONS_AHEAD months ahead.
+
+    Returns:
+        List[str]: Names of the partitions that were created
+    """
+    layout = settings.CALCULATIONS_PARTITIONING
+    if layout == "none":
+        return []
+
+    existing = set(list_partitions(conn))
+    created = []
+    if layout == "hash":
+        modulus = settings.CALCULATIONS_HASH_PARTITIONS
+        for remainder in range(modulus):
+            name = f"{TABLE}_p{remainder}"
+            if name not in existing:
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                    f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})"
+                ))
+                created.append(name)
+        return created
+
+    first = _month_start(today or datetime.utcnow().date())
+    for table in RANGE_TABLES:
+        existing = set(list_partitions(conn, table))
+        for offset in range(settings.CALCULATIONS_PARTITIONS_AHEAD + 1):
+            start = _add_months(first, offset)
+            name = _range_partition_name(start, table)
+            if name not in existing:
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+                ))
+                created.append(name)
+        default_name = f"{table}_default"
+        if default_name not in existing:
+            conn.execute(text(f"CREATE TABLE {default_name} PARTITION OF {table} DEFAULT"))
+            created.append(default_name)
+    return created
+
+
+def list_partitions(conn, table: str = TABLE) -> List[str]:
+    """Names of the partitions currently attached to a table (calculations by default)."""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table"
+    ), {"table": table})
+    return [row[0] for row in rows]
+
+
+def drop_expired_partitions(conn, retention_months: int, today: Optional[date] = None) -> List[str]:
+    """
+    Detach and drop range partitions that lie entirely before the retention
+    window, of the calculations and of their input chunks, which share the
+    same months. This is a metadata operation per partition, unlike a DELETE
+    of the same rows.
+
+    Returns:
+        List[str]: Names of the partitions that were dropped
+    """
+    if settings.CALCULATIONS_PARTITIONING != "range":
+        return []
+    cutoff = _add_months(_month_start(today or datetime.utcnow().date()), -retention_months)
+    dropped = []
+    for table in RANGE_TABLES:
+        for name in sorted(list_partitions(conn, table)):
+            start = _range_partition_month(name, table)
+            if start is not None and _add_months(start, 1) <= cutoff:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+    return dropped
+
+
+def maintain_partitions(engine, today: Optional[date] = None) -> dict:
+    """Create upcoming partitions and apply the retention policy in one transaction."""
+    if settings.CALCULATIONS_PARTITIONING == "none":
+        return {"created": [], "dropped": []}
+    with engine.begin() as conn:
+        created = ensure_partitions(conn, today)
+        dropped = []
+        if settings.CALCULATIONS_RETENTION_MONTHS:
+            dropped = drop_expired_partitions(conn, settings.CALCULATIONS_RETENTION_MONTHS, today)
+    return {"created": created, "dropped": dropped}
+
+
+def pruning_criteria(model, calc_id: UUID) -> list:
+    """
+    Extra filter clauses that let Postgres prune to one partition when looking
+    up a calculation by id.
+
+    Under range partitioning the UUIDv7 id carries its creation time, which
+    bounds created_at; older uuid4 ids cannot be bounded and scan all partitions.
+    Hash partitioning prunes on the user_id filter the callers already apply.
+    """
+    if settings.CALCULATIONS_PARTITIONING != "range":
+        return []
+    created = uuid7_datetime(calc_id)
+    if created is None:
+        return []
+    return [
+        model.created_at >= created - ID_TIMESTAMP_SLACK,
+        model.created_at < created + ID_TIMESTAMP_SLACK,
+    ]
+
+
+if __name__ == "__main__":
+    from app.database import engine  # pragma: no cover
+    print(maintain_partitions(engine))  # pragma: no cover
@@ -0,0 +1,91 @@
+# app/projection.py
+"""
+Sparse fieldsets for calculation reads.
+
+GET /calculations and GET /calculations/{calc_id} accept fields=id,type,result.
+Only the requested columns are selected, and rows are turned into plain dicts
+without building ORM entities or running the CalculationResponse validators.
+"""
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from app.models.calculation import Calculation
+from app.models.input_store import read_chunks
+
+CALCULATION_FIELDS = (
+    "id", "user_id", "type", "inputs", "expression", "references", "result", "created_at", "updated_at"
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated fields parameter.
+
+    Returns:
+        None when no projection was requested, otherwise the requested field
+        names in the canonical response order.
+
+    Raises:
+        ValueError: If a field name is not part of CalculationResponse
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(CALCULATION_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Allowed: {', '.join(CALCULATION_FIELDS)}"
+        )
+    if not requested:
+        raise ValueError("fields must name at least one field")
+    return [name for name in CALCULATION_FIELDS if name in requested]
+
+
+def projected_columns(fields: List[str], extra: Sequence = ()) -> list:
+    """Columns to select for the requested fields, plus any extra columns."""
+    columns = []
+    for name in fields:
+        if name == "inputs":
+            columns += [Calculation.inline_inputs, Calculation.inputs_external]
+        elif name == "references":
+            columns.append(Calculation.input_references)
+        else:
+            columns.append(getattr(Calculation, name))
+    # Out-of-row inputs are looked up by id
+    if "inputs" in fields and "id" not in fields:
+        columns.append(Calculation.id)
+    for column in extra:
+        if column.key not in fields:
+            columns.append(column)
+    return columns
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, array):
+        return value.tolist()
+    return value
+
+
+def project_row(row, fields: List[str], db) -> Dict[str, Any]:
+    """Build the response dict for one projected row."""
+    mapping = row._mapping
+    item = {}
+    for name in fields:
+        if name == "inputs":
+            if mapping["inputs_external"]:
+                value = read_chunks(db.connection(), mapping["id"])
+            else:
+                value = mapping["inline_inputs"]
+        elif name == "references":
+            value = mapping["input_references"]
+        else:
+            value = mapping[name]
+        item[name] = _jsonable(value)
+    return item
@@ -0,0 +1,90 @@
+# app/provision_users.py
+"""
+Bulk user provisioning shared by the admin API and the command line.
+
+Usage:
+    python -m app.provision_users users.csv [--batch-size 5000]
+    python -m app.provision_users users.json
+
+CSV files need a header row with first_name, last_name, email, username and
+password columns; JSON files hold a list of objects with the same keys.
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import Any, Dict, List
+
+from pydantic import ValidationError
+
+from app.models.user import User
+from app.schemas.user import UserProvision
+
+
+def provision_users(db, rows: List[Dict[str, Any]]) -> dict:
+    """
+    Validate rows and create the valid ones with User.bulk_register.
+
+    The caller owns the transaction and must commit.
+    """
+    failed = []
+    valid_rows = []
+    valid_indexes = []
+    for index, row in enumerate(rows):
+        try:
+            user = UserProvision.model_validate(row)
+        except ValidationError as e:
+            failed.append({
+                "index": index,
+                "username": row.get("username") if isinstance(row, dict) else None,
+                "email": row.get("email") if isinstance(row, dict) else None,
+                "error": "; ".join(err["msg"] for err in e.errors()),
+            })
+            continue
+        valid_rows.append(user.model_dump())
+        valid_indexes.append(index)
+
+    report = User.bulk_register(db, valid_rows)
+    # Map indexes back to positions in the original request
+    for key in ("created", "duplicates", "failed"):
+        for entry in report[key]:
+            entry["index"] = valid_indexes[entry["index"]]
+    report["failed"] = sorted(failed + report["failed"], key=lambda entry: entry["index"])
+    return report
+
+
+def _load_rows(path: str) -> List[Dict[str, Any]]:
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def main(argv=None) -> int:  # pragma: no cover
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk-provision user accounts.")
+    parser.add_argument("path", help="CSV or JSON file of users")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT statement")
+    args = parser.parse_args(argv)
+
+    rows = _load_rows(args.path)
+    totals = {"created": 0, "duplicates": 0, "failed": 0}
+    db = SessionLocal()
+    try:
+        for start in range(0, len(rows), args.batch_size):
+            report = provision_users(db, rows[start:start + args.batch_size])
+            db.commit()
+            for key in totals:
+                totals[key] += len(report[key])
+            for entry in report["failed"]:
+                print(f"row {start + entry['index']}: {entry['error']}", file=sys.stderr)
+    finally:
+        db.close()
+    print(json.dumps(totals))
+    return 0 if totals["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main()) # pragma: no cover
@@ -5,7 +5,13 @@ from .user import (
     UserResponse,
     UserLogin,
     UserUpdate,
-    PasswordUpdate
+    PasswordUpdate,
+    UserProvision,
+    BulkUserProvision,
+    BulkUserRow,
+    BulkUserProvisionResponse,
+    BulkUserDelete,
+    BulkUserDeleteResponse
 )
 
 from .token import Token, TokenData, TokenResponse
@@ -14,7 +20,25 @@ from .calculation import (
     CalculationBase,
     CalculationCreate,
     CalculationUpdate,
-    CalculationResponse
+    CalculationResponse,
+    CalculationSort,
+    CalculationFilters,
+    CalculationSummary,
+    CalculationTypeStats,
+    CalculationDayStats,
+    CalculationStats,
+    CalculationUploadCreate,
+    CalculationUploadResponse,
+    CalculationUploadFinalize,
+    CalculationUploadResult,
+    ResultMemoStats
+)
+from .formula import (
+    FormulaCreate,
+    FormulaResponse,
+    ParameterRange,
+    SweepMode,
+    FormulaSweep
 )
 
 __all__ = [
@@ -24,6 +48,12 @@ __all__ = [
     'UserLogin',
     'UserUpdate',
     'PasswordUpdate',
+    'UserProvision',
+    'BulkUserProvision',
+    'BulkUserRow',
+    'BulkUserProvisionResponse',
+    'BulkUserDelete',
+    'BulkUserDeleteResponse',
     'Token',
     'TokenData',
     'TokenResponse',
@@ -32,4 +62,20 @@ __all__ = [
     'CalculationCreate',
     'CalculationUpdate',
     'CalculationResponse',
+    'CalculationSort',
+    'CalculationFilters',
+    'CalculationSummary',
+    'CalculationTypeStats',
+    'CalculationDayStats',
+    'CalculationStats',
+    'CalculationUploadCreate',
+    'CalculationUploadResponse',
+    'CalculationUploadFinalize',
+    'CalculationUploadResult',
+    'ResultMemoStats',
+    'FormulaCreate',
+    'FormulaResponse',
+    'ParameterRange',
+    'SweepMode',
+    'FormulaSweep',
 ]
\ No newline at end of file
@@ -1,33 +1,71 @@
+import math
+from array import array
 from enum import Enum
 from pydantic import BaseModel, Field, ConfigDict, model_validator, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime, timezone
 
-class CalculationType(str, Enum):
-    """Valid calculation types"""
-    ADDITION = "addition"
-    SUBTRACTION = "subtraction"
-    MULTIPLICATION = "multiplication"
-    DIVISION = "division"
+from app.core.config import get_settings
+from app.operations.registry import count_phrase, get_operation, operation_names, operations
+
+settings = get_settings()
+
+# Valid calculation types, one member per registered operation
+CalculationType = Enum(
+    "CalculationType",
+    {name.upper(): name for name in operation_names()},
+    type=str,
+    module=__name__,
+)
+CalculationType.__doc__ = "Valid calculation types"
+
+# Fewest inputs any calculation type accepts; each type checks its own minimum
+MIN_INPUTS = min(operation.min_inputs for operation in operations())
+
+class CalculationSort(str, Enum):
+    """Supported orderings for the calculation list"""
+    CREATED_AT = "created_at"
+    CREATED_AT_DESC = "-created_at"
+    RESULT = "result"
+    RESULT_DESC = "-result"
 
 class CalculationBase(BaseModel):
     type: CalculationType = Field(
         ...,
-        description="Type of calculation (addition, subtraction, multiplication, division)",
+        description=f"Type of calculation ({', '.join(operation_names())})",
         example="addition"
     )
     inputs: List[float] = Field(
         ...,
         description="List of numeric inputs for the calculation",
         example=[10.5, 3, 2],
-        min_items=2
+        min_items=MIN_INPUTS
+    )
+    expression: Optional[str] = Field(
+        None,
+        description=(
+            "Arithmetic expression for expression calculations, using + - * /, "
+            "parentheses, numbers and calls to other calculation types such as "
+            "median(a, b, c); its variables take the inputs in alphabetical order"
+        ),
+        example="(a + b) * c / d",
+        max_length=settings.CALCULATIONS_EXPRESSION_MAX_LENGTH
+    )
+    references: Optional[Dict[int, UUID]] = Field(
+        None,
+        description=(
+            "Input positions (from 0) that take the result of another of your "
+            "calculations instead of the value given there; they are recomputed "
+            "whenever that calculation is updated"
+        ),
+        example={"1": "123e4567-e89b-12d3-a456-426614174999"}
     )
 
     @field_validator("type", mode="before")
     @classmethod
     def validate_type(cls, v):
-        allowed = {e.value for e in CalculationType}
+        allowed = operation_names()
         # Ensure v is a string and check (in lowercase) if it's allowed.
         if not isinstance(v, str) or v.lower() not in allowed:
             raise ValueError(f"Type must be one of: {', '.join(sorted(allowed))}")
@@ -36,19 +74,21 @@ class CalculationBase(BaseModel):
     @field_validator("inputs", mode="before")
     @classmethod
     def check_inputs_is_list(cls, v):
+        # Inputs read back from packed float64 storage arrive as array('d')
+        if isinstance(v, array):
+            return v.tolist()
         if not isinstance(v, list):
             raise ValueError("Input should be a valid list")
         return v
 
     @model_validator(mode='after')
     def validate_inputs(self) -> "CalculationBase":
-        """Validate inputs based on calculation type"""
-        if len(self.inputs) < 2:
-            raise ValueError("At least two numbers are required for calculation")
-        if self.type == CalculationType.DIVISION:
-            # Prevent division by zero (skip the first value as numerator)
-            if any(x == 0 for x in self.inputs[1:]):
-                raise ValueError("Cannot divide by zero")
+        """Validate inputs (and expression) based on calculation type"""
+        if self.references:
+            check_reference_positions(self.references, len(self.inputs))
+            # The type's rules apply once the referenced results are filled in
+            return self
+        get_operation(self.type.value).validate(self.inputs, self.expression)
         return self
 
     model_config = ConfigDict(
@@ -56,11 +96,42 @@ class CalculationBase(BaseModel):
         json_schema_extra={
             "examples": [
                 {"type": "addition", "inputs": [10.5, 3, 2]},
-                {"type": "division", "inputs": [100, 2]}
+                {"type": "division", "inputs": [100, 2]},
+                {"type": "expression", "inputs": [1, 2, 3, 4], "expression": "(a + b) * c / d"}
             ]
         }
     )
 
+def check_reference_positions(references: Dict[int, UUID], input_count: int) -> None:
+    """
+    Raises:
+        ValueError: If a referenced position is not a position of the inputs
+    """
+    for position in references:
+        if not 0 <= position < input_count:
+            raise ValueError(f"Reference position {position} is outside the inputs")
+
+def validate_raw_inputs(calculation_type: Optional[str], inputs) -> str:
+    """
+    Apply the CalculationBase rules to a packed float64 input vector without
+    converting it to a list.
+
+    Returns:
+        The normalized calculation type
+
+    Raises:
+        ValueError: If the type or inputs are invalid
+    """
+    allowed = operation_names()
+    if not calculation_type or calculation_type.lower() not in allowed:
+        raise ValueError(f"Type must be one of: {', '.join(sorted(allowed))}")
+    calculation_type = calculation_type.lower()
+    # JSON bodies cannot carry NaN or infinities; keep binary bodies to the same domain
+    if not all(map(math.isfinite, inputs)):
+        raise ValueError("Inputs must be finite numbers")
+    get_operation(calculation_type).validate(inputs)
+    return calculation_type
+
 class CalculationCreate(CalculationBase):
     """Schema for creating a new Calculation"""
     user_id: UUID = Field(
@@ -85,14 +156,22 @@ class CalculationUpdate(BaseModel):
         None,
         description="Updated list of numeric inputs for the calculation",
         example=[42, 7],
-        min_items=2
+        min_items=MIN_INPUTS
+    )
+    references: Optional[Dict[int, UUID]] = Field(
+        None,
+        description="Replacement input references; {} removes them all"
     )
 
     @model_validator(mode='after')
     def validate_inputs(self) -> "CalculationUpdate":
-        """Validate the inputs if they are being updated"""
-        if self.inputs is not None and len(self.inputs) < 2:
-            raise ValueError("At least two numbers are required for calculation")
+        """
+        Validate the inputs if they are being updated; the rules of the
+        calculation's own type are checked against it by the endpoint.
+        """
+        if self.inputs is not None and len(self.inputs) < MIN_INPUTS:
+            verb = "is" if MIN_INPUTS == 1 else "are"
+            raise ValueError(f"At least {count_phrase(MIN_INPUTS)} {verb} required for calculation")
         return self
 
     model_config = ConfigDict(
@@ -134,3 +213,124 @@ class CalculationResponse(CalculationBase):
             }
         }
     )
+
+
+class CalculationFilters(BaseModel):
+    """Query parameters for filtering and sorting the calculation list"""
+    type: Optional[CalculationType] = Field(None, description="Only calculations of this type")
+    created_after: Optional[datetime] = Field(None, description="Created at or after this time (UTC)")
+    created_before: Optional[datetime] = Field(None, description="Created before this time (UTC)")
+    result_min: Optional[float] = Field(None, description="Minimum result (inclusive)")
+    result_max: Optional[float] = Field(None, description="Maximum result (inclusive)")
+    sort: Optional[CalculationSort] = Field(
+        None,
+        description="Order by created_at or result; prefix with '-' for descending"
+    )
+
+    @field_validator("created_after", "created_before")
+    @classmethod
+    def to_naive_utc(cls, v):
+        # created_at is stored as naive UTC
+        if v is not None and v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+    @model_validator(mode='after')
+    def validate_ranges(self) -> "CalculationFilters":
+        """Reject empty ranges"""
+        if self.created_after and self.created_before and self.created_after >= self.created_before:
+            raise ValueError("created_after must be earlier than created_before")
+        if self.result_min is not None and self.result_max is not None and self.result_min > self.result_max:
+            raise ValueError("result_min must not exceed result_max")
+        return self
+
+    model_config = ConfigDict(use_enum_values=True)
+
+
+class CalculationSummary(BaseModel):
+    """Aggregate figures over a set of calculations"""
+    count: int = Field(..., description="Number of calculations")
+    sum: Optional[float] = Field(None, description="Sum of results")
+    min: Optional[float] = Field(None, description="Smallest result")
+    max: Optional[float] = Field(None, description="Largest result")
+    avg: Optional[float] = Field(None, description="Average result")
+
+class CalculationTypeStats(CalculationSummary):
+    """Aggregate figures for one calculation type"""
+    type: str = Field(..., description="Calculation type")
+
+class CalculationDayStats(BaseModel):
+    """Number of calculations created on one day (UTC)"""
+    day: date
+    count: int
+
+class CalculationStats(BaseModel):
+    """Per-user calculation statistics"""
+    overall: CalculationSummary
+    by_type: List[CalculationTypeStats]
+    by_day: List[CalculationDayStats]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "overall": {"count": 3, "sum": 48.5, "min": 3.0, "max": 30.0, "avg": 16.17},
+                "by_type": [
+                    {"type": "addition", "count": 2, "sum": 45.5, "min": 15.5, "max": 30.0, "avg": 22.75},
+                    {"type": "division", "count": 1, "sum": 3.0, "min": 3.0, "max": 3.0, "avg": 3.0}
+                ],
+                "by_day": [{"day": "2025-01-01", "count": 3}]
+            }
+        }
+    )
+
+
+class CalculationUploadCreate(BaseModel):
+    """Schema for starting a chunked upload of calculation inputs"""
+    type: CalculationType = Field(..., description="Type of the calculation being uploaded")
+
+    @field_validator("type", mode="before")
+    @classmethod
+    def validate_type(cls, v):
+        v = CalculationBase.validate_type(v)
+        if get_operation(v).compiler is not None:
+            raise ValueError(f"{v} calculations cannot be uploaded in chunks")
+        return v
+
+
+class CalculationUploadResponse(BaseModel):
+    """State of a chunked upload session"""
+    id: UUID = Field(..., description="Upload session id")
+    type: CalculationType
+    created_at: datetime
+    updated_at: datetime
+    chunks: List[int] = Field(..., description="Chunk numbers received so far")
+    values: int = Field(..., description="Number of inputs received so far")
+
+
+class CalculationUploadFinalize(BaseModel):
+    """Schema for finalizing a chunked upload"""
+    chunks: int = Field(..., ge=1, description="Total number of chunks (numbered from 0)")
+
+
+class CalculationUploadResult(BaseModel):
+    """A calculation created from a chunked upload (inputs omitted)"""
+    id: UUID
+    user_id: UUID
+    type: CalculationType
+    result: float
+    input_count: int = Field(..., description="Number of inputs")
+    created_at: datetime
+    updated_at: datetime
+
+
+class ResultMemoStats(BaseModel):
+    """Hit-rate metrics of the calculation result memo"""
+    entries: int = Field(..., description="Entries in this worker's LRU")
+    capacity: int = Field(..., description="Maximum LRU entries")
+    hits: int
+    local_hits: int = Field(..., description="Hits served from the in-process LRU")
+    redis_hits: int = Field(..., description="Hits served from the shared Redis tier")
+    misses: int
+    evictions: int = Field(..., description="Entries dropped to stay within capacity")
+    expirations: int = Field(..., description="Entries dropped after their TTL")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
@@ -0,0 +1,147 @@
+import math
+from array import array
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional, Union
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from app.core.config import get_settings
+from app.operations.expression import compile_expression
+from app.operations.sweep import parameter_range, range_length
+
+settings = get_settings()
+
+
+class FormulaBase(BaseModel):
+    name: str = Field(
+        ...,
+        description="Name of the formula, unique among the user's formulas",
+        example="margin",
+        min_length=1,
+        max_length=100
+    )
+    expression: str = Field(
+        ...,
+        description=(
+            "Arithmetic expression using + - * /, parentheses, numbers and calls "
+            "to calculation types such as median(a, b, c)"
+        ),
+        example="(price - cost) / price",
+        max_length=settings.CALCULATIONS_EXPRESSION_MAX_LENGTH
+    )
+
+
+class FormulaCreate(FormulaBase):
+    """Schema for saving a formula"""
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v):
+        v = v.strip()
+        if not v:
+            raise ValueError("Formula name must not be blank")
+        return v
+
+    @field_validator("expression")
+    @classmethod
+    def validate_expression(cls, v):
+        # Stored in canonical form, as expression calculations are
+        return compile_expression(v).source
+
+    model_config = ConfigDict(
+        json_schema_extra={"example": {"name": "margin", "expression": "(price - cost) / price"}}
+    )
+
+
+class FormulaResponse(FormulaBase):
+    """Schema for reading a saved formula"""
+    id: UUID = Field(..., description="Unique UUID of the formula")
+    user_id: UUID = Field(..., description="UUID of the user who owns this formula")
+    variables: List[str] = Field(
+        ...,
+        description="Variables of the expression, in alphabetical order",
+        example=["cost", "price"]
+    )
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ParameterRange(BaseModel):
+    """
+    Evenly spaced parameter values: from start up to but excluding stop in
+    increments of step, or num values from start to stop inclusive
+    """
+    start: float
+    stop: float
+    step: Optional[float] = Field(None, description="Increment; stop is excluded")
+    num: Optional[int] = Field(None, ge=1, description="Number of values; stop is included")
+
+    @model_validator(mode="after")
+    def validate_range(self) -> "ParameterRange":
+        if (self.step is None) == (self.num is None):
+            raise ValueError("Give exactly one of step or num")
+        if not (math.isfinite(self.start) and math.isfinite(self.stop)):
+            raise ValueError("start and stop must be finite")
+        if self.step is not None and (not math.isfinite(self.step) or self.step == 0):
+            raise ValueError("step must be a finite, non-zero number")
+        length = range_length(self.start, self.stop, self.step, self.num)
+        if not length:
+            raise ValueError("The range is empty")
+        if length > settings.FORMULA_SWEEP_MAX_POINTS:
+            raise ValueError(f"A range is limited to {settings.FORMULA_SWEEP_MAX_POINTS} values")
+        return self
+
+    def values(self) -> array:
+        return parameter_range(self.start, self.stop, self.step, self.num)
+
+
+class SweepMode(str, Enum):
+    """How parameter values are combined into points"""
+    PRODUCT = "product"
+    ZIP = "zip"
+
+
+class FormulaSweep(BaseModel):
+    """Schema for evaluating a saved formula over many parameter values"""
+    parameters: Dict[str, Union[List[float], ParameterRange]] = Field(
+        ...,
+        description="Values for every variable of the formula: a list of numbers or a range"
+    )
+    mode: SweepMode = Field(
+        SweepMode.PRODUCT,
+        description=(
+            "product: every combination of the values (the last variable changes fastest); "
+            "zip: the lists row by row, which must have equal lengths (or one value)"
+        )
+    )
+
+    @field_validator("parameters")
+    @classmethod
+    def validate_parameters(cls, v):
+        for name, values in v.items():
+            if isinstance(values, list) and not all(math.isfinite(x) for x in values):
+                raise ValueError(f"Values of {name} must be finite numbers")
+        return v
+
+    def parameter_values(self) -> Dict[str, array]:
+        """Every parameter as an array('d') of its values."""
+        return {
+            name: values.values() if isinstance(values, ParameterRange) else array("d", values)
+            for name, values in self.parameters.items()
+        }
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "parameters": {
+                    "cost": [40, 50, 60],
+                    "price": {"start": 80, "stop": 120, "step": 10}
+                },
+                "mode": "product"
+            }
+        }
+    )
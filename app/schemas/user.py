@@ -1,6 +1,6 @@
 # app/schemas/user.py
 
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator
@@ -196,3 +196,61 @@ class PasswordUpdate(BaseModel):
             }
         }
     )
+
+class UserProvision(UserBase):
+    """Schema for a single row of an admin bulk-provisioning request"""
+    password: str = Field(
+        min_length=6,
+        max_length=128,
+        example="SecurePass123!",
+        description="Initial password for the account"
+    )
+
+class BulkUserProvision(BaseModel):
+    """Schema for admin bulk user provisioning"""
+    users: List[Dict[str, Any]] = Field(
+        ...,
+        description="User rows to provision; invalid rows are reported, not rejected"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "users": [
+                    {
+                        "first_name": "John",
+                        "last_name": "Doe",
+                        "email": "john.doe@example.com",
+                        "username": "johndoe",
+                        "password": "SecurePass123!"
+                    }
+                ]
+            }
+        }
+    )
+
+class BulkUserRow(BaseModel):
+    """Outcome for one row of a bulk-provisioning request"""
+    index: int = Field(..., description="Position of the row in the request")
+    username: Optional[str] = None
+    email: Optional[str] = None
+    id: Optional[UUID] = Field(None, description="UUID of the created user")
+    error: Optional[str] = Field(None, description="Why the row failed")
+
+class BulkUserProvisionResponse(BaseModel):
+    """Schema for the bulk-provisioning report"""
+    created: List[BulkUserRow]
+    duplicates: List[BulkUserRow]
+    failed: List[BulkUserRow]
+
+class BulkUserDelete(BaseModel):
+    """Schema for admin bulk user deletion"""
+    user_ids: List[UUID] = Field(
+        ...,
+        min_length=1,
+        description="UUIDs of the users to delete, together with all their calculations"
+    )
+
+class BulkUserDeleteResponse(BaseModel):
+    """Schema for the bulk-deletion result"""
+    deleted: int = Field(..., description="Number of users deleted")
@@ -0,0 +1,49 @@
+# app/serialization.py
+"""
+Trusted-output serialization for calculation responses.
+
+Calculations read from (or just written to) our own database already satisfy
+CalculationResponse, so running its validators again (the type and inputs
+checks and the division-by-zero check) on every response is wasted work.
+calculation_payload builds the response dict straight from the ORM object and
+ORJSONResponse encodes it natively. Routes keep response_model=CalculationResponse,
+so the OpenAPI schema is unchanged.
+"""
+from array import array
+from typing import Any, Dict
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+__all__ = ["ORJSONResponse", "calculation_payload", "dumps", "loads"]
+
+
+def calculation_payload(calculation) -> Dict[str, Any]:
+    """
+    The CalculationResponse dict of a calculation, without validation.
+
+    Keys follow the field order of CalculationResponse and inputs are coerced
+    to floats, so the encoded output matches model_dump(mode="json").
+    """
+    inputs = calculation.inputs
+    return {
+        "type": calculation.type,
+        "inputs": inputs.tolist() if isinstance(inputs, (array, memoryview)) else [float(value) for value in inputs],
+        "expression": calculation.expression,
+        "references": calculation.input_references,
+        "id": calculation.id,
+        "user_id": calculation.user_id,
+        "created_at": calculation.created_at,
+        "updated_at": calculation.updated_at,
+        "result": calculation.result,
+    }
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value (UUIDs and datetimes included) as JSON bytes."""
+    return orjson.dumps(value)
+
+
+def loads(data) -> Any:
+    """Decode JSON bytes or text."""
+    return orjson.loads(data)
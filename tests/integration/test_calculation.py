@@ -150,3 +150,60 @@ def test_invalid_inputs_for_division():
     division = Division(user_id=dummy_user_id(), inputs=[10])
     with pytest.raises(ValueError, match="Inputs must be a list with at least two numbers."):
         division.get_result()
+
+def test_large_inputs_stored_out_of_row(db_session, test_user, monkeypatch):
+    """
+    Inputs above the external threshold are chunked into the input store and
+    loaded back transparently.
+    """
+    from app.models import input_store
+    from app.models.input_store import CalculationInputChunk
+
+    monkeypatch.setattr(input_store.settings, "CALCULATIONS_INPUTS_EXTERNAL_THRESHOLD", 5)
+    monkeypatch.setattr(input_store.settings, "CALCULATIONS_INPUTS_CHUNK_SIZE", 4)
+    inputs = [float(i) for i in range(11)]
+    calc = Calculation.create("addition", test_user.id, inputs)
+    calc.result = calc.get_result()
+    db_session.add(calc)
+    db_session.commit()
+    calc_id = calc.id
+
+    chunks = db_session.query(CalculationInputChunk).filter_by(calculation_id=calc_id).count()
+    assert chunks == 3
+
+    db_session.expunge_all()
+    loaded = db_session.get(Calculation, calc_id)
+    assert loaded.inputs_external is True
+    assert list(loaded.inputs) == inputs
+    assert [len(chunk) for chunk in loaded.iter_input_chunks(db_session)] == [4, 4, 3]
+
+    # Shrinking the inputs moves them back inline and removes the chunks
+    loaded.inputs = [1, 2]
+    db_session.commit()
+    assert loaded.inputs_external is False
+    assert db_session.query(CalculationInputChunk).filter_by(calculation_id=calc_id).count() == 0
+
+def test_purge_orphaned_chunks(db_session, test_user, monkeypatch):
+    """Chunks whose calculation was deleted outside the ORM are swept in batches."""
+    from datetime import datetime, timedelta
+    from sqlalchemy import delete
+    from app.models import input_store
+    from app.models.input_store import CalculationInputChunk, purge_orphaned_chunks
+
+    monkeypatch.setattr(input_store.settings, "CALCULATIONS_INPUTS_EXTERNAL_THRESHOLD", 5)
+    monkeypatch.setattr(input_store.settings, "CALCULATIONS_INPUTS_CHUNK_SIZE", 4)
+    kept, dropped = (Calculation.create("addition", test_user.id, [float(i) for i in range(11)]) for _ in range(2))
+    for calc in (kept, dropped):
+        calc.result = calc.get_result()
+        db_session.add(calc)
+    db_session.commit()
+    db_session.execute(delete(Calculation.__table__).where(Calculation.__table__.c.id == dropped.id))
+    db_session.commit()
+
+    later = datetime.utcnow() + input_store.ORPHAN_GRACE + timedelta(minutes=1)
+    # Within the grace period nothing is touched
+    assert purge_orphaned_chunks(db_session.connection()) == 0
+    assert purge_orphaned_chunks(db_session.connection(), batch_size=1, now=later) == 3
+    db_session.commit()
+    remaining = {row.calculation_id for row in db_session.query(CalculationInputChunk)}
+    assert dropped.id not in remaining and kept.id in remaining
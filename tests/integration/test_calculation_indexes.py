@@ -0,0 +1,88 @@
+# tests/integration/test_calculation_indexes.py
+"""
+EXPLAIN-based checks that every supported list filter combination is served by
+the composite index declared for it, rather than a sequential scan or the
+plain user_id index.
+"""
+import re
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.models.calculation import Calculation
+
+NOW = datetime(2025, 1, 1)
+
+USER_INDEXES = (
+    "ix_calculations_user_id",
+    "ix_calculations_user_created",
+    "ix_calculations_user_type_created",
+    "ix_calculations_user_result",
+    "ix_calculations_user_updated",
+)
+
+# Each combination with the composite index designed to serve it
+FILTER_COMBINATIONS = [
+    ({}, USER_INDEXES),
+    ({"sort": "-created_at"}, "ix_calculations_user_created"),
+    ({"type": "addition"}, "ix_calculations_user_type_created"),
+    ({"type": "addition", "sort": "created_at"}, "ix_calculations_user_type_created"),
+    ({"created_after": NOW - timedelta(days=7)}, "ix_calculations_user_created"),
+    (
+        {"created_after": NOW - timedelta(days=7), "created_before": NOW, "sort": "-created_at"},
+        "ix_calculations_user_created",
+    ),
+    (
+        {"type": "division", "created_after": NOW - timedelta(days=7), "created_before": NOW},
+        "ix_calculations_user_type_created",
+    ),
+    ({"result_min": 10}, "ix_calculations_user_result"),
+    ({"result_min": 10, "result_max": 20, "sort": "result"}, "ix_calculations_user_result"),
+    ({"type": "addition", "result_max": 5, "sort": "-result"}, "ix_calculations_user_result"),
+]
+
+def explain(db_session, query) -> str:
+    compiled = query.statement.compile(dialect=db_session.bind.dialect)
+    params = {
+        key: str(value) if isinstance(value, uuid.UUID) else value
+        for key, value in compiled.params.items()
+    }
+    rows = db_session.connection().exec_driver_sql(f"EXPLAIN {compiled}", params)
+    return "\n".join(row[0] for row in rows)
+
+def seed(db_session, user_id, count=2000):
+    """Spread rows over types, days and results, then ANALYZE for realistic estimates."""
+    types = ("addition", "subtraction", "multiplication", "division")
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "type": types[i % len(types)],
+            "inputs": [1.0, 2.0],
+            "inputs_external": False,
+            "result": float(i % 100),
+            "created_at": NOW - timedelta(days=i % 60, minutes=i),
+            "updated_at": NOW,
+        }
+        for i in range(count)
+    ]
+    db_session.execute(insert(Calculation.__table__), rows)
+    db_session.execute(text("ANALYZE calculations"))
+
+@pytest.mark.parametrize("filters, expected", FILTER_COMBINATIONS)
+def test_list_filters_use_index(db_session, test_user, filters, expected):
+    seed(db_session, test_user.id)
+    # Rule out plans that scan the table or sort afterwards, so each
+    # combination must be served by an index that also delivers its order
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    db_session.execute(text("SET LOCAL enable_sort = off"))
+    query = db_session.query(Calculation).filter(Calculation.user_id == test_user.id)
+    plan = explain(db_session, Calculation.apply_list_filters(query, **filters))
+    used = set(re.findall(r"\b(ix_calculations_\w+)\b", plan))
+    assert "Seq Scan" not in plan, plan
+    if isinstance(expected, str):
+        assert used == {expected}, plan
+    else:
+        assert used and used <= set(expected), plan
@@ -5,7 +5,8 @@ from datetime import datetime
 from app.schemas.calculation import (
     CalculationCreate,
     CalculationUpdate,
-    CalculationResponse
+    CalculationResponse,
+    validate_raw_inputs
 )
 
 def test_calculation_create_valid():
@@ -97,3 +98,18 @@ def test_calculation_response_valid():
     assert calc_response.type == "subtraction"
     assert calc_response.inputs == [20, 5]
     assert calc_response.result == 15.5
+
+def test_validate_raw_inputs():
+    """Test the CalculationBase rules applied to a float64 buffer."""
+    from array import array
+    view = memoryview(array("d", [8.0, 2.0]).tobytes()).cast("d")
+    assert validate_raw_inputs("Division", view) == "division"
+    zero = memoryview(array("d", [8.0, 0.0]).tobytes()).cast("d")
+    with pytest.raises(ValueError, match="divide by zero"):
+        validate_raw_inputs("division", zero)
+    with pytest.raises(ValueError, match="Type must be one of"):
+        validate_raw_inputs(None, view)
+    with pytest.raises(ValueError, match="At least two numbers"):
+        validate_raw_inputs("addition", view[:1])
+    with pytest.raises(ValueError, match="finite"):
+        validate_raw_inputs("addition", array("d", [1.0, float("nan")]))
@@ -1,6 +1,10 @@
+import json
+from array import array
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.models.formula import Formula
 
 client = TestClient(app)
 
@@ -331,3 +335,427 @@ def test_lifespan_startup(monkeypatch):
         client.get("/health")
     # Check that startup prints were called
     assert any("Creating tables..." in m for m in printed)
+
+def test_bulk_provision_requires_admin_key(monkeypatch):
+    from app.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "ADMIN_API_KEY", "admin-secret")
+    payload = {"users": [{
+        "first_name": "Bulk",
+        "last_name": "User",
+        "email": "bulkuser@example.com",
+        "username": "bulkuser",
+        "password": "SecurePass123!"
+    }, {"username": "x"}]}
+    response = client.post("/admin/users/bulk", json=payload)
+    assert response.status_code == 403
+
+    response = client.post("/admin/users/bulk", json=payload, headers={"X-Admin-Token": "admin-secret"})
+    assert response.status_code == 200
+    report = response.json()
+    assert len(report["created"]) + len(report["duplicates"]) == 1
+    assert report["failed"][0]["index"] == 1
+
+def _auth_headers(username: str) -> dict:
+    user = {
+        "first_name": "Field",
+        "last_name": "User",
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": "SecurePass123!",
+        "confirm_password": "SecurePass123!"
+    }
+    client.post("/auth/register", json=user)
+    login = client.post("/auth/login", json={"username": username, "password": "SecurePass123!"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+def test_calculation_sparse_fields():
+    headers = _auth_headers("fieldsuser")
+    calc_id = client.post(
+        "/calculations", json={"type": "multiplication", "inputs": [2, 3]}, headers=headers
+    ).json()["id"]
+
+    listed = client.get("/calculations?fields=id,result", headers=headers)
+    assert listed.status_code == 200
+    assert {"id": calc_id, "result": 6.0} in listed.json()
+
+    read = client.get(f"/calculations/{calc_id}?fields=type,inputs", headers=headers)
+    assert read.json() == {"type": "multiplication", "inputs": [2.0, 3.0]}
+
+    bad = client.get(f"/calculations/{calc_id}?fields=id,secret", headers=headers)
+    assert bad.status_code == 400
+
+def test_calculation_list_filters_and_sort():
+    headers = _auth_headers("filteruser")
+    for calc in (
+        {"type": "addition", "inputs": [1, 2]},
+        {"type": "addition", "inputs": [10, 20]},
+        {"type": "division", "inputs": [9, 3]},
+    ):
+        client.post("/calculations", json=calc, headers=headers)
+
+    by_result = client.get("/calculations?sort=-result&fields=result", headers=headers)
+    assert [row["result"] for row in by_result.json()] == [30.0, 3.0, 3.0]
+
+    additions = client.get("/calculations?type=addition&result_min=5", headers=headers)
+    assert [row["result"] for row in additions.json()] == [30.0]
+
+    empty_range = client.get("/calculations?result_min=5&result_max=1", headers=headers)
+    assert empty_range.status_code == 400
+
+def test_calculation_stats():
+    headers = _auth_headers("statsuser")
+    for calc in (
+        {"type": "addition", "inputs": [1, 2]},
+        {"type": "addition", "inputs": [10, 20]},
+        {"type": "division", "inputs": [9, 3]},
+    ):
+        client.post("/calculations", json=calc, headers=headers)
+
+    stats = client.get("/calculations/stats", headers=headers)
+    assert stats.status_code == 200
+    body = stats.json()
+    assert body["overall"]["count"] == 3
+    assert body["overall"]["sum"] == 36.0
+    assert body["overall"]["max"] == 30.0
+    assert [row["type"] for row in body["by_type"]] == ["addition", "division"]
+    assert body["by_type"][0]["avg"] == 16.5
+    assert sum(row["count"] for row in body["by_day"]) == 3
+
+    # A write invalidates the cached stats
+    client.post("/calculations", json={"type": "multiplication", "inputs": [2, 2]}, headers=headers)
+    assert client.get("/calculations/stats", headers=headers).json()["overall"]["count"] == 4
+
+    future = client.get("/calculations/stats?created_after=2999-01-01T00:00:00", headers=headers)
+    assert future.json()["overall"]["count"] == 0
+
+def test_calculation_conditional_get():
+    headers = _auth_headers("etaguser")
+    calc_id = client.post(
+        "/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=headers
+    ).json()["id"]
+
+    read = client.get(f"/calculations/{calc_id}", headers=headers)
+    etag = read.headers["etag"]
+    assert read.headers["last-modified"]
+    revalidated = client.get(f"/calculations/{calc_id}", headers={**headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    listed = client.get("/calculations", headers=headers)
+    list_etag = listed.headers["etag"]
+    assert client.get("/calculations", headers={**headers, "If-None-Match": list_etag}).status_code == 304
+
+    # An update changes both validators
+    client.put(f"/calculations/{calc_id}", json={"inputs": [5, 5]}, headers=headers)
+    assert client.get(f"/calculations/{calc_id}", headers={**headers, "If-None-Match": etag}).status_code == 200
+    assert client.get("/calculations", headers={**headers, "If-None-Match": list_etag}).status_code == 200
+
+def test_calculation_msgpack_negotiation():
+    import msgpack
+    headers = _auth_headers("msgpackuser")
+    created = client.post(
+        "/calculations",
+        content=msgpack.packb({"type": "multiplication", "inputs": [2.5, 4]}),
+        headers={**headers, "Content-Type": "application/msgpack", "Accept": "application/msgpack"},
+    )
+    assert created.status_code == 201
+    assert created.headers["content-type"] == "application/msgpack"
+    body = msgpack.unpackb(created.content)
+    assert body["result"] == 10.0
+
+    read = client.get(f"/calculations/{body['id']}", headers={**headers, "Accept": "application/msgpack"})
+    assert msgpack.unpackb(read.content)["inputs"] == [2.5, 4.0]
+    assert read.headers["vary"] == "Accept"
+    as_json = client.get(f"/calculations/{body['id']}", headers=headers)
+    assert as_json.headers["etag"] != read.headers["etag"]
+
+    bad = client.post(
+        "/calculations", content=b"\xc1", headers={**headers, "Content-Type": "application/msgpack"}
+    )
+    assert bad.status_code == 400
+
+def test_calculation_float64_body():
+    from array import array
+    headers = _auth_headers("float64user")
+    body = array("d", [8.0, 2.0, 2.0]).tobytes()
+    created = client.post(
+        "/calculations",
+        content=body,
+        headers={**headers, "Content-Type": "application/octet-stream", "X-Calculation-Type": "division"},
+    )
+    assert created.status_code == 201
+    assert created.json()["result"] == 2.0
+    assert created.json()["inputs"] == [8.0, 2.0, 2.0]
+
+    by_query = client.post(
+        "/calculations?type=addition",
+        content=body,
+        headers={**headers, "Content-Type": "application/octet-stream"},
+    )
+    assert by_query.json()["result"] == 12.0
+
+    truncated = client.post(
+        "/calculations?type=addition",
+        content=body[:-1],
+        headers={**headers, "Content-Type": "application/octet-stream"},
+    )
+    assert truncated.status_code == 400
+
+def test_calculation_chunked_upload():
+    from array import array
+    headers = _auth_headers("uploaduser")
+    binary = {**headers, "Content-Type": "application/octet-stream"}
+    upload = client.post("/calculations/uploads", json={"type": "division"}, headers=headers)
+    assert upload.status_code == 201
+    upload_id = upload.json()["id"]
+
+    # Chunks may arrive out of order and be re-sent
+    for seq, values in ((1, [2.0, 2.0]), (0, [100.0]), (2, [9.0]), (2, [5.0])):
+        put = client.put(
+            f"/calculations/uploads/{upload_id}/chunks/{seq}",
+            content=array("d", values).tobytes(),
+            headers=binary,
+        )
+        assert put.status_code == 204
+    state = client.get(f"/calculations/uploads/{upload_id}", headers=headers).json()
+    assert state["chunks"] == [0, 1, 2]
+    assert state["values"] == 4
+
+    incomplete = client.post(f"/calculations/uploads/{upload_id}/finalize", json={"chunks": 4}, headers=headers)
+    assert incomplete.status_code == 400
+    assert "missing chunks 3" in incomplete.json()["detail"]
+
+    final = client.post(f"/calculations/uploads/{upload_id}/finalize", json={"chunks": 3}, headers=headers)
+    assert final.status_code == 201
+    assert final.json()["result"] == 5.0
+    assert final.json()["input_count"] == 4
+    calc = client.get(f"/calculations/{final.json()['id']}", headers=headers).json()
+    assert calc["inputs"] == [100.0, 2.0, 2.0, 5.0]
+    assert client.get(f"/calculations/uploads/{upload_id}", headers=headers).status_code == 404
+
+def test_concurrent_finalize_creates_one_calculation():
+    from concurrent.futures import ThreadPoolExecutor
+    headers = _auth_headers("racefinalizeuser")
+    upload_id = client.post("/calculations/uploads", json={"type": "addition"}, headers=headers).json()["id"]
+    put = client.put(
+        f"/calculations/uploads/{upload_id}/chunks/0",
+        content=array("d", [1.0, 2.0]).tobytes(),
+        headers={**headers, "Content-Type": "application/octet-stream"},
+    )
+    assert put.status_code == 204
+
+    def finalize(_):
+        return client.post(f"/calculations/uploads/{upload_id}/finalize", json={"chunks": 1}, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(finalize, range(4)))
+    # The session is locked for finalizing: one request wins, the others find it gone
+    assert sorted(r.status_code for r in responses) == [201, 404, 404, 404]
+    calcs = client.get("/calculations", headers=headers).json()
+    assert [c["result"] for c in calcs] == [3.0]
+
+def test_statistical_calculations():
+    headers = _auth_headers("statsuser")
+    median = client.post("/calculations", json={"type": "median", "inputs": [9, 1, 5]}, headers=headers)
+    assert median.status_code == 201
+    assert median.json()["result"] == 5
+    mean = client.post("/calculations", json={"type": "mean", "inputs": [4]}, headers=headers)
+    assert mean.status_code == 201
+    assert mean.json()["result"] == 4
+
+    # Each type keeps its own minimum number of inputs
+    variance = client.post("/calculations", json={"type": "variance", "inputs": [4]}, headers=headers)
+    assert variance.status_code == 422
+    addition = client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=headers)
+    update = client.put(f"/calculations/{addition.json()['id']}", json={"inputs": [1]}, headers=headers)
+    assert update.status_code == 400
+
+def test_expression_calculation():
+    headers = _auth_headers("expruser")
+    resp = client.post(
+        "/calculations",
+        json={"type": "expression", "inputs": [1, 2, 3, 4], "expression": "(a+b)*c/d"},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    assert resp.json()["expression"] == "(a + b) * c / d"
+    assert resp.json()["result"] == 2.25
+
+    update = client.put(f"/calculations/{resp.json()['id']}", json={"inputs": [1, 1, 1, 2]}, headers=headers)
+    assert update.json()["result"] == 1.0
+    wrong_arity = client.put(f"/calculations/{resp.json()['id']}", json={"inputs": [1, 1]}, headers=headers)
+    assert wrong_arity.status_code == 400
+
+    unsafe = client.post(
+        "/calculations",
+        json={"type": "expression", "inputs": [1], "expression": "a.__class__"},
+        headers=headers,
+    )
+    assert unsafe.status_code == 422
+
+def test_formula_sweep():
+    headers = _auth_headers("sweepuser")
+    created = client.post(
+        "/formulas", json={"name": "margin", "expression": "(price-cost)/price"}, headers=headers
+    )
+    assert created.status_code == 201
+    formula = created.json()
+    assert formula["expression"] == "(price - cost) / price"
+    assert formula["variables"] == ["cost", "price"]
+    duplicate = client.post("/formulas", json={"name": "margin", "expression": "a"}, headers=headers)
+    assert duplicate.status_code == 400
+
+    sweep = client.post(
+        f"/formulas/{formula['id']}/sweep",
+        json={"parameters": {"cost": [40, 50], "price": {"start": 0, "stop": 100, "num": 3}}},
+        headers=headers,
+    )
+    assert sweep.status_code == 200
+    assert sweep.headers["content-type"].startswith("application/x-ndjson")
+    assert sweep.headers["x-sweep-points"] == "6"
+    rows = [json.loads(line) for line in sweep.text.splitlines()]
+    assert rows[1] == {"parameters": {"cost": 40.0, "price": 50.0}, "result": 0.2}
+    assert rows[0]["result"] is None  # price 0 divides by zero
+
+    packed = client.post(
+        f"/formulas/{formula['id']}/sweep",
+        json={"parameters": {"cost": [40], "price": [80, 100]}, "mode": "zip"},
+        headers={**headers, "Accept": "application/octet-stream"},
+    )
+    assert array("d", packed.content).tolist() == [0.5, 0.6]
+
+    missing = client.post(
+        f"/formulas/{formula['id']}/sweep", json={"parameters": {"cost": [1]}}, headers=headers
+    )
+    assert missing.status_code == 400
+    # Sweeps store nothing
+    assert client.get("/calculations", headers=headers).json() == []
+
+    assert client.delete(f"/formulas/{formula['id']}", headers=headers).status_code == 204
+    assert client.get(f"/formulas/{formula['id']}", headers=headers).status_code == 404
+
+def test_formula_name_race_is_a_conflict(monkeypatch):
+    headers = _auth_headers("formularaceuser")
+    assert client.post(
+        "/formulas", json={"name": "rate", "expression": "a / b"}, headers=headers
+    ).status_code == 201
+
+    # Lose the race: the name is taken between the duplicate check and the insert
+    def racing_create(cls, db, user_id, name, expression):
+        formula = cls(user_id=user_id, name=name, expression=expression)
+        db.add(formula)
+        db.flush()
+        return formula
+
+    monkeypatch.setattr(Formula, "create", classmethod(racing_create))
+    raced = client.post("/formulas", json={"name": "rate", "expression": "a"}, headers=headers)
+    assert raced.status_code == 409
+    assert [f["name"] for f in client.get("/formulas", headers=headers).json()] == ["rate"]
+
+def test_dependent_calculations():
+    headers = _auth_headers("dagsuser")
+
+    def create(body):
+        resp = client.post("/calculations", json=body, headers=headers)
+        assert resp.status_code == 201, resp.text
+        return resp.json()
+
+    base = create({"type": "addition", "inputs": [1, 2]})
+    scaled = create({"type": "multiplication", "inputs": [0, 10], "references": {"0": base["id"]}})
+    assert scaled["inputs"] == [3.0, 10.0]
+    assert scaled["references"] == {"0": base["id"]}
+    ratio = create({"type": "division", "inputs": [60, 1], "references": {"1": scaled["id"]}})
+    assert ratio["result"] == 2.0
+
+    update = client.put(f"/calculations/{base['id']}", json={"inputs": [2, 4]}, headers=headers)
+    assert update.status_code == 200
+    assert update.headers["x-recomputed-calculations"] == "2"
+    assert client.get(f"/calculations/{scaled['id']}", headers=headers).json()["result"] == 60.0
+    assert client.get(f"/calculations/{ratio['id']}", headers=headers).json()["result"] == 1.0
+
+    # A dependent that would divide by zero rejects the whole update
+    zero = client.put(f"/calculations/{base['id']}", json={"inputs": [0, 0]}, headers=headers)
+    assert zero.status_code == 400
+    assert client.get(f"/calculations/{base['id']}", headers=headers).json()["result"] == 6.0
+
+    cycle = client.put(
+        f"/calculations/{base['id']}", json={"references": {"0": ratio["id"]}}, headers=headers
+    )
+    assert cycle.status_code == 400
+    assert client.delete(f"/calculations/{base['id']}", headers=headers).status_code == 400
+
+def test_concurrent_reference_updates_cannot_close_a_cycle():
+    from concurrent.futures import ThreadPoolExecutor
+    headers = _auth_headers("dagraceuser")
+    a, b = (
+        client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=headers).json()
+        for _ in range(2)
+    )
+
+    def point(pair):
+        calculation, source = pair
+        return client.put(
+            f"/calculations/{calculation['id']}", json={"references": {"0": source["id"]}}, headers=headers
+        )
+
+    # Each update alone is acyclic; together they would make a cycle
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(point, [(a, b), (b, a)]))
+    assert sorted(r.status_code for r in responses) == [200, 400]
+
+def test_concurrent_source_updates_recompute_shared_dependent():
+    from concurrent.futures import ThreadPoolExecutor
+    headers = _auth_headers("dagrecomputeuser")
+
+    def create(body):
+        return client.post("/calculations", json=body, headers=headers).json()
+
+    a = create({"type": "addition", "inputs": [1, 1]})
+    b = create({"type": "addition", "inputs": [1, 1]})
+    total = create({"type": "addition", "inputs": [0, 0], "references": {"0": a["id"], "1": b["id"]}})
+    assert total["result"] == 4.0
+
+    def change(calculation):
+        return client.put(f"/calculations/{calculation['id']}", json={"inputs": [5, 5]}, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert [r.status_code for r in pool.map(change, [a, b])] == [200, 200]
+    # Serialized: the second recompute sees the first one's source result
+    assert client.get(f"/calculations/{total['id']}", headers=headers).json()["result"] == 20.0
+
+def test_delete_waits_for_references_being_added():
+    from concurrent.futures import ThreadPoolExecutor
+    headers = _auth_headers("dagdeleteuser")
+    source = client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=headers).json()
+
+    def reference(_):
+        return client.post(
+            "/calculations",
+            json={"type": "addition", "inputs": [0, 1], "references": {"0": source["id"]}},
+            headers=headers,
+        )
+
+    def delete(_):
+        return client.delete(f"/calculations/{source['id']}", headers=headers)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        created, deleted = pool.submit(reference, None), pool.submit(delete, None)
+        created, deleted = created.result(), deleted.result()
+    # Either the delete wins and the reference is refused, or the reference wins and the delete is
+    assert sorted([created.status_code, deleted.status_code]) in ([201, 400], [204, 400])
+    if deleted.status_code == 400:
+        assert client.get(f"/calculations/{source['id']}", headers=headers).status_code == 200
+
+def test_cached_reads_survive_missed_invalidation(monkeypatch):
+    headers = _auth_headers("missedbumpuser")
+    # As when Redis was down for the bump, or another process wrote
+    monkeypatch.setattr("app.cache.bump_generation", lambda user_id: None)
+    first = client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=headers).json()
+    assert [c["id"] for c in client.get("/calculations", headers=headers).json()] == [first["id"]]
+    assert client.get("/calculations/stats", headers=headers).json()["overall"]["count"] == 1
+    client.put(f"/calculations/{first['id']}", json={"inputs": [5, 5]}, headers=headers)
+    second = client.post("/calculations", json={"type": "addition", "inputs": [3, 4]}, headers=headers).json()
+    listed = client.get("/calculations", headers=headers).json()
+    assert sorted(c["id"] for c in listed) == sorted([first["id"], second["id"]])
+    assert client.get(f"/calculations/{first['id']}", headers=headers).json()["result"] == 10.0
+    assert client.get("/calculations/stats", headers=headers).json()["overall"]["count"] == 2
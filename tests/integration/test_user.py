@@ -325,3 +325,45 @@ def test_error_handling():
             session.execute(text("INVALID SQL"))
     assert "INVALID SQL" in str(exc_info.value)
 
+
+def test_bulk_delete_cascades_calculations(db_session):
+    """
+    Deleting users in bulk removes their calculations through the FK cascade.
+    """
+    from app.models.calculation import Addition, Calculation
+
+    users = [User(**create_fake_user()) for _ in range(2)]
+    db_session.add_all(users)
+    db_session.commit()
+    for user in users:
+        db_session.add_all([Addition(user_id=user.id, inputs=[1, 2], result=3) for _ in range(3)])
+    db_session.commit()
+    user_ids = [user.id for user in users]
+
+    assert User.bulk_delete(db_session, user_ids) == 2
+    db_session.commit()
+
+    assert db_session.query(User).filter(User.id.in_(user_ids)).count() == 0
+    assert db_session.query(Calculation).filter(Calculation.user_id.in_(user_ids)).count() == 0
+    assert User.bulk_delete(db_session, []) == 0
+
+def test_delete_user_does_not_load_calculations(db_session):
+    """
+    Deleting a single user through the ORM leaves child rows to the database.
+    """
+    from app.models.calculation import Addition, Calculation
+
+    user = User(**create_fake_user())
+    db_session.add(user)
+    db_session.commit()
+    db_session.add(Addition(user_id=user.id, inputs=[1, 2], result=3))
+    db_session.commit()
+    user_id = user.id
+    db_session.expire_all()
+
+    user = db_session.get(User, user_id)
+    db_session.delete(user)
+    db_session.commit()
+
+    assert "calculations" not in user.__dict__
+    assert db_session.query(Calculation).filter(Calculation.user_id == user_id).count() == 0
@@ -5,6 +5,7 @@ from uuid import UUID
 import pydantic_core
 from sqlalchemy.exc import IntegrityError
 from app.models.user import User
+from tests.conftest import create_fake_user
 
 def test_password_hashing(db_session, fake_user_data):
     """Test password hashing and verification functionality"""
@@ -194,3 +195,29 @@ def test_missing_password_registration(db_session):
     # Adjust the expected error message
     with pytest.raises(ValueError, match="Password must be at least 6 characters long"):
         User.register(db_session, test_data)
+
+def test_bulk_register(db_session):
+    """Test bulk registration reports created, duplicate and failed rows."""
+    existing = create_fake_user()
+    existing["password"] = "TestPass123"
+    User.register(db_session, existing)
+    db_session.commit()
+
+    fresh = create_fake_user()
+    fresh["password"] = "TestPass123"
+    short_password = create_fake_user()
+    short_password["password"] = "abc"
+    same_email = create_fake_user()
+    same_email["email"] = fresh["email"]
+    same_email["password"] = "TestPass123"
+
+    report = User.bulk_register(db_session, [fresh, existing, short_password, same_email])
+    db_session.commit()
+
+    assert [row["index"] for row in report["created"]] == [0]
+    assert sorted(row["index"] for row in report["duplicates"]) == [1, 3]
+    assert [row["index"] for row in report["failed"]] == [2]
+
+    created = db_session.query(User).filter_by(username=fresh["username"]).first()
+    assert created.id == report["created"][0]["id"]
+    assert created.verify_password("TestPass123") is True
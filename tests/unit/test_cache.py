@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import MagicMock
+from app import cache
+from app.auth import redis as redis_module
+
+@pytest.fixture
+def mock_redis(monkeypatch):
+    mock = MagicMock()
+    monkeypatch.setattr(redis_module, "get_redis", MagicMock(return_value=mock))
+    monkeypatch.setattr(cache, "breaker", redis_module.CircuitBreaker(failure_threshold=1, recovery_timeout=60))
+    return mock
+
+def test_generation_defaults_to_zero(mock_redis):
+    mock_redis.get.return_value = None
+    assert cache.generation("user") == 0
+    mock_redis.get.return_value = b"7"
+    assert cache.generation("user") == 7
+    mock_redis.get.assert_called_with("calc:gen:user")
+
+def test_bump_generation_uses_incr(mock_redis):
+    cache.bump_generation("user")
+    mock_redis.incr.assert_called_once_with("calc:gen:user")
+
+def test_json_roundtrip(mock_redis):
+    cache.set_json("key", {"a": 1}, ttl=5)
+    mock_redis.set.assert_called_once_with("key", b'{"a":1}', ex=5)
+    mock_redis.get.return_value = b'{"a": 1}'
+    assert cache.get_json("key") == {"a": 1}
+
+def test_cache_fails_open(mock_redis):
+    mock_redis.get.side_effect = redis_module.redis.ConnectionError("down")
+    assert cache.generation("user") is None
+    # Breaker is now open: nothing reaches Redis
+    assert cache.get_json("key") is None
+    cache.set_json("key", {"a": 1})
+    cache.bump_generation("user")
+    assert mock_redis.set.call_count == 0
+    assert mock_redis.incr.call_count == 0
+
+def test_cache_errors_do_not_open_the_auth_breaker(mock_redis):
+    mock_redis.get.side_effect = redis_module.redis.ConnectionError("down")
+    assert cache.generation("user") is None
+    assert cache.breaker.state == cache.breaker.OPEN
+    assert redis_module.breaker.state == redis_module.breaker.CLOSED
+
+def test_read_key_is_scoped_by_generation():
+    key = cache.read_key("item", "user", 3, "calc", "fields=id")
+    assert key.startswith("calc:item:user:3:")
+    assert key == cache.read_key("item", "user", 3, "calc", "fields=id")
+    assert key != cache.read_key("item", "user", 4, "calc", "fields=id")
+    assert key != cache.read_key("item", "user", 3, "calc", "fields=result")
@@ -35,3 +35,18 @@ def test_division_invalid_inputs():
     div = Division(inputs=[1, 0])
     with pytest.raises(ValueError):
         div.get_result()
+
+@pytest.mark.parametrize("cls", [Addition, Subtraction, Multiplication, Division])
+def test_result_from_chunks_matches_get_result(cls):
+    inputs = [100.0, 0.1, 2.5, 3.0, 7.25, 1.5]
+    chunks = [inputs[:1], inputs[1:4], [], inputs[4:]]
+    assert cls(inputs=[]).get_result_from_chunks(iter(chunks)) == cls(inputs=inputs).get_result()
+
+@pytest.mark.parametrize("cls", [Addition, Subtraction, Multiplication, Division])
+def test_result_from_chunks_needs_two_inputs(cls):
+    with pytest.raises(ValueError):
+        cls(inputs=[]).get_result_from_chunks([[1.0], []])
+
+def test_division_from_chunks_rejects_zero():
+    with pytest.raises(ValueError, match="divide by zero"):
+        Division(inputs=[]).get_result_from_chunks([[1.0], [2.0, 0.0]])
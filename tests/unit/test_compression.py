@@ -0,0 +1,96 @@
+import gzip
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.compression import CompressionMiddleware, choose_encoding, no_transform
+
+BODY = "calculation " * 500
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+@app.get("/big")
+def big():
+    return PlainTextResponse(BODY, headers={"ETag": '"abc"'})
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("tiny", headers={"ETag": '"small"'})
+
+@app.get("/revalidate")
+def revalidate():
+    return Response(status_code=304, headers={"ETag": '"abc"'})
+
+@app.get("/raw")
+def raw():
+    return PlainTextResponse(BODY, headers={"ETag": '"abc"', "Cache-Control": "private, no-transform"})
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([BODY.encode()] * 3), media_type="text/plain")
+
+client = TestClient(app)
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("gzip", "gzip"),
+    ("gzip, br, zstd", "zstd"),
+    ("gzip;q=1, zstd;q=0.5", "gzip"),
+    ("zstd;q=0, *", "br"),
+    ("identity", None),
+])
+def test_choose_encoding(accept, expected):
+    assert choose_encoding(accept, ["zstd", "br", "gzip"]) == expected
+
+def _decompress(encoding, data):
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compresses_large_responses(encoding):
+    with client.stream("GET", "/big", headers={"Accept-Encoding": encoding}) as response:
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["etag"] == 'W/"abc"'
+        assert "Accept-Encoding" in response.headers["vary"]
+        raw = b"".join(response.iter_raw())
+    assert int(response.headers["content-length"]) == len(raw) < len(BODY)
+    assert _decompress(encoding, raw).decode() == BODY
+
+def test_small_responses_are_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "tiny"
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_streams_chunk_by_chunk(encoding):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": encoding}) as response:
+        assert response.headers["content-encoding"] == encoding
+        assert "content-length" not in response.headers
+        chunks = list(response.iter_raw())
+    assert _decompress(encoding, b"".join(chunks)).decode() == BODY * 3
+
+def test_304_carries_the_same_validator_as_the_compressed_200():
+    full = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    revalidated = client.get("/revalidate", headers={"Accept-Encoding": "gzip"})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == full.headers["etag"] == 'W/"abc"'
+    assert "Accept-Encoding" in revalidated.headers["vary"]
+    # Too small to compress, but the same representation family
+    assert client.get("/small", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"small"'
+    assert client.get("/revalidate", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"abc"'
+
+def test_no_transform_disables_compression():
+    response = client.get("/raw", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+    assert response.text == BODY
+    response = client.get("/big", headers={"Accept-Encoding": "gzip", "Cache-Control": "no-transform"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+    assert no_transform("max-age=0, No-Transform") and not no_transform("no-cache")
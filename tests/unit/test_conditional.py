@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from starlette.requests import Request
+from app.conditional import http_date, is_not_modified, make_etag, validator_headers
+
+def _request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+def test_make_etag_is_stable_and_quoted():
+    assert make_etag("a", 1) == make_etag("a", 1)
+    assert make_etag("a", 1) != make_etag("a", 2)
+    assert make_etag("a").startswith('"') and make_etag("a").endswith('"')
+
+def test_validator_headers():
+    headers = validator_headers('"x"', datetime(2024, 1, 2, 3, 4, 5))
+    assert headers["ETag"] == '"x"'
+    assert headers["Last-Modified"] == "Tue, 02 Jan 2024 03:04:05 GMT"
+    assert "Last-Modified" not in validator_headers('"x"')
+
+def test_if_none_match():
+    assert is_not_modified(_request(if_none_match='"a", W/"b"'), '"b"')
+    assert is_not_modified(_request(if_none_match="*"), '"b"')
+    assert not is_not_modified(_request(if_none_match='"a"'), '"b"')
+
+def test_if_none_match_takes_precedence():
+    modified = datetime(2024, 1, 1)
+    request = _request(if_none_match='"a"', if_modified_since=http_date(modified + timedelta(days=1)))
+    assert not is_not_modified(request, '"b"', modified)
+
+def test_if_modified_since():
+    modified = datetime(2024, 1, 1, 12, 0, 0, 500000)
+    assert is_not_modified(_request(if_modified_since=http_date(modified)), '"x"', modified)
+    assert not is_not_modified(_request(if_modified_since=http_date(modified - timedelta(seconds=1))), '"x"', modified)
+    assert not is_not_modified(_request(if_modified_since="garbage"), '"x"', modified)
+    assert not is_not_modified(_request(if_modified_since=http_date(modified)), '"x"')
@@ -0,0 +1,112 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.models.calculation import Addition, Division
+from app.models.dependency import (
+    CalculationDependency,
+    delete_edges,
+    dependents,
+    descendants,
+    would_cycle,
+    write_edges,
+)
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    CalculationDependency.__table__.create(engine)
+    with engine.connect() as connection:
+        yield connection
+
+
+def _graph(connection, edges):
+    """Write {calculation: [sources]} and return the node ids by name."""
+    names = sorted(set(edges) | {source for sources in edges.values() for source in sources})
+    ids = {name: uuid.uuid4() for name in names}
+    user_id = uuid.uuid4()
+    for name, sources in edges.items():
+        write_edges(connection, ids[name], user_id, [ids[source] for source in sources])
+    return ids
+
+
+def test_descendants_are_topologically_ordered(connection):
+    # a -> b -> d, a -> c -> d, d -> e; x is unrelated
+    ids = _graph(connection, {"b": ["a"], "c": ["a"], "d": ["b", "c"], "e": ["d"], "y": ["x"]})
+    order = [next(name for name, id_ in ids.items() if id_ == node) for node in descendants(connection, ids["a"])]
+    assert sorted(order) == ["b", "c", "d", "e"]
+    assert order.index("d") > max(order.index("b"), order.index("c"))
+    assert order[-1] == "e"
+    assert descendants(connection, ids["e"]) == []
+
+
+def test_would_cycle(connection):
+    ids = _graph(connection, {"b": ["a"], "c": ["b"]})
+    assert would_cycle(connection, ids["a"], [ids["c"]])
+    assert would_cycle(connection, ids["a"], [ids["a"]])
+    assert not would_cycle(connection, ids["c"], [ids["a"]])
+
+
+def test_write_edges_replaces_and_delete_edges_removes(connection):
+    ids = _graph(connection, {"c": ["a", "b"]})
+    assert dependents(connection, ids["a"]) == [ids["c"]]
+    write_edges(connection, ids["c"], uuid.uuid4(), [ids["b"], ids["b"]])
+    assert dependents(connection, ids["a"]) == []
+    assert dependents(connection, ids["b"]) == [ids["c"]]
+    delete_edges(connection, ids["c"])
+    assert dependents(connection, ids["b"]) == []
+
+
+def test_references_round_trip_through_the_column():
+    source = uuid.uuid4()
+    calc = Addition(user_id=uuid.uuid4(), inputs=[1, 2], references={1: source})
+    assert calc.input_references == {"1": str(source)}
+    assert calc.references == {1: source}
+    calc.references = {}
+    assert calc.input_references is None and calc.references is None
+
+
+def test_resolve_references_from_known_results():
+    source = uuid.uuid4()
+    calc = Division(user_id=uuid.uuid4(), inputs=[10, 0], references={1: source})
+    calc.resolve_references(db=None, known={source: 4.0})
+    assert list(calc.inputs) == [10, 4.0]
+    assert calc.get_result() == 2.5
+
+    calc.references = {5: source}
+    with pytest.raises(ValueError, match="outside the inputs"):
+        calc.resolve_references(db=None, known={source: 4.0})
+    calc.references = {0: source}
+    with pytest.raises(ValueError, match="has no result"):
+        calc.resolve_references(db=None, known={source: None})
+
+
+def test_purge_dangling_edges():
+    import app.models.user  # noqa: F401  (calculations references users)
+    from app.database import Base
+    from app.models.calculation import Calculation
+    from app.models.dependency import purge_dangling_edges
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[
+        Base.metadata.tables["users"], Calculation.__table__, CalculationDependency.__table__,
+    ])
+    user_id = uuid.uuid4()
+    with engine.begin() as connection:
+        source, dependent = uuid.uuid4(), uuid.uuid4()
+        connection.execute(Calculation.__table__.insert(), [
+            {"id": dependent, "user_id": user_id, "type": "addition", "inputs": [4.0, 1.0],
+             "input_references": {"0": str(source)}, "result": 5.0},
+        ])
+        # source was dropped with its partition; so was a calculation referencing dependent
+        write_edges(connection, dependent, user_id, [source])
+        write_edges(connection, uuid.uuid4(), user_id, [dependent])
+        assert purge_dangling_edges(connection, batch_size=1) == 2
+        assert dependents(connection, dependent) == [] and dependents(connection, source) == []
+        row = connection.execute(
+            Calculation.__table__.select().where(Calculation.__table__.c.id == dependent)
+        ).one()
+        assert row.input_references is None and row.inputs == [4.0, 1.0]
+        assert purge_dangling_edges(connection) == 0
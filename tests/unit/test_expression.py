@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+from app.models.calculation import Calculation, Expression
+from app.operations import expression as expression_module
+from app.operations.expression import compile_expression, normalize
+from app.schemas.calculation import CalculationBase
+
+
+@pytest.mark.parametrize(
+    "source, inputs, expected",
+    [
+        ("(a + b) * c / d", [1, 2, 3, 4], 2.25),
+        ("b - a", [1, 5], 4),
+        ("-x + 2 * -y", [1.5, 2], -5.5),
+        ("mean(a, b, c) - median(a, b, c)", [1, 2, 6], 1),
+        ("max(a, 10) / min(a, b)", [4, 2], 5.0),
+    ],
+)
+def test_evaluate(source, inputs, expected):
+    assert compile_expression(source).evaluate(inputs) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("", "expression is required"),
+        ("a ** 2", "Unsupported operator"),
+        ("a.__class__", "Unsupported syntax"),
+        ("x[0]", "Unsupported syntax"),
+        ("__import__('os')", "Unknown function"),
+        ("open(a)", "Unknown function"),
+        ("median(a, b=1)", "positional arguments only"),
+        ("variance(a)", "at least 2 arguments"),
+        ("_a + 1", "Invalid variable name"),
+        ("mean + 1", "is an operation"),
+        ("'a' + b", "Unsupported constant"),
+        ("True + a", "Unsupported constant"),
+        ("9" * 400 + " + a", r"Unsupported constant in expression: 9+\.\.\.9+$"),
+        ("1e400 * a", "Unsupported constant in expression: inf"),
+        ("a +", "Invalid expression"),
+        ("-" * 900 + "a", "nested too deeply"),
+        ("a" * 1001, "limited to 1000 characters"),
+    ],
+)
+def test_rejected_expressions(source, message):
+    with pytest.raises(ValueError, match=message):
+        compile_expression(source)
+
+
+def test_integer_constants_evaluate_as_floats():
+    # Exact integer arithmetic would overflow converting to float later on
+    compiled = compile_expression("9" * 300 + " * " + "9" * 300 + " / a")
+    assert compiled.evaluate([1.0]) == math.inf
+    assert compile_expression("2 * 3 + a").source == "2 * 3 + a"
+
+
+def test_division_by_zero_and_arity():
+    compiled = compile_expression("a / b")
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        compiled.evaluate([1, 0])
+    with pytest.raises(ValueError, match=r"takes 2 inputs \(a, b\), got 3"):
+        compiled.evaluate([1, 2, 3])
+
+
+def test_compiled_expressions_are_cached():
+    expression_module._compile.cache_clear()
+    first = compile_expression("(a+b) *  c")
+    assert compile_expression(" (a+b) * c ") is first
+    assert normalize("(a+b) *  c") == "(a+b) * c"
+    assert first.source == "(a + b) * c"
+    info = expression_module.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_expression_calculation():
+    calc = Calculation.create("expression", None, [1, 2, 3, 4], expression="(a+b)*c/d")
+    assert isinstance(calc, Expression)
+    assert calc.expression == "(a + b) * c / d"
+    assert calc.get_result() == 2.25
+    assert calc.get_result_from_chunks([[1, 2], [3, 4]]) == 2.25
+    # The memo tells expressions apart
+    other = Calculation.create("expression", None, [1, 2, 3, 4], expression="a+b+c+d")
+    assert other.get_result() == 10
+    with pytest.raises(ValueError, match="do not take an expression"):
+        Calculation.create("addition", None, [1, 2], expression="a+b")
+
+
+def test_expression_schema():
+    data = CalculationBase(type="expression", inputs=[2, 3], expression="a * b")
+    assert data.expression == "a * b"
+    with pytest.raises(ValueError, match="expression is required"):
+        CalculationBase(type="expression", inputs=[2, 3])
+    with pytest.raises(ValueError, match="takes 2 inputs"):
+        CalculationBase(type="expression", inputs=[2], expression="a * b")
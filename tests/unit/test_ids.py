@@ -0,0 +1,22 @@
+import uuid
+from app.core import ids as ids_module
+from app.core.ids import uuid7
+
+def test_uuid7_layout():
+    value = uuid7()
+    assert isinstance(value, uuid.UUID)
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+def test_uuid7_is_monotonic():
+    values = [uuid7() for _ in range(10000)]
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+def test_uuid7_counter_overflow_and_clock_skew(monkeypatch):
+    monkeypatch.setattr(ids_module, "_last_ms", 10**12)
+    monkeypatch.setattr(ids_module, "_last_seq", ids_module._MAX_SEQ)
+    # Clock reports an earlier time than the last value generated
+    monkeypatch.setattr(ids_module.time, "time_ns", lambda: 5 * 10**17)
+    value = uuid7()
+    assert value.int >> 80 == 10**12 + 1
@@ -53,3 +53,13 @@ def test_get_current_user_exceptions(monkeypatch):
     with pytest.raises(Exception):
         import asyncio
         asyncio.run(jwt_module.get_current_user(token="token", db=db))
+
+def test_hash_passwords_serial_preserves_order(monkeypatch):
+    monkeypatch.setattr(jwt_module, "get_password_hash", lambda p: f"hashed:{p}")
+    assert jwt_module.hash_passwords(["a", "b", "c"], workers=1) == ["hashed:a", "hashed:b", "hashed:c"]
+
+def test_hash_passwords_pool_is_shared_and_preserves_order(monkeypatch):
+    monkeypatch.setattr(jwt_module, "get_password_hash", lambda p: f"hashed:{p}")
+    passwords = [str(i) for i in range(20)]
+    assert jwt_module.hash_passwords(passwords, workers=3) == [f"hashed:{p}" for p in passwords]
+    assert jwt_module._hash_executor(3) is jwt_module._hash_executor(3)
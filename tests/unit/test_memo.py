@@ -0,0 +1,80 @@
+import uuid
+from array import array
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import memo as memo_module
+from app.memo import ResultMemo, result_key
+from app.models.calculation import Addition, Calculation, Division
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo(monkeypatch):
+    fresh = ResultMemo(max_entries=2, ttl=60)
+    monkeypatch.setattr(memo_module, "memo", fresh)
+    monkeypatch.setattr(memo_module.settings, "CALCULATIONS_MEMO_REDIS", False)
+    return fresh
+
+
+def test_result_key_is_canonical():
+    key = result_key("addition", [1, 2])
+    assert key == result_key("addition", [1.0, 2.0])
+    assert key == result_key("addition", array("d", [1.0, 2.0]))
+    assert key != result_key("subtraction", [1, 2])
+    assert key != result_key("addition", [2, 1])
+
+
+def test_get_result_is_memoized(fresh_memo, monkeypatch):
+    calls = []
+    original = Addition.get_result.__wrapped__
+
+    def counting(self):
+        calls.append(1)
+        return original(self)
+
+    monkeypatch.setattr(Addition, "get_result", memo_module.memoize_result(counting))
+    user_id = uuid.uuid4()
+    assert Calculation.create("addition", user_id, [1, 2]).get_result() == 3
+    assert Calculation.create("addition", user_id, [1.0, 2.0]).get_result() == 3
+    assert len(calls) == 1
+    assert fresh_memo.stats()["hits"] == 1
+    assert fresh_memo.stats()["hit_rate"] == 0.5
+
+
+def test_errors_are_not_memoized(fresh_memo):
+    with pytest.raises(ValueError):
+        Division(inputs=[1, 0]).get_result()
+    with pytest.raises(ValueError):
+        Addition(inputs="notalist").get_result()
+    assert fresh_memo.stats()["entries"] == 0
+
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    memo = ResultMemo(max_entries=2, ttl=10, clock=lambda: now[0])
+    memo.put("a", 1.0)
+    memo.put("b", 2.0)
+    assert memo.get("a") == 1.0
+    memo.put("c", 3.0)  # evicts b, the least recently used
+    assert memo.get("b") is None
+    assert memo.stats()["evictions"] == 1
+    now[0] = 11.0
+    assert memo.get("a") is None
+    assert memo.stats()["expirations"] == 1
+
+
+def test_redis_tier(monkeypatch):
+    monkeypatch.setattr(memo_module.settings, "CALCULATIONS_MEMO_REDIS", True)
+    get_json = MagicMock(return_value=4.5)
+    set_json = MagicMock()
+    monkeypatch.setattr(memo_module.cache, "get_json", get_json)
+    monkeypatch.setattr(memo_module.cache, "set_json", set_json)
+    memo = ResultMemo(max_entries=2, ttl=30)
+    assert memo.get("k") == 4.5
+    get_json.assert_called_once_with("calc:memo:k")
+    assert memo.get("k") == 4.5  # now from the local tier
+    assert memo.stats()["redis_hits"] == 1
+    assert memo.stats()["local_hits"] == 1
+    memo.put("j", 1.0)
+    set_json.assert_called_once_with("calc:memo:j", 1.0, ttl=30)
@@ -0,0 +1,50 @@
+import uuid
+from datetime import datetime
+import cbor2
+import msgpack
+import pytest
+from starlette.requests import Request
+from app.negotiation import CBOR, JSON, MSGPACK, OCTET_STREAM, decode, encode, media_type_of, negotiate, preferred
+
+def _request(accept=None):
+    headers = [(b"accept", accept.encode())] if accept is not None else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("*/*", JSON),
+    ("application/msgpack", MSGPACK),
+    ("application/x-msgpack", MSGPACK),
+    ("application/cbor;q=0.9, application/msgpack;q=0.8", CBOR),
+    ("application/json;q=0.5, application/msgpack", MSGPACK),
+    ("application/msgpack;q=0, application/json", JSON),
+    ("text/html", JSON),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(_request(accept)) == expected
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "application/x-ndjson"),
+    ("*/*", "application/x-ndjson"),
+    ("application/octet-stream", OCTET_STREAM),
+    ("application/x-ndjson;q=0.5, application/octet-stream", OCTET_STREAM),
+    ("application/json", "application/x-ndjson"),
+])
+def test_preferred(accept, expected):
+    assert preferred(_request(accept), ("application/x-ndjson", OCTET_STREAM), "application/x-ndjson") == expected
+
+def test_media_type_of_strips_parameters():
+    assert media_type_of("Application/MsgPack; charset=binary") == MSGPACK
+    assert media_type_of(None) == ""
+
+def test_binary_encodings_match_json_data_model():
+    value = {"id": uuid.UUID(int=1), "at": datetime(2025, 1, 1), "inputs": [1.5, 2.0]}
+    expected = {"id": str(uuid.UUID(int=1)), "at": "2025-01-01T00:00:00", "inputs": [1.5, 2.0]}
+    assert msgpack.unpackb(encode(value, MSGPACK)) == expected
+    assert cbor2.loads(encode(value, CBOR)) == expected
+
+def test_decode_round_trip_and_errors():
+    assert decode(msgpack.packb({"inputs": [1.0]}), MSGPACK) == {"inputs": [1.0]}
+    assert decode(cbor2.dumps({"inputs": [1.0]}), CBOR) == {"inputs": [1.0]}
+    with pytest.raises(ValueError):
+        decode(b"\xc1", MSGPACK)
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from app import partitioning
+from app.core.ids import uuid7, uuid7_datetime
+from app.models.calculation import Calculation
+
+class FakeConn:
+    """Records executed SQL and reports a fixed set of existing partitions."""
+    def __init__(self, existing=()):
+        self.existing = list(existing)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            prefix = f"{params['table']}_"
+            return [(name,) for name in self.existing if name.startswith(prefix)]
+        self.statements.append(sql)
+        return MagicMock()
+
+def test_add_months_wraps_years():
+    assert partitioning._add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partitioning._add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+def test_table_args_per_layout(monkeypatch):
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "none")
+    assert partitioning.calculations_table_args() == {}
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "range")
+    assert partitioning.calculations_table_args() == {"postgresql_partition_by": "RANGE (created_at)"}
+    assert partitioning.is_partition_key("created_at")
+    assert partitioning.chunk_table_args() == {"postgresql_partition_by": "RANGE (created_at)"}
+    assert partitioning.is_chunk_partition_key("created_at")
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "hash")
+    assert partitioning.calculations_table_args() == {"postgresql_partition_by": "HASH (user_id)"}
+    assert partitioning.is_partition_key("user_id")
+    # Retention only applies to range partitions, so the chunks stay unpartitioned
+    assert partitioning.chunk_table_args() == {}
+    assert not partitioning.is_chunk_partition_key("created_at")
+
+def test_ensure_range_partitions(monkeypatch):
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "range")
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONS_AHEAD", 2)
+    conn = FakeConn(existing=["calculations_y2025m11", "calculation_input_chunks_default"])
+    created = partitioning.ensure_partitions(conn, today=date(2025, 11, 15))
+    assert created == [
+        "calculations_y2025m12", "calculations_y2026m01", "calculations_default",
+        "calculation_input_chunks_y2025m11", "calculation_input_chunks_y2025m12",
+        "calculation_input_chunks_y2026m01",
+    ]
+    assert "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')" in conn.statements[0]
+    assert conn.statements[3].startswith(
+        "CREATE TABLE calculation_input_chunks_y2025m11 PARTITION OF calculation_input_chunks"
+    )
+
+def test_ensure_hash_partitions(monkeypatch):
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "hash")
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_HASH_PARTITIONS", 4)
+    conn = FakeConn(existing=["calculations_p0"])
+    assert partitioning.ensure_partitions(conn) == ["calculations_p1", "calculations_p2", "calculations_p3"]
+    assert "MODULUS 4, REMAINDER 1" in conn.statements[0]
+
+def test_drop_expired_partitions(monkeypatch):
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "range")
+    conn = FakeConn(existing=[
+        "calculations_y2025m01", "calculations_y2025m06", "calculations_y2025m07", "calculations_default",
+        "calculation_input_chunks_y2025m06", "calculation_input_chunks_y2025m07",
+    ])
+    dropped = partitioning.drop_expired_partitions(conn, retention_months=5, today=date(2025, 12, 20))
+    assert dropped == ["calculations_y2025m01", "calculations_y2025m06", "calculation_input_chunks_y2025m06"]
+    # Metadata operations only; no rows are deleted
+    assert not any(statement.startswith("DELETE") for statement in conn.statements)
+    assert conn.statements[0] == "ALTER TABLE calculations DETACH PARTITION calculations_y2025m01"
+    assert conn.statements[1] == "DROP TABLE calculations_y2025m01"
+    assert conn.statements[4] == (
+        "ALTER TABLE calculation_input_chunks DETACH PARTITION calculation_input_chunks_y2025m06"
+    )
+
+def test_pruning_criteria(monkeypatch):
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "none")
+    assert partitioning.pruning_criteria(Calculation, uuid7()) == []
+    monkeypatch.setattr(partitioning.settings, "CALCULATIONS_PARTITIONING", "range")
+    assert partitioning.pruning_criteria(Calculation, uuid4()) == []
+    calc_id = uuid7()
+    created = uuid7_datetime(calc_id)
+    assert abs(created - datetime.utcnow()) < timedelta(seconds=5)
+    lower, upper = partitioning.pruning_criteria(Calculation, calc_id)
+    assert lower.right.value == created - partitioning.ID_TIMESTAMP_SLACK
+    assert upper.right.value == created + partitioning.ID_TIMESTAMP_SLACK
@@ -34,3 +34,75 @@ def test_is_blacklisted(monkeypatch):
     assert redis_module.is_blacklisted("testjti") is True
     mock_redis.get.return_value = None
     assert redis_module.is_blacklisted("testjti") is False
+
+def test_circuit_breaker_opens_after_threshold():
+    now = [0.0]
+    breaker = redis_module.CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=lambda: now[0])
+    failing = MagicMock(side_effect=redis_module.redis.ConnectionError("down"))
+    for _ in range(2):
+        with pytest.raises(redis_module.redis.ConnectionError):
+            breaker.call(failing)
+    assert breaker.state == "open"
+    with pytest.raises(redis_module.CircuitOpenError):
+        breaker.call(failing)
+    assert failing.call_count == 2
+
+def test_circuit_breaker_half_open_probe():
+    now = [0.0]
+    breaker = redis_module.CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=lambda: now[0])
+    with pytest.raises(redis_module.redis.ConnectionError):
+        breaker.call(MagicMock(side_effect=redis_module.redis.ConnectionError("down")))
+    now[0] = 11
+    assert breaker.state == "half_open"
+    # Failed probe re-opens the breaker
+    with pytest.raises(redis_module.redis.TimeoutError):
+        breaker.call(MagicMock(side_effect=redis_module.redis.TimeoutError("slow")))
+    assert breaker.state == "open"
+    now[0] = 22
+    # Successful probe closes it again
+    assert breaker.call(MagicMock(return_value="ok")) == "ok"
+    assert breaker.state == "closed"
+
+def test_is_blacklisted_degraded_modes(monkeypatch):
+    import asyncio
+    mock_redis = MagicMock()
+    mock_redis.get.side_effect = redis_module.redis.ConnectionError("down")
+    mock_redis.set.side_effect = redis_module.redis.ConnectionError("down")
+    monkeypatch.setattr(redis_module, "get_redis", MagicMock(return_value=mock_redis))
+    monkeypatch.setattr(redis_module, "breaker", redis_module.CircuitBreaker(failure_threshold=1, recovery_timeout=60))
+    monkeypatch.setattr(redis_module, "_local_revocations", {})
+
+    monkeypatch.setattr(redis_module.settings, "REDIS_DEGRADED_MODE", "fail_open")
+    redis_module.add_to_blacklist("revoked", 60)
+    assert asyncio.run(redis_module.is_blacklisted("revoked")) is True
+    assert asyncio.run(redis_module.is_blacklisted("other")) is False
+
+    monkeypatch.setattr(redis_module.settings, "REDIS_DEGRADED_MODE", "fail_closed")
+    assert asyncio.run(redis_module.is_blacklisted("other")) is True
+
+def test_circuit_breaker_probe_released_on_other_errors():
+    now = [0.0]
+    breaker = redis_module.CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=lambda: now[0])
+    with pytest.raises(redis_module.redis.ConnectionError):
+        breaker.call(MagicMock(side_effect=redis_module.redis.ConnectionError("down")))
+    now[0] = 11
+    # A non-Redis error during the probe must not wedge the breaker half-open
+    with pytest.raises(KeyError):
+        breaker.call(MagicMock(side_effect=KeyError("bug")))
+    assert breaker.state == "half_open"
+    assert breaker.call(MagicMock(return_value="ok")) == "ok"
+    assert breaker.state == "closed"
+
+def test_local_revocations_are_pruned(monkeypatch):
+    monkeypatch.setattr(redis_module, "_local_revocations", {})
+    monkeypatch.setattr(redis_module, "_local_prune_at", 4)
+    monkeypatch.setattr(redis_module, "_LOCAL_PRUNE_SIZE", 4)
+    monkeypatch.setattr(redis_module, "_LOCAL_MAX_REVOCATIONS", 5)
+    for i in range(3):
+        redis_module._remember_revocation(f"expired{i}", -1)
+    redis_module._remember_revocation("live", 60)
+    assert list(redis_module._local_revocations) == ["live"]
+    for i in range(20):
+        redis_module._remember_revocation(f"jti{i}", 60)
+    assert len(redis_module._local_revocations) <= 2 * 5
+    assert "jti19" in redis_module._local_revocations
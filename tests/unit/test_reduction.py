@@ -0,0 +1,106 @@
+# tests/unit/test_reduction.py
+
+import math
+import random
+import uuid
+from array import array
+
+import pytest
+
+from app.models import calculation as calculation_module
+from app.models.calculation import Calculation
+from app.operations.reduction import parallel_reduce
+
+random.seed(44)
+VALUES = [random.uniform(-1, 1) for _ in range(10_001)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sums_are_compensated(workers):
+    total = parallel_reduce("addition", VALUES, workers=workers, chunk_size=1_000)
+    assert total == math.fsum(VALUES)
+    difference = parallel_reduce("subtraction", array("d", VALUES), workers=workers, chunk_size=1_000)
+    assert difference == math.fsum([VALUES[0]] + [-value for value in VALUES[1:]])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_products_match_serial_within_rounding(workers):
+    values = [random.uniform(0.9, 1.1) for _ in range(5_000)]
+    expected = 1.0
+    for value in values:
+        expected *= value
+    assert parallel_reduce("multiplication", values, workers=workers, chunk_size=700) == pytest.approx(expected, rel=1e-12)
+    quotient = parallel_reduce("division", [3.0] + values, workers=workers, chunk_size=700)
+    assert quotient == pytest.approx(3.0 / expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize(
+    "operation, values",
+    [
+        ("addition", [1e308] * 4),
+        ("addition", [-1e308] * 5),
+        ("subtraction", [-1e308] + [1e308] * 3),
+        ("subtraction", [1.5e308, -1e308, -1e308]),
+    ],
+)
+def test_overflowing_sums_match_serial(operation, values, workers):
+    serial = Calculation.create(operation, uuid.uuid4(), values).get_result()
+    assert math.isinf(serial)
+    assert parallel_reduce(operation, values, workers=workers, chunk_size=2) == serial
+
+
+def test_sums_avoid_intermediate_overflow():
+    values = [1e308, 1e308, -1e308, -1e308, 5.0]
+    assert parallel_reduce("addition", values, workers=1, chunk_size=2) == 5.0
+    assert parallel_reduce("addition", values, workers=1, chunk_size=5) == 5.0
+
+
+def test_products_avoid_intermediate_overflow_and_underflow():
+    assert parallel_reduce("multiplication", [1e200, 1e200, 1e-300, 1e-100], workers=1) == pytest.approx(1.0)
+    assert parallel_reduce("multiplication", [1e-200] * 3 + [1e300] * 2, workers=1) == pytest.approx(1.0)
+    assert parallel_reduce("division", [1.0, 1e200, 1e200, 1e-300], workers=1) == pytest.approx(1e-100)
+    # A product that really overflows still does
+    assert parallel_reduce("multiplication", [-1e300, 1e300], workers=1) == -math.inf
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zero_divisor(workers):
+    with pytest.raises(ValueError, match="divide by zero"):
+        parallel_reduce("division", array("d", [1.0, 2.0, 0.0, 3.0]), workers=workers, chunk_size=2)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        parallel_reduce("addition", [1.0], workers=1)
+    with pytest.raises(ValueError):
+        parallel_reduce("modulo", [1.0, 2.0], workers=1)
+
+
+def test_calculations_switch_to_engine_at_threshold(monkeypatch):
+    calls = []
+
+    def fake_reduce(operation, values):
+        calls.append(operation)
+        return 0.0
+
+    monkeypatch.setattr(calculation_module, "parallel_reduce", fake_reduce)
+    monkeypatch.setattr(calculation_module.settings, "CALCULATIONS_PARALLEL_THRESHOLD", 3)
+    monkeypatch.setattr(calculation_module.settings, "CALCULATIONS_MEMO_ENABLED", False)
+    user_id = uuid.uuid4()
+    assert Calculation.create("addition", user_id, [1.0, 2.0]).get_result() == 3.0
+    for operation in ("addition", "subtraction", "multiplication", "division"):
+        Calculation.create(operation, user_id, [1.0, 2.0, 3.0]).get_result()
+    assert calls == ["addition", "subtraction", "multiplication", "division"]
+
+
+def test_pool_does_not_fork_and_shuts_down():
+    from app.operations import reduction
+    parallel_reduce("addition", VALUES, workers=2, chunk_size=1_000)
+    pool = reduction._executor(2)
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    reduction.shutdown_pool()
+    assert reduction._pool is None
+    # Started again on demand
+    assert parallel_reduce("addition", [1.0, 2.0, 3.0], workers=2, chunk_size=1) == 6.0
+    reduction.shutdown_pool()
@@ -0,0 +1,90 @@
+import operator
+from array import array
+from functools import partial, reduce
+
+import pytest
+
+from app.models import calculation
+from app.models.calculation import Addition, Calculation, calculation_classes
+from app.operations import add, divide, multiply, registry, subtract
+from app.operations.reduction import parallel_reduce
+from app.operations.registry import Operation, get_operation, operation_names, register
+from app.schemas.calculation import CalculationType
+
+
+@pytest.fixture
+def modulo():
+    operation = Operation("modulo", fold=partial(reduce, operator.mod))
+    register(operation)
+    yield operation
+    registry._operations.pop("modulo")
+
+
+def test_registry_drives_models_and_schema():
+    assert operation_names() == (
+        "addition", "subtraction", "multiplication", "division",
+        "mean", "variance", "stddev", "min", "max", "median", "expression",
+    )
+    assert [member.value for member in CalculationType] == list(operation_names())
+    assert set(calculation_classes) == set(operation_names())
+    assert calculation_classes["addition"] is Addition
+    assert Addition.operation is get_operation("addition")
+    assert Addition.__mapper__.polymorphic_identity == "addition"
+
+
+@pytest.mark.parametrize(
+    "name, kernel, values",
+    [
+        ("addition", add, [1, 2, 3.5]),
+        ("subtraction", subtract, [10, 3, 2.5]),
+        ("multiplication", multiply, [2, 3, 0.5]),
+        ("division", divide, [100, 2, 5]),
+    ],
+)
+def test_reduce_matches_scalar_kernel_and_chunks(name, kernel, values):
+    operation = get_operation(name)
+    expected = reduce(kernel, values)
+    assert operation.reduce(values) == expected
+    assert operation.reduce(array("d", values)) == expected
+    chunks = [values[:1], [], values[1:]]
+    assert operation.reduce_chunks(chunks) == (expected, len(values))
+
+
+def test_validate_rules():
+    get_operation("division").validate([0, 1])
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        get_operation("division").validate([1, 2, 0])
+    with pytest.raises(ValueError, match="At least two numbers"):
+        get_operation("addition").validate([1])
+    with pytest.raises(ValueError, match="Cannot divide by zero."):
+        get_operation("division").reduce([1, 0.0])
+
+
+def test_register_rejects_duplicates_and_bad_names(modulo):
+    assert get_operation("modulo") is modulo
+    with pytest.raises(ValueError, match="already registered"):
+        register(Operation("modulo", fold=sum))
+    with pytest.raises(ValueError, match="lowercase identifiers"):
+        Operation("Modulo", fold=sum)
+    with pytest.raises(ValueError, match="reduction must be one of"):
+        Operation("remainder", fold=sum, reduction="mod")
+
+
+def test_unregistered_and_non_reducible_operations(modulo):
+    with pytest.raises(ValueError, match="Unsupported calculation type"):
+        get_operation("power")
+    with pytest.raises(ValueError, match="Unsupported operation"):
+        parallel_reduce("modulo", [7.0, 4.0], workers=1)
+    with pytest.raises(NotImplementedError):
+        Calculation(inputs=[1, 2]).get_result()
+
+
+def test_plugin_operations_get_a_generated_class(modulo):
+    cls = calculation._plugin_class(modulo)
+    try:
+        assert calculation_classes["modulo"] is cls
+        assert cls.__name__ == "Modulo"
+        assert cls.operation is modulo
+        assert cls.__mapper__.polymorphic_identity == "modulo"
+    finally:
+        calculation_classes.pop("modulo")
@@ -0,0 +1,27 @@
+import uuid
+from array import array
+from datetime import datetime
+from app.models.calculation import Addition
+from app.schemas.calculation import CalculationResponse
+from app.serialization import calculation_payload, dumps, loads
+
+def _calculation(inputs):
+    calc = Addition(user_id=uuid.uuid4(), inputs=inputs)
+    calc.id = uuid.uuid4()
+    calc.result = calc.get_result()
+    calc.created_at = datetime(2025, 1, 1)
+    calc.updated_at = datetime(2025, 1, 1, 12, 30, 0, 250)
+    return calc
+
+def test_payload_matches_validated_response():
+    for inputs in ([1, 2.5], array("d", [3.0, 4.0])):
+        calc = _calculation(inputs)
+        expected = CalculationResponse.model_validate(calc).model_dump(mode="json")
+        assert loads(dumps(calculation_payload(calc))) == expected
+        assert list(loads(dumps(calculation_payload(calc)))) == list(expected)
+
+def test_dumps_encodes_uuid_and_datetime():
+    value = uuid.UUID("123e4567-e89b-12d3-a456-426614174000")
+    assert dumps({"id": value, "at": datetime(2025, 1, 1)}) == (
+        b'{"id":"123e4567-e89b-12d3-a456-426614174000","at":"2025-01-01T00:00:00"}'
+    )
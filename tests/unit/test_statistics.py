@@ -0,0 +1,100 @@
+import math
+import random
+import statistics as reference
+import uuid
+from array import array
+
+import pytest
+
+from app.models.calculation import Calculation, Max, Mean, Median, Min, Stddev, Variance
+from app.operations import statistics
+from app.operations.statistics import Moments, median, moments
+
+
+def chunked(values, size):
+    return [array("d", values[start:start + size]) for start in range(0, len(values), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_statistics_match_reference(size):
+    rng = random.Random(size)
+    values = [rng.uniform(-1e3, 1e3) for _ in range(1001)]
+    chunks = chunked(values, size)
+    assert statistics.mean(chunks) == (pytest.approx(reference.fmean(values)), 1001)
+    assert statistics.variance(chunks)[0] == pytest.approx(reference.variance(values))
+    assert statistics.stddev(chunks)[0] == pytest.approx(reference.stdev(values))
+    assert statistics.minimum(chunks) == (min(values), 1001)
+    assert statistics.maximum(chunks) == (max(values), 1001)
+    assert median(chunks) == (reference.median(values), 1001)
+
+
+def test_variance_is_stable_for_large_offsets():
+    values = [1e9 + x for x in (4.0, 7.0, 13.0, 16.0)]
+    assert statistics.variance(chunked(values, 1))[0] == pytest.approx(30.0)
+    assert Moments().update(values[:2]).update(values[2:]).variance == pytest.approx(30.0)
+
+
+def test_near_dbl_max_inputs_do_not_overflow_spuriously():
+    big = 1.7e308
+    assert statistics.mean([[big, big, big]]) == (pytest.approx(big), 3)
+    assert statistics.mean(chunked([1e308] * 5 + [-1e308] * 3, 3)) == (pytest.approx(2.5e307), 8)
+    assert statistics.variance(chunked([big] * 5, 2)) == (0.0, 5)
+    assert median([[big, big]]) == (big, 2)
+    assert median([[1e308, 1.5e308]]) == (1.25e308, 2)
+    # Results that are not representable overflow to inf rather than raising
+    assert statistics.variance([[1e308, -1e308]]) == (math.inf, 2)
+    assert Moments().update([1e308]).update([-1e308]).mean == 0.0
+    user_id = uuid.uuid4()
+    for calculation_type in ("mean", "variance", "stddev", "median"):
+        result = Calculation.create(calculation_type, user_id, [1e308, 1e308]).get_result()
+        assert result == (0.0 if calculation_type in ("variance", "stddev") else 1e308)
+
+
+def test_empty_and_too_short_inputs():
+    assert statistics.mean([]) == (None, 0)
+    assert statistics.variance([[1.0]]) == (None, 1)
+    assert statistics.minimum([[], []]) == (None, 0)
+    assert median([[]]) == (None, 0)
+    assert moments([]).stddev is None
+
+
+def test_median_selection_over_large_inputs(monkeypatch):
+    # A small sample forces the two-pass selection, including the fallback
+    monkeypatch.setattr(statistics, "_SAMPLE_SIZE", 16)
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(5000)]
+    assert median(chunked(values, 333)) == (reference.median(values), 5000)
+    assert median(iter(chunked(values, 333)))[0] == reference.median(values)
+    ascending = sorted(values)
+    assert median([ascending]) == (reference.median(ascending), 5000)
+    repeated = [float(i % 17) for i in range(4097)]
+    assert median(chunked(repeated, 100))[0] == reference.median(repeated)
+
+
+@pytest.mark.parametrize(
+    "calculation_type, cls, inputs, expected",
+    [
+        ("mean", Mean, [1, 2, 3, 4], 2.5),
+        ("variance", Variance, [2, 4, 4, 4, 5, 5, 7, 9], 32 / 7),
+        ("stddev", Stddev, [2, 4, 4, 4, 5, 5, 7, 9], (32 / 7) ** 0.5),
+        ("min", Min, [3, -1.5, 2], -1.5),
+        ("max", Max, [3, -1.5, 2], 3),
+        ("median", Median, [7, 1, 3, 5], 4.0),
+    ],
+)
+def test_statistical_calculations(calculation_type, cls, inputs, expected):
+    calculation = Calculation.create(calculation_type, None, inputs)
+    assert isinstance(calculation, cls)
+    assert calculation.get_result() == pytest.approx(expected)
+    chunks = [inputs[:1], inputs[1:]]
+    assert calculation.get_result_from_chunks(chunks) == pytest.approx(expected)
+
+
+def test_statistical_calculation_minimum_inputs():
+    assert Mean(inputs=[5]).get_result() == 5
+    with pytest.raises(ValueError, match="at least two numbers"):
+        Variance(inputs=[5]).get_result()
+    with pytest.raises(ValueError, match="at least one number"):
+        Median(inputs=[]).get_result()
+    with pytest.raises(ValueError, match="at least one number"):
+        Median().get_result_from_chunks([[], []])
@@ -0,0 +1,115 @@
+import math
+from itertools import product
+
+import pytest
+from pydantic import ValidationError
+
+from app.operations.expression import compile_expression
+from app.operations.sweep import Sweep, parameter_range
+from app.schemas.formula import FormulaCreate, FormulaSweep, ParameterRange
+
+
+def _results(sweep, block_size=None):
+    return [value for _, results in sweep.blocks(block_size) for value in results]
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 4096])
+def test_product_matches_pointwise_evaluation(block_size):
+    compiled = compile_expression("(a + b) * c / 2")
+    parameters = {"a": [1, 2], "b": [0.5, -1, 3], "c": [10, 20]}
+    sweep = Sweep(compiled, parameters)
+    assert sweep.points == 12
+    expected = [compiled.evaluate(point) for point in product(*parameters.values())]
+    assert _results(sweep, block_size) == expected
+
+
+def test_product_columns_follow_variable_order():
+    sweep = Sweep(compile_expression("y - x"), {"y": [10, 20], "x": [1, 2, 3]})
+    (columns, results), = sweep.blocks()
+    assert sweep.variables == ("x", "y")
+    assert columns[0].tolist() == [1, 1, 2, 2, 3, 3]
+    assert columns[1].tolist() == [10, 20, 10, 20, 10, 20]
+    assert results.tolist() == [9, 19, 8, 18, 7, 17]
+
+
+def test_zip_broadcasts_single_values():
+    sweep = Sweep(compile_expression("a * b"), {"a": [2], "b": [1, 2, 3, 4, 5]}, mode="zip")
+    assert sweep.points == 5
+    assert _results(sweep, block_size=2) == [2, 4, 6, 8, 10]
+
+
+def test_undefined_points_are_nan():
+    sweep = Sweep(compile_expression("1 / (a - b)"), {"a": [1, 2], "b": [1, 2]}, mode="zip")
+    assert all(math.isnan(value) for value in _results(sweep))
+    sweep = Sweep(compile_expression("max(a, b) / b"), {"a": [1, 4], "b": [0, 2]})
+    results = _results(sweep)
+    assert math.isnan(results[0]) and math.isnan(results[2])
+    assert results[1::2] == [1.0, 2.0]
+
+
+def test_constant_formula_is_one_point():
+    sweep = Sweep(compile_expression("6 / 4"), {})
+    assert sweep.points == 1
+    assert _results(sweep) == [1.5]
+
+
+@pytest.mark.parametrize(
+    "parameters, mode, message",
+    [
+        ({"a": [1]}, "product", "No values given for: b"),
+        ({"a": [1], "b": []}, "product", "No values given for: b"),
+        ({"a": [1], "b": [1], "c": [1]}, "product", "Not variables of the formula: c"),
+        ({"a": [1, 2], "b": [1, 2, 3]}, "zip", "same number of values"),
+        ({"a": [1], "b": [1]}, "cross", "mode must be one of"),
+        ({"a": list(range(1001)), "b": list(range(1000))}, "product", "limited to 1000000 points"),
+    ],
+)
+def test_invalid_sweeps(parameters, mode, message):
+    with pytest.raises(ValueError, match=message):
+        Sweep(compile_expression("a + b"), parameters, mode)
+
+
+def test_parameter_range_does_not_accumulate_error():
+    values = parameter_range(0, 1, step=0.1)
+    assert len(values) == 10
+    assert values[-1] == pytest.approx(0.9)
+    assert values[3] == 3 * 0.1
+    assert parameter_range(5, 0, num=6).tolist() == [5, 4, 3, 2, 1, 0]
+    assert parameter_range(1, 0, step=-0.5).tolist() == [1, 0.5]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ({"start": 0, "stop": 1}, "exactly one of step or num"),
+        ({"start": 0, "stop": 1, "step": 0.5, "num": 3}, "exactly one of step or num"),
+        ({"start": 0, "stop": 1, "step": 0}, "non-zero"),
+        ({"start": 1, "stop": 0, "step": 1}, "range is empty"),
+        ({"start": 0, "stop": 1e9, "step": 1}, "limited to"),
+        ({"start": 0, "stop": 1, "step": 5e-324}, "limited to"),
+        ({"start": -1e308, "stop": 1e308, "step": 1}, "limited to"),
+        ({"start": 1e308, "stop": -1e308, "step": 1}, "range is empty"),
+    ],
+)
+def test_invalid_ranges(data, message):
+    with pytest.raises(ValidationError, match=message):
+        ParameterRange(**data)
+
+
+def test_sweep_schema_parameter_values():
+    sweep = FormulaSweep(parameters={"a": [1, 2], "b": {"start": 0, "stop": 10, "num": 3}})
+    assert {name: values.tolist() for name, values in sweep.parameter_values().items()} == {
+        "a": [1, 2],
+        "b": [0, 5, 10],
+    }
+    assert sweep.mode.value == "product"
+
+
+def test_formula_create_canonicalizes_expression():
+    formula = FormulaCreate(name="  margin ", expression="(price-cost)/ price")
+    assert formula.name == "margin"
+    assert formula.expression == "(price - cost) / price"
+    with pytest.raises(ValidationError, match="Unsupported operator"):
+        FormulaCreate(name="power", expression="a ** 2")
+    with pytest.raises(ValidationError, match="Unsupported constant"):
+        FormulaCreate(name="huge", expression="9" * 400 + " + a")
@@ -0,0 +1,68 @@
+import uuid
+import pytest
+import struct
+from array import array
+
+from sqlalchemy import JSON
+
+from app.models import types as types_module
+from app.models.calculation import Addition, Division
+from app.models.types import (
+    Float64Vector,
+    as_float64_array,
+    column_value,
+    float64_view,
+    pack_float64,
+    unpack_float64,
+)
+from app.schemas.calculation import CalculationBase
+
+def test_pack_float64_is_little_endian():
+    assert pack_float64([1.5, -2.0]) == struct.pack("<2d", 1.5, -2.0)
+
+def test_unpack_float64_roundtrip_from_memoryview():
+    values = unpack_float64(memoryview(pack_float64([1, 2.5, 3e10])))
+    assert isinstance(values, array)
+    assert values.tolist() == [1.0, 2.5, 3e10]
+
+def test_float64_vector_type():
+    column_type = Float64Vector()
+    assert column_type.process_bind_param(None, None) is None
+    assert column_type.process_result_value(None, None) is None
+    packed = column_type.process_bind_param(array("d", [4.0, 2.0]), None)
+    assert column_type.process_result_value(packed, None) == array("d", [4.0, 2.0])
+
+def test_inputs_column_type(monkeypatch):
+    monkeypatch.setattr(types_module.settings, "CALCULATIONS_INPUTS_STORAGE", "json")
+    assert types_module.inputs_column_type() is JSON
+    monkeypatch.setattr(types_module.settings, "CALCULATIONS_INPUTS_STORAGE", "float64")
+    assert isinstance(types_module.inputs_column_type(), Float64Vector)
+
+def test_calculations_accept_array_inputs():
+    assert Addition(inputs=array("d", [1, 2, 3])).get_result() == 6
+    assert Division(inputs=array("d", [8, 2])).get_result() == 4
+    schema = CalculationBase(type="addition", inputs=array("d", [1, 2]))
+    assert schema.inputs == [1.0, 2.0]
+
+def test_float64_view_is_zero_copy():
+    data = bytearray(struct.pack("<3d", 1.0, 2.0, 3.5))
+    view = float64_view(data)
+    assert list(view) == [1.0, 2.0, 3.5]
+    data[:8] = struct.pack("<d", 9.0)
+    assert view[0] == 9.0
+    with pytest.raises(ValueError):
+        float64_view(b"1234567")
+
+def test_float64_view_feeds_storage_helpers(monkeypatch):
+    view = float64_view(struct.pack("<2d", 1.5, -2.0))
+    assert pack_float64(view) == struct.pack("<2d", 1.5, -2.0)
+    assert as_float64_array(view) == array("d", [1.5, -2.0])
+    assert unpack_float64(memoryview(struct.pack("<d", 4.0))) == array("d", [4.0])
+    monkeypatch.setattr(types_module.settings, "CALCULATIONS_INPUTS_STORAGE", "json")
+    assert column_value(view) == [1.5, -2.0]
+    monkeypatch.setattr(types_module.settings, "CALCULATIONS_INPUTS_STORAGE", "float64")
+    assert column_value(view) is view
+
+def test_calculation_computes_on_view():
+    view = float64_view(struct.pack("<3d", 8.0, 2.0, 2.0))
+    assert Division.create("division", uuid.uuid4(), view).get_result() == 2.0
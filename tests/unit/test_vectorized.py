@@ -0,0 +1,88 @@
+# tests/unit/test_vectorized.py
+
+from array import array
+
+import pytest
+
+from app.operations import vectorized
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def ops(request, monkeypatch):
+    """Run each test with NumPy (when installed) and with the pure-Python path."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(vectorized, "np", None)
+    return vectorized
+
+
+def test_scalar_fast_path(ops):
+    assert ops.add(2, 3) == 5
+    assert isinstance(ops.add(2, 3), int)
+    assert ops.divide(6, 3) == 2.0
+    with pytest.raises(ValueError, match="Cannot divide by zero!"):
+        ops.divide(1, 0)
+
+
+@pytest.mark.parametrize(
+    "func, a, b, expected",
+    [
+        ("add", [1, 2, 3], 10, [11.0, 12.0, 13.0]),
+        ("subtract", 10, [1, 2], [9.0, 8.0]),
+        ("multiply", [2], [1, 2, 3], [2.0, 4.0, 6.0]),
+        ("divide", [6, 5], [3, 2], [2.0, 2.5]),
+    ],
+    ids=["vector_scalar", "scalar_vector", "broadcast_length_one", "pairwise"],
+)
+def test_broadcasting(ops, func, a, b, expected):
+    result = getattr(ops, func)(a, b)
+    assert isinstance(result, array)
+    assert result.tolist() == expected
+
+
+def test_iterables(ops):
+    assert ops.add((x for x in range(3)), [1]).tolist() == [1.0, 2.0, 3.0]
+
+
+def test_buffers(ops):
+    divisors = memoryview(array("d", [3.0, 2.0]).tobytes()).cast("d")
+    assert ops.divide(array("d", [6.0, 5.0]), divisors).tolist() == [2.0, 2.5]
+
+
+@pytest.mark.parametrize(
+    "a, b, indices",
+    [
+        ([1, 2, 3], [1, 0, 0], [1, 2]),
+        ([1, 2], 0, [0, 1]),
+        (5, [0, 1, 0], [0, 2]),
+        ([1, 2, 3], [0], [0, 1, 2]),
+    ],
+)
+def test_zero_divisor_indices(ops, a, b, indices):
+    with pytest.raises(vectorized.ZeroDivisorError) as exc:
+        ops.divide(a, b)
+    assert exc.value.indices == indices
+    assert isinstance(exc.value, ValueError)
+
+
+def test_zero_divisor_message_is_truncated(ops):
+    with pytest.raises(ValueError, match=r"\[0, 1, 2, 3, 4, 5, 6, 7, 8, 9\] and 20 more"):
+        ops.divide(list(range(30)), [0] * 30)
+
+
+def test_incompatible_lengths(ops):
+    with pytest.raises(ValueError):
+        ops.add([1, 2], [1, 2, 3])
+    with pytest.raises(TypeError):
+        ops.add("ab", [1])
+
+
+def test_numpy_arrays_stay_numpy():
+    np = pytest.importorskip("numpy")
+    result = vectorized.add(np.ones((2, 3)), np.arange(3.0))
+    assert isinstance(result, np.ndarray)
+    assert result.shape == (2, 3)
+    with pytest.raises(vectorized.ZeroDivisorError) as exc:
+        vectorized.divide(np.ones((2, 2)), np.array([[1, 0], [0, 1]]))
+    assert exc.value.indices == [1, 2]